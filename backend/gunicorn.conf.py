@@ -0,0 +1,42 @@
+"""
+Gunicorn configuration for the HRMS backend.
+
+Run with: gunicorn -c gunicorn.conf.py
+The app is preloaded and warmed in the master, then forked, so replacement
+workers are ready as soon as they have opened their own cache connections.
+"""
+
+import multiprocessing
+import os
+
+wsgi_app = 'hrms_project.wsgi:application'
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', '8000')}")
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+# Threaded workers: each open dashboard stream (/api/dashboard/stream/) holds
+# one thread for up to DASHBOARD_STREAM_MAX_SECONDS. The gthread worker
+# heartbeats the arbiter from its main loop, so a long stream is not killed
+# by `timeout` the way a sync worker would be. Keep GUNICORN_THREADS above
+# DASHBOARD_STREAM_MAX_PER_PROCESS so API requests always find a thread.
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 0))
+
+preload_app = True
+
+
+def when_ready(server):
+    """Warm the preloaded app once in the master before workers fork"""
+    from hrms_project.warmup import close_connections, warm_up_application
+
+    warm_up_application()
+    close_connections()
+    server.log.info('Application warmed up')
+
+
+def post_worker_init(worker):
+    """Open per-worker cache connections before the worker accepts requests"""
+    from hrms_project.warmup import warm_up_connections
+
+    warm_up_connections()
@@ -1,5 +1,157 @@
+from datetime import date
+
 from django.contrib import admin
-from .models import Employee, Attendance
+from django.contrib.admin.views.main import ChangeList
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections, models
+from django.utils.functional import cached_property
+from . import purge
+from .models import Employee, Attendance, AuditEvent, WorkingCalendar, Holiday
+
+
+DEPARTMENT_CHOICES_KEY = 'hrms:admin:departments'
+DEPARTMENT_CHOICES_TIMEOUT = 300
+
+# Below this many rows an exact COUNT(*) is cheap enough to keep
+ESTIMATED_COUNT_THRESHOLD = 100000
+
+
+def estimated_row_count(model, using='default'):
+    """
+    Return the planner's row estimate for a model's table, or None when the
+    database keeps no usable statistics
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table])
+        elif connection.vendor == 'mysql':
+            cursor.execute(
+                'SELECT table_rows FROM information_schema.tables '
+                'WHERE table_schema = DATABASE() AND table_name = %s', [table]
+            )
+        elif connection.vendor == 'sqlite':
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+            )
+            if cursor.fetchone() is None:
+                return None
+            # ANALYZE stores "<rows> ..." per index, or just "<rows>" for the table
+            cursor.execute(
+                'SELECT stat FROM sqlite_stat1 WHERE tbl = %s ORDER BY idx IS NULL DESC LIMIT 1',
+                [table]
+            )
+            row = cursor.fetchone()
+            return int(row[0].split()[0]) if row else None
+        else:
+            return None
+        row = cursor.fetchone()
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+def is_unfiltered(queryset):
+    """
+    True when queryset filters nothing beyond its model's default manager,
+    such as the soft-delete filter on employees
+    """
+    manager_queryset = queryset.model._default_manager.using(queryset.db).all()
+    return where_sql(queryset) == where_sql(manager_queryset)
+
+
+def where_sql(queryset):
+    """The compiled WHERE clause of queryset, as (sql, params)"""
+    query = queryset.query
+    if not query.where:
+        return '', ()
+    sql, params = query.get_compiler(queryset.db).compile(query.where)
+    return sql, tuple(params)
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that reads the unfiltered changelist count from planner
+    statistics instead of running COUNT(*) over the whole table. The
+    estimate covers the whole table, soft-deleted rows included.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if hasattr(queryset, 'query') and is_unfiltered(queryset):
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
+class DateRangeQuerySet(models.QuerySet):
+    """
+    QuerySet whose year/month dates() come from the first and last values of
+    the indexed date column instead of a DISTINCT over every row. Attendance is
+    dense, so every month between the bounds is listed.
+    """
+
+    def dates(self, field_name, kind, order='ASC'):
+        if kind not in ('year', 'month'):
+            return super().dates(field_name, kind, order)
+
+        # Separate ORDER BY ... LIMIT 1 lookups let every backend read the index ends
+        first = self.order_by(field_name).values_list(field_name, flat=True).first()
+        if first is None:
+            return []
+        last = self.order_by(f'-{field_name}').values_list(field_name, flat=True).first()
+
+        values = []
+        year, month = first.year, first.month if kind == 'month' else 1
+        while (year, month) <= (last.year, last.month if kind == 'month' else 1):
+            values.append(date(year, month, 1))
+            if kind == 'year':
+                year += 1
+            else:
+                year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return values[::-1] if order == 'DESC' else values
+
+
+class DateRangeChangeList(ChangeList):
+    """ChangeList that renders its date hierarchy from DateRangeQuerySet"""
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        return DateRangeQuerySet(model=queryset.model, query=queryset.query, using=queryset.db)
+
+
+class DepartmentListFilter(admin.SimpleListFilter):
+    """
+    Department filter whose choices come from a short-lived cache entry
+    instead of a DISTINCT query on every changelist view
+    """
+    title = 'department'
+    parameter_name = 'department'
+    field_path = 'department'
+
+    def lookups(self, request, model_admin):
+        departments = cache.get(DEPARTMENT_CHOICES_KEY)
+        if departments is None:
+            departments = list(
+                Employee.objects.order_by('department')
+                .values_list('department', flat=True).distinct()
+            )
+            cache.set(DEPARTMENT_CHOICES_KEY, departments, DEPARTMENT_CHOICES_TIMEOUT)
+        return [(department, department) for department in departments]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(**{self.field_path: self.value()})
+        return queryset
+
+
+class EmployeeDepartmentListFilter(DepartmentListFilter):
+    parameter_name = 'employee__department'
+    field_path = 'employee__department'
 
 
 @admin.register(Employee)
@@ -7,7 +159,7 @@ class EmployeeAdmin(admin.ModelAdmin):
     """Admin configuration for Employee model"""
     
     list_display = ['employee_id', 'full_name', 'email', 'department', 'created_at']
-    list_filter = ['department', 'created_at']
+    list_filter = [DepartmentListFilter, 'created_at']
     search_fields = ['employee_id', 'full_name', 'email', 'department']
     ordering = ['employee_id']
     readonly_fields = ['created_at', 'updated_at']
@@ -22,16 +174,41 @@ class EmployeeAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_deleted_objects(self, objs, request):
+        """List only the employees; collecting their attendance would be slow"""
+        objs = list(objs)
+        perms_needed = set()
+        if not self.has_delete_permission(request):
+            perms_needed.add(self.opts.verbose_name)
+        return [str(obj) for obj in objs], {self.opts.verbose_name_plural: len(objs)}, perms_needed, []
+
+    def delete_model(self, request, obj):
+        """
+        Soft-delete: the employee and their attendance are hidden at once and
+        purge_deleted_employees removes the rows later
+        """
+        purge.deactivate_employees(Employee.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        purge.deactivate_employees(queryset)
+
 
 @admin.register(Attendance)
 class AttendanceAdmin(admin.ModelAdmin):
     """Admin configuration for Attendance model"""
     
     list_display = ['employee', 'date', 'status', 'created_at']
-    list_filter = ['status', 'date', 'employee__department']
-    search_fields = ['employee__employee_id', 'employee__full_name']
-    ordering = ['-date', 'employee__employee_id']
+    list_filter = ['status', EmployeeDepartmentListFilter]
+    # Exact ID and name-prefix matches can use indexes, unlike icontains
+    search_fields = ['=employee__employee_id', '^employee__full_name']
+    # Matches attendance_date_employee_idx, so pages are read in index order
+    ordering = ['-date', '-employee']
     readonly_fields = ['created_at', 'updated_at']
+    date_hierarchy = 'date'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_select_related = ['employee']
+    raw_id_fields = ['employee']
     
     fieldsets = (
         ('Attendance Information', {
@@ -46,3 +223,41 @@ class AttendanceAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         """Optimize queryset with select_related"""
         return super().get_queryset(request).select_related('employee')
+
+    def get_changelist(self, request, **kwargs):
+        return DateRangeChangeList
+
+
+class HolidayInline(admin.TabularInline):
+    model = Holiday
+    extra = 1
+
+
+@admin.register(WorkingCalendar)
+class WorkingCalendarAdmin(admin.ModelAdmin):
+    """Admin configuration for WorkingCalendar model"""
+    
+    list_display = ['name', 'department', 'weekend_days', 'updated_at']
+    search_fields = ['name', 'department']
+    readonly_fields = ['created_at', 'updated_at']
+    inlines = [HolidayInline]
+
+
+@admin.register(AuditEvent)
+class AuditEventAdmin(admin.ModelAdmin):
+    """Read-only admin for the append-only audit trail"""
+    
+    list_display = ['occurred_at', 'action', 'resource', 'object_id', 'employee_ref', 'actor']
+    list_filter = ['action', 'resource']
+    search_fields = ['=actor']
+    date_hierarchy = 'occurred_at'
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -5,3 +5,6 @@ class HrmsAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'hrms_app'
     verbose_name = 'HRMS Application'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,281 @@
+"""
+Append-only audit trail written off the request path.
+
+Views record field-level diffs as AuditEvent instances in memory once their
+transaction commits. A per-process AuditWriter thread appends them with
+bulk_create every AUDIT_FLUSH_INTERVAL seconds, or sooner when
+AUDIT_BATCH_SIZE events are waiting. The request never waits on an audit
+insert. A failed batch is retried with backoff up to AUDIT_WRITE_ATTEMPTS
+times, then spilled as JSON lines to AUDIT_SPILL_DIR; spilled files are
+written back by whichever writer next succeeds. At interpreter exit, queued
+events are flushed and the writer's in-flight batch is waited for. A hard
+crash can lose up to one interval of events.
+
+With AUDIT_ASYNC disabled (tests, management commands), each commit's
+events are written synchronously in one batch.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core import serializers
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import Employee, Attendance, AuditEvent
+
+logger = logging.getLogger(__name__)
+
+# Bookkeeping fields that change on every save and add nothing to a diff
+IGNORED_FIELDS = {'created_at', 'updated_at'}
+# Backoff between attempts at a failed batch, doubling up to the maximum
+RETRY_DELAY = 0.5
+MAX_RETRY_DELAY = 8.0
+
+
+def is_enabled():
+    return getattr(settings, 'AUDIT_ENABLED', True)
+
+
+def snapshot(instance):
+    """Auditable field values of a model instance"""
+    return {
+        field.attname: getattr(instance, field.attname)
+        for field in instance._meta.concrete_fields
+        if not field.primary_key and field.name not in IGNORED_FIELDS
+    }
+
+
+def diff(before, after):
+    """{field: [old, new]} for every field whose value changed"""
+    return {
+        field: [before.get(field), value]
+        for field, value in after.items()
+        if before.get(field) != value
+    }
+
+
+def deletion(before):
+    """Diff for a deleted record: every field goes to None"""
+    return {field: [value, None] for field, value in before.items()}
+
+
+def employee_ref(instance):
+    if isinstance(instance, Employee):
+        return instance.pk
+    if isinstance(instance, Attendance):
+        return instance.employee_id
+    return None
+
+
+def record(action, instance, changes, request=None):
+    """Queue an audit event for instance once the current transaction commits"""
+    if not is_enabled():
+        return
+    event = AuditEvent(
+        action=action,
+        resource=instance._meta.model_name,
+        object_id=instance.pk,
+        employee_ref=employee_ref(instance),
+        changes=changes,
+        actor=actor_for(request),
+    )
+    transaction.on_commit(lambda: get_writer().append([event]))
+
+
+def record_many(events):
+    """Queue prepared AuditEvent instances once the current transaction commits"""
+    if is_enabled() and events:
+        transaction.on_commit(lambda: get_writer().append(events))
+
+
+def actor_for(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.get_username()
+    return ''
+
+
+class AuditWriter:
+    """Collects audit events in memory and appends them to the database in batches"""
+
+    def __init__(self, batch_size=200, interval=1.0, asynchronous=True, attempts=5, spill_dir=None):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.asynchronous = asynchronous
+        self.attempts = attempts
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        self.queue = queue.Queue()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def append(self, events):
+        now = timezone.now()
+        for event in events:
+            event.occurred_at = event.occurred_at or now
+            event.day = event.occurred_at.date()
+        if not self.asynchronous:
+            if not self.write(events):
+                self.spill(events)
+            return
+        self.ensure_started()
+        for event in events:
+            self.queue.put(event)
+
+    def ensure_started(self):
+        # A thread started before a fork does not exist in the child
+        if self.is_running():
+            return
+        with self._lock:
+            if not self.is_running():
+                if self._pid is not None:
+                    # Events copied from the parent are the parent's to write
+                    self.queue = queue.Queue()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='hrms-audit-writer', daemon=True)
+                self._thread.start()
+
+    def is_running(self):
+        return self._thread is not None and self._pid == os.getpid() and self._thread.is_alive()
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self.write_with_retry(batch)
+            except Exception:
+                # Keep the thread alive for later events whatever happened
+                logger.exception('Audit writer failed on a batch of %d events', len(batch))
+            finally:
+                # Marks the batch done for flush(), which waits on the queue
+                for _ in batch:
+                    self.queue.task_done()
+
+    def write_with_retry(self, events):
+        """Write events, retrying with backoff, and spill them if every attempt fails"""
+        delay = RETRY_DELAY
+        for attempt in range(self.attempts):
+            if attempt:
+                time.sleep(delay)
+                delay = min(delay * 2, MAX_RETRY_DELAY)
+            close_old_connections()
+            if self.write(events):
+                self.replay_spilled()
+                return True
+        self.spill(events)
+        return False
+
+    def drain(self):
+        """Take every queued event without blocking"""
+        events = []
+        while True:
+            try:
+                events.append(self.queue.get_nowait())
+            except queue.Empty:
+                return events
+
+    def flush(self, timeout=30.0):
+        """Write queued events from the calling thread, then wait for the writer's in-flight batch"""
+        events = self.drain()
+        for start in range(0, len(events), self.batch_size):
+            batch = events[start:start + self.batch_size]
+            if not self.write(batch):
+                self.spill(batch)
+        for _ in events:
+            self.queue.task_done()
+        with self.queue.all_tasks_done:
+            if not self.queue.all_tasks_done.wait_for(lambda: not self.queue.unfinished_tasks, timeout):
+                logger.warning('Audit writer still busy after %.0fs', timeout)
+        return len(events)
+
+    def write(self, events):
+        """Append events in one transaction; returns whether they were written"""
+        try:
+            with transaction.atomic():
+                AuditEvent.objects.bulk_create(events, batch_size=self.batch_size)
+        except Exception:
+            logger.exception('Could not write %d audit events', len(events))
+            for event in events:
+                # Ids returned before the rollback must not be reused on retry
+                event.pk = None
+            return False
+        return True
+
+    def spill(self, events):
+        """Save events that could not be written to a new file in spill_dir"""
+        if self.spill_dir is None:
+            logger.error('Dropped %d audit events (AUDIT_SPILL_DIR is not set)', len(events))
+            return
+        name = f'audit-{time.time_ns()}-{os.getpid()}-{threading.get_ident()}.jsonl'
+        partial = self.spill_dir / f'.{name}'
+        try:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            partial.write_text(serializers.serialize('jsonl', events))
+            # Renamed into place so a replaying writer never reads half a file
+            partial.rename(self.spill_dir / name)
+        except OSError:
+            logger.exception('Dropped %d audit events that could not be spilled', len(events))
+            return
+        logger.error('Spilled %d audit events to %s', len(events), self.spill_dir / name)
+
+    def replay_spilled(self):
+        """Write back spilled files; each is claimed by renaming it so one writer replays it"""
+        if self.spill_dir is None or not self.spill_dir.is_dir():
+            return 0
+        replayed = 0
+        for path in sorted(self.spill_dir.glob('audit-*.jsonl')):
+            claimed = path.with_name(f'.replaying-{os.getpid()}-{path.name}')
+            try:
+                path.rename(claimed)
+            except FileNotFoundError:
+                continue
+            try:
+                events = [item.object for item in serializers.deserialize('jsonl', claimed.read_text())]
+            except Exception:
+                # Unreadable: set it aside so it neither blocks nor repeats the replay
+                logger.exception('Quarantined unreadable audit spill file %s', path.name)
+                claimed.rename(path.with_name(f'corrupt-{path.name}'))
+                continue
+            if not self.write(events):
+                claimed.rename(path)
+                break
+            claimed.unlink()
+            replayed += len(events)
+        return replayed
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    """Return the process-wide audit writer, creating it on first use"""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = AuditWriter(
+                    batch_size=getattr(settings, 'AUDIT_BATCH_SIZE', 200),
+                    interval=getattr(settings, 'AUDIT_FLUSH_INTERVAL', 1.0),
+                    asynchronous=getattr(settings, 'AUDIT_ASYNC', True),
+                    attempts=getattr(settings, 'AUDIT_WRITE_ATTEMPTS', 5),
+                    spill_dir=getattr(settings, 'AUDIT_SPILL_DIR', None),
+                )
+                atexit.register(_writer.flush)
+    return _writer
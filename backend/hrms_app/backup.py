@@ -0,0 +1,345 @@
+"""
+Streaming snapshot dump and restore of the HR tables.
+
+A snapshot is a directory holding manifest.json plus one compressed CSV
+file per table (gzip, or zstd when the zstandard package is installed).
+Rows are streamed in primary-key order, a chunk at a time, inside a single
+read transaction so every table comes from the same point in time. On
+PostgreSQL the CSV is produced and consumed by COPY; elsewhere it is
+written with the csv module, fetching a chunk of rows at a time.
+
+Restore loads into empty tables (or replaces their contents) in one
+transaction:
+- foreign keys are checked at commit (SET CONSTRAINTS ALL DEFERRED or
+  PRAGMA defer_foreign_keys)
+- secondary indexes are dropped before loading and rebuilt afterwards
+- sequences are reset at the end
+
+Once the restore commits, the employee list snapshot is marked for a
+rebuild, cached calendars are dropped and dashboard streams get a fresh
+summary. Tombstones are not part of a snapshot, so change-feed cursors
+issued before a restore no longer describe the data: clients must resync
+without a cursor.
+
+Soft-deleted employees and attendance awaiting the purge are included.
+Only the default database is covered, so both refuse to run while
+attendance is sharded (ATTENDANCE_SHARDS).
+"""
+
+import csv
+import gzip
+import io
+import json
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timezone as dt_timezone
+from pathlib import Path
+
+from django.core.management.color import no_style
+from django.db import connections, transaction
+from django.utils import timezone
+
+from . import sharding
+from .lazy import optional_module
+from .models import Employee, Attendance, WorkingCalendar, Holiday
+
+
+FORMAT_VERSION = 1
+NULL = r'\N'
+CHUNK_SIZE = 5000
+COPY_BUFFER = 1024 * 1024
+
+# Restore order satisfies foreign keys; flush runs in reverse
+MODELS = [Employee, WorkingCalendar, Holiday, Attendance]
+
+
+class SnapshotError(Exception):
+    """A snapshot cannot be written or restored"""
+
+
+def check_unsharded():
+    if sharding.is_enabled():
+        raise SnapshotError(
+            'Attendance is sharded (ATTENDANCE_SHARDS); snapshots only cover the default database'
+        )
+
+
+def compressed_open(path, mode, compression, level=None):
+    """Open a binary compressed stream for reading ('rb') or writing ('wb')"""
+    if compression == 'zstd':
+        zstandard = optional_module('zstandard')
+        if zstandard is None:
+            raise SnapshotError('zstd compression needs the zstandard package')
+        if mode == 'wb':
+            return zstandard.open(path, mode, cctx=zstandard.ZstdCompressor(level=level or 3))
+        return zstandard.open(path, mode)
+    if mode == 'wb':
+        return gzip.open(path, mode, compresslevel=level or 3)
+    return gzip.open(path, mode)
+
+
+def columns_for(model):
+    return [field.column for field in model._meta.concrete_fields]
+
+
+def quote_columns(connection, columns):
+    return ', '.join(connection.ops.quote_name(column) for column in columns)
+
+
+@contextmanager
+def read_snapshot(connection):
+    """Hold one consistent read transaction without taking write locks"""
+    if connection.in_atomic_block:
+        # Already inside a transaction (e.g. tests), which is consistent
+        yield
+        return
+    if connection.vendor == 'postgresql':
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY')
+            yield
+        return
+    if connection.vendor == 'sqlite':
+        # A deferred BEGIN pins a WAL read snapshot; atomic() would BEGIN IMMEDIATE
+        connection.ensure_connection()
+        with connection.cursor() as cursor:
+            cursor.execute('BEGIN DEFERRED')
+        try:
+            yield
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute('COMMIT')
+        return
+    with transaction.atomic(using=connection.alias):
+        yield
+
+
+def format_value(value):
+    if value is None:
+        return NULL
+    if isinstance(value, datetime):
+        if timezone.is_naive(value):
+            # Naive values from SQLite/MySQL are stored in UTC
+            value = value.replace(tzinfo=dt_timezone.utc)
+        return value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def dump(directory, using='default', compression='gzip', level=None, chunk_size=CHUNK_SIZE):
+    """Write a snapshot of MODELS to directory; returns the manifest"""
+    check_unsharded()
+    connection = connections[using]
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    suffix = '.csv.zst' if compression == 'zstd' else '.csv.gz'
+
+    manifest = {
+        'format': FORMAT_VERSION,
+        'created_at': timezone.now().isoformat(),
+        'vendor': connection.vendor,
+        'compression': compression,
+        'tables': [],
+    }
+    with read_snapshot(connection):
+        for model in MODELS:
+            table = model._meta.db_table
+            columns = columns_for(model)
+            filename = f'{table}{suffix}'
+            started = time.perf_counter()
+            with compressed_open(directory / filename, 'wb', compression, level) as stream:
+                if connection.vendor == 'postgresql':
+                    rows = copy_out(connection, table, columns, stream)
+                else:
+                    rows = write_csv(connection, table, columns, stream, chunk_size)
+            manifest['tables'].append({
+                'model': model._meta.label_lower,
+                'table': table,
+                'columns': columns,
+                'rows': rows,
+                'file': filename,
+                'seconds': round(time.perf_counter() - started, 3),
+            })
+
+    (directory / 'manifest.json').write_text(json.dumps(manifest, indent=2))
+    return manifest
+
+
+def copy_out(connection, table, columns, stream):
+    sql = (
+        f'COPY (SELECT {quote_columns(connection, columns)} FROM {connection.ops.quote_name(table)} '
+        f"ORDER BY 1) TO STDOUT WITH (FORMAT csv, HEADER true, NULL '{NULL}')"
+    )
+    with connection.cursor() as cursor:
+        with cursor.cursor.copy(sql) as copy:
+            for data in copy:
+                stream.write(data)
+        return cursor.cursor.rowcount
+
+
+def write_csv(connection, table, columns, stream, chunk_size):
+    text = io.TextIOWrapper(stream, encoding='utf-8', newline='', write_through=True)
+    writer = csv.writer(text)
+    writer.writerow(columns)
+    rows = 0
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT {quote_columns(connection, columns)} FROM {connection.ops.quote_name(table)} ORDER BY 1'
+        )
+        while True:
+            chunk = cursor.fetchmany(chunk_size)
+            if not chunk:
+                break
+            writer.writerows([format_value(value) for value in row] for row in chunk)
+            rows += len(chunk)
+    text.detach()
+    return rows
+
+
+def read_manifest(directory):
+    path = Path(directory) / 'manifest.json'
+    if not path.exists():
+        raise SnapshotError(f'{path} not found')
+    manifest = json.loads(path.read_text())
+    if manifest.get('format') != FORMAT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot format {manifest.get('format')!r}")
+    return manifest
+
+
+def restore(directory, using='default', replace=False, batch_size=CHUNK_SIZE, report=None):
+    """
+    Load a snapshot into MODELS' tables; returns [(label, rows, load s, index s)].
+    report, if given, is called with each result as soon as its table is done.
+    """
+    check_unsharded()
+    connection = connections[using]
+    directory = Path(directory)
+    manifest = read_manifest(directory)
+    tables = {entry['model']: entry for entry in manifest['tables']}
+    models = [model for model in MODELS if model._meta.label_lower in tables]
+
+    results = []
+    with transaction.atomic(using=using):
+        defer_constraints(connection)
+        if replace:
+            flush_tables(connection, models)
+        else:
+            for model in models:
+                if model._base_manager.using(using).exists():
+                    raise SnapshotError(
+                        f'{model._meta.db_table} is not empty; pass --replace to overwrite it'
+                    )
+
+        for model in models:
+            entry = tables[model._meta.label_lower]
+            columns = entry['columns']
+            if columns != columns_for(model):
+                raise SnapshotError(f"Columns of {entry['table']} do not match the current schema")
+
+            dropped = drop_indexes(connection, model)
+            started = time.perf_counter()
+            with compressed_open(directory / entry['file'], 'rb', manifest['compression']) as stream:
+                if connection.vendor == 'postgresql':
+                    rows = copy_in(connection, entry['table'], columns, stream)
+                else:
+                    rows = insert_csv(connection, model, columns, stream, batch_size)
+            loaded = time.perf_counter()
+            create_indexes(connection, model, dropped)
+            result = (model._meta.label, rows, loaded - started, time.perf_counter() - loaded)
+            results.append(result)
+            if report:
+                report(*result)
+
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
+        transaction.on_commit(refresh_derived_state, using=using)
+    return results
+
+
+def refresh_derived_state():
+    """Refresh the caches and live views derived from the restored tables"""
+    from . import calendars, dashboard, snapshots
+
+    snapshots.mark_dirty()
+    calendars.invalidate_calendars()
+    dashboard.publish_summary()
+
+
+def defer_constraints(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SET CONSTRAINTS ALL DEFERRED')
+        elif connection.vendor == 'sqlite':
+            cursor.execute('PRAGMA defer_foreign_keys = ON')
+
+
+def flush_tables(connection, models):
+    tables = [model._meta.db_table for model in models]
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sql_flush(no_style(), tables, allow_cascade=True):
+            cursor.execute(sql)
+
+
+def drop_indexes(connection, model):
+    """Drop the model's secondary (Meta.indexes) indexes; returns them"""
+    editor = connection.schema_editor()
+    with connection.cursor() as cursor:
+        for index in model._meta.indexes:
+            cursor.execute(str(index.remove_sql(model, editor)))
+    return list(model._meta.indexes)
+
+
+def create_indexes(connection, model, indexes):
+    editor = connection.schema_editor()
+    with connection.cursor() as cursor:
+        for index in indexes:
+            cursor.execute(str(index.create_sql(model, editor)))
+
+
+def copy_in(connection, table, columns, stream):
+    sql = (
+        f'COPY {connection.ops.quote_name(table)} ({quote_columns(connection, columns)}) '
+        f"FROM STDIN WITH (FORMAT csv, HEADER true, NULL '{NULL}')"
+    )
+    with connection.cursor() as cursor:
+        with cursor.cursor.copy(sql) as copy:
+            while True:
+                data = stream.read(COPY_BUFFER)
+                if not data:
+                    break
+                copy.write(data)
+        return cursor.cursor.rowcount
+
+
+def insert_csv(connection, model, columns, stream, batch_size):
+    fields = {field.column: field for field in model._meta.concrete_fields}
+    fields = [fields[column] for column in columns]
+    sql = (
+        f'INSERT INTO {connection.ops.quote_name(model._meta.db_table)} '
+        f'({quote_columns(connection, columns)}) VALUES ({", ".join(["%s"] * len(columns))})'
+    )
+    reader = csv.reader(io.TextIOWrapper(stream, encoding='utf-8', newline=''))
+    next(reader, None)
+
+    def convert(row):
+        # Text to Python to the database's representation, e.g. UTC-naive on SQLite
+        return [
+            None if value == NULL else field.get_db_prep_save(field.to_python(value), connection)
+            for field, value in zip(fields, row)
+        ]
+
+    rows = 0
+    batch = []
+    with connection.cursor() as cursor:
+        for row in reader:
+            batch.append(convert(row))
+            if len(batch) >= batch_size:
+                cursor.executemany(sql, batch)
+                rows += len(batch)
+                batch = []
+        if batch:
+            cursor.executemany(sql, batch)
+            rows += len(batch)
+    return rows
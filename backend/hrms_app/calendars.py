@@ -0,0 +1,141 @@
+"""
+Working calendars and implicit absences.
+
+A WorkingCalendar defines weekend days and holidays, either company-wide
+(no department) or for one department. Departments without their own
+calendar use the company default. Without any default, Monday to Friday
+are working days.
+
+With ATTENDANCE_IMPLICIT_ABSENCES enabled, absences are not stored. An
+employee's absent days are their working days minus their present days.
+Working days come from closed-form arithmetic over the date range
+(whole weeks, then the remainder and in-range holidays), and present days
+from one COUNT that excludes non-working dates. No per-day rows are
+scanned or generated.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from . import sharding
+from .models import Employee, Attendance, WorkingCalendar
+
+
+CALENDARS_KEY = 'hrms:calendars'
+CALENDARS_TIMEOUT = 60 * 60
+DEFAULT_WEEKEND = frozenset({5, 6})
+
+
+def implicit_absences_enabled():
+    return getattr(settings, 'ATTENDANCE_IMPLICIT_ABSENCES', False)
+
+
+class Calendar:
+    """Resolved weekend days and holidays of one working calendar"""
+
+    def __init__(self, weekend=DEFAULT_WEEKEND, holidays=()):
+        self.weekend = frozenset(weekend)
+        self.holidays = frozenset(holidays)
+        # Holidays that fall on a weekend do not remove a working day
+        self.working_holidays = sorted(day for day in self.holidays if day.weekday() not in self.weekend)
+
+    def is_working_day(self, day):
+        return day.weekday() not in self.weekend and day not in self.holidays
+
+    def working_days(self, start, end):
+        """Number of working days between start and end, inclusive"""
+        days = (end - start).days + 1
+        if days <= 0:
+            return 0
+        weeks, remainder = divmod(days, 7)
+        count = weeks * (7 - len(self.weekend))
+        first = start.weekday()
+        count += sum(1 for offset in range(remainder) if (first + offset) % 7 not in self.weekend)
+        return count - sum(1 for day in self.working_holidays if start <= day <= end)
+
+    def working_day_filter(self, field='date'):
+        """Q matching working days only, for filtering attendance rows"""
+        query = Q()
+        if self.weekend:
+            # Django's week_day lookup counts 1 = Sunday ... 7 = Saturday
+            week_days = [(weekday + 1) % 7 + 1 for weekday in sorted(self.weekend)]
+            query &= ~Q(**{f'{field}__week_day__in': week_days})
+        if self.holidays:
+            query &= ~Q(**{f'{field}__in': sorted(self.holidays)})
+        return query
+
+
+def load_calendars():
+    """Return (default calendar, {department: calendar}), cached until a calendar changes"""
+    calendars = cache.get(CALENDARS_KEY)
+    if calendars is None:
+        calendars = {}
+        for calendar in WorkingCalendar.objects.prefetch_related('holidays'):
+            calendars[calendar.department] = (
+                calendar.weekend, [holiday.date for holiday in calendar.holidays.all()]
+            )
+        cache.set(CALENDARS_KEY, calendars, CALENDARS_TIMEOUT)
+
+    default = Calendar(*calendars.get(None, (DEFAULT_WEEKEND, ())))
+    departments = {
+        department: Calendar(weekend, holidays)
+        for department, (weekend, holidays) in calendars.items() if department is not None
+    }
+    return default, departments
+
+
+def invalidate_calendars():
+    cache.delete(CALENDARS_KEY)
+
+
+def calendar_for(department):
+    default, departments = load_calendars()
+    return departments.get(department, default)
+
+
+def employee_totals(employee, end=None):
+    """
+    Present, absent and working days for an employee, from their first
+    attendance record (or joining date, if earlier) up to end (default today)
+    """
+    end = end or timezone.now().date()
+    calendar = calendar_for(employee.department)
+    counts = employee.attendance_records.filter(date__lte=end).aggregate(
+        first=Min('date'),
+        present=Count('id', filter=Q(status='Present') & calendar.working_day_filter()),
+    )
+    start = employee.created_at.date() if employee.created_at else end
+    if counts['first'] is not None:
+        start = min(start, counts['first'])
+    working_days = calendar.working_days(start, end)
+    return {
+        'working_days': working_days,
+        'present': counts['present'],
+        'absent': max(working_days - counts['present'], 0),
+    }
+
+
+def today_counts(day=None):
+    """Present/absent counts for a day, with absences implied by each department's calendar"""
+    day = day or timezone.now().date()
+    default, departments = load_calendars()
+
+    present_by_department = sharding.count_by(
+        Attendance.objects.filter(date=day, status='Present'), 'employee__department'
+    )
+    absent = 0
+    for department, headcount in (
+        Employee.objects.values_list('department').annotate(count=Count('id')).order_by()
+    ):
+        if departments.get(department, default).is_working_day(day):
+            absent += max(headcount - present_by_department.get(department, 0), 0)
+
+    present = sum(present_by_department.values())
+    return {
+        'present': present,
+        'absent': absent,
+        'total': present + absent
+    }
+
@@ -0,0 +1,139 @@
+"""
+Cursor-based change feed over Employee and Attendance.
+
+Upserts are read in (updated_at, id) order and deletions from Tombstone rows
+in id order. Both positions are packed into one opaque cursor. Rows newer
+than CHANGE_FEED_SAFETY_LAG seconds are held back so a slow transaction that
+commits an older updated_at after a client has polled is not skipped.
+"""
+
+import base64
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import sharding
+from .models import Employee, Attendance, Tombstone
+from .serializers import EmployeeSerializer, AttendanceSerializer
+
+
+RESOURCES = {
+    'employees': ('employee', Employee, EmployeeSerializer),
+    'attendance': ('attendance', Attendance, AttendanceSerializer),
+}
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 5000
+
+
+class InvalidCursor(ValueError):
+    """Raised for cursors or timestamps the feed cannot decode"""
+
+
+def encode_cursor(updated_at, last_id, tombstone_id):
+    payload = {
+        'u': [updated_at.isoformat() if updated_at else None, last_id],
+        'd': tombstone_id,
+    }
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def parse_timestamp(value, message):
+    """parse_datetime that reports malformed and out-of-range values as InvalidCursor"""
+    try:
+        parsed = parse_datetime(value)
+    except (ValueError, TypeError):
+        # Well-formed but impossible, e.g. month 13 or hour 25
+        parsed = None
+    if parsed is None:
+        raise InvalidCursor(message)
+    return parsed
+
+
+def decode_cursor(cursor):
+    """Return (updated_at, last_id, tombstone_id) for a cursor string"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        updated_at, last_id = payload['u']
+        last_id = int(last_id)
+        tombstone_id = int(payload['d'])
+    except (ValueError, KeyError, TypeError):
+        raise InvalidCursor('Invalid cursor.')
+
+    if updated_at is not None:
+        updated_at = parse_timestamp(updated_at, 'Invalid cursor.')
+    return updated_at, last_id, tombstone_id
+
+
+def start_position(since=None):
+    """Cursor position for a first sync, optionally starting at `since`"""
+    if since is None:
+        return None, 0, 0
+
+    updated_at = parse_timestamp(since, 'since must be an ISO 8601 timestamp.')
+    if timezone.is_naive(updated_at):
+        updated_at = timezone.make_aware(updated_at)
+
+    tombstone = Tombstone.objects.filter(deleted_at__lt=updated_at).order_by('-id').first()
+    return updated_at, 0, tombstone.id if tombstone else 0
+
+
+def read_changes(resource, position, limit=DEFAULT_LIMIT):
+    """Return one page of changes after `position` for a feed resource"""
+    tombstone_resource, model, serializer_class = RESOURCES[resource]
+    updated_at, last_id, tombstone_id = position
+    horizon = timezone.now() - timedelta(
+        seconds=getattr(settings, 'CHANGE_FEED_SAFETY_LAG', 2)
+    )
+
+    queryset = model.objects.filter(updated_at__lte=horizon)
+    if updated_at is not None:
+        queryset = queryset.filter(
+            Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=last_id)
+        )
+    if model is Attendance:
+        # Attendance ids are unique across shards, so the merged order is total
+        queryset = sharding.scatter(queryset.select_related('employee'), ('updated_at', 'id'))
+    else:
+        queryset = queryset.order_by('updated_at', 'id')
+    rows = list(queryset[:limit + 1])
+
+    tombstones = list(
+        Tombstone.objects.filter(
+            resource=tombstone_resource, id__gt=tombstone_id, deleted_at__lte=horizon
+        ).order_by('id').values_list('id', 'object_id')[:limit + 1]
+    )
+
+    has_more = len(rows) > limit or len(tombstones) > limit
+    rows, tombstones = rows[:limit], tombstones[:limit]
+
+    if rows:
+        updated_at, last_id = rows[-1].updated_at, rows[-1].id
+    if tombstones:
+        tombstone_id = tombstones[-1][0]
+
+    return {
+        'changes': serializer_class(rows, many=True).data,
+        'deleted': [object_id for _, object_id in tombstones],
+        'next_cursor': encode_cursor(updated_at, last_id, tombstone_id),
+        'has_more': has_more,
+    }
+
+
+def record_deletion(instance):
+    """Write tombstones for an instance and the rows its delete cascades to"""
+    if isinstance(instance, Employee):
+        tombstones = [Tombstone(resource='employee', object_id=instance.pk)]
+        tombstones.extend(
+            Tombstone(resource='attendance', object_id=pk)
+            for pk in instance.attendance_records.values_list('id', flat=True).iterator()
+        )
+        Tombstone.objects.bulk_create(tombstones, batch_size=1000)
+    elif isinstance(instance, Attendance):
+        Tombstone.objects.create(resource='attendance', object_id=instance.pk)
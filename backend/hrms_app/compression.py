@@ -0,0 +1,141 @@
+import gzip
+import threading
+import zlib
+from collections import defaultdict
+
+from .lazy import is_available, optional_module
+
+
+class StreamCompressor:
+    """
+    Incremental compressor for streaming responses. Each chunk is flushed
+    so clients can decode data as it arrives.
+    """
+
+    def __init__(self, compress_chunk, finish):
+        self._compress_chunk = compress_chunk
+        self._finish = finish
+
+    def compress(self, chunk):
+        return self._compress_chunk(chunk)
+
+    def finish(self):
+        return self._finish()
+
+
+class GzipCodec:
+    """gzip content-coding using the standard library"""
+    name = 'gzip'
+
+    def __init__(self, level):
+        self.level = level
+
+    def compress(self, data):
+        return gzip.compress(data, compresslevel=self.level, mtime=0)
+
+    def compressor(self):
+        # wbits=31 writes a gzip header and trailer around the deflate stream
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        return StreamCompressor(
+            lambda chunk: compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH),
+            compressor.flush,
+        )
+
+
+class BrotliCodec:
+    """Brotli content-coding, requires the "brotli" package"""
+    name = 'br'
+
+    def __init__(self, level):
+        self.level = level
+
+    def compress(self, data):
+        return optional_module('brotli').compress(data, quality=self.level)
+
+    def compressor(self):
+        compressor = optional_module('brotli').Compressor(quality=self.level)
+        return StreamCompressor(
+            lambda chunk: compressor.process(chunk) + compressor.flush(),
+            compressor.finish,
+        )
+
+
+class ZstdCodec:
+    """Zstandard content-coding, requires the "zstandard" package"""
+    name = 'zstd'
+
+    def __init__(self, level):
+        self.level = level
+
+    def compress(self, data):
+        return optional_module('zstandard').ZstdCompressor(level=self.level).compress(data)
+
+    def compressor(self):
+        zstandard = optional_module('zstandard')
+        compressor = zstandard.ZstdCompressor(level=self.level).compressobj()
+        return StreamCompressor(
+            lambda chunk: (
+                compressor.compress(chunk)
+                + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+            ),
+            compressor.flush,
+        )
+
+
+def available_codecs(levels):
+    """Return the installed codecs in server preference order"""
+    codecs = []
+    if is_available('zstandard'):
+        codecs.append(ZstdCodec(levels.get('zstd', 3)))
+    if is_available('brotli'):
+        codecs.append(BrotliCodec(levels.get('br', 4)))
+    codecs.append(GzipCodec(levels.get('gzip', 6)))
+    return codecs
+
+
+def parse_accept_encoding(header):
+    """Return {coding: qvalue} for an Accept-Encoding header"""
+    accepted = {}
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        qvalue = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                qvalue = float(params[2:])
+            except ValueError:
+                qvalue = 0.0
+        accepted[coding] = qvalue
+    return accepted
+
+
+class CompressionStats:
+    """Thread-safe per-endpoint counters of bytes-on-wire and CPU cost"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = defaultdict(lambda: {
+            'responses': 0, 'raw_bytes': 0, 'wire_bytes': 0, 'cpu_seconds': 0.0
+        })
+
+    def record(self, endpoint, encoding, raw_bytes, wire_bytes, cpu_seconds):
+        with self._lock:
+            entry = self._stats[(endpoint, encoding)]
+            entry['responses'] += 1
+            entry['raw_bytes'] += raw_bytes
+            entry['wire_bytes'] += wire_bytes
+            entry['cpu_seconds'] += cpu_seconds
+
+    def snapshot(self):
+        with self._lock:
+            return {key: dict(value) for key, value in self._stats.items()}
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+compression_stats = CompressionStats()
@@ -0,0 +1,101 @@
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from . import calendars, events, sharding
+from .models import Employee, Attendance
+from .serializers import AttendanceListSerializer
+
+
+def today_counts():
+    """Present/absent counts for today in one aggregate query per attendance database"""
+    if calendars.implicit_absences_enabled():
+        return calendars.today_counts()
+    counts = sharding.aggregate(
+        Attendance.objects.filter(date=timezone.now().date()),
+        present=Count('id', filter=Q(status='Present')),
+        absent=Count('id', filter=Q(status='Absent')),
+    )
+    return {
+        'present': counts['present'],
+        'absent': counts['absent'],
+        'total': counts['present'] + counts['absent']
+    }
+
+
+def recent_attendance(limit=10):
+    records = sharding.scatter(
+        Attendance.objects.select_related('employee'), ('-date', '-created_at')
+    )[:limit]
+    return AttendanceListSerializer(records, many=True).data
+
+
+def department_stats():
+    """Department-wise employee count"""
+    return list(
+        Employee.objects.values('department').annotate(count=Count('id')).order_by('-count')
+    )
+
+
+def build_summary():
+    """Full dashboard payload, shared by dashboard_summary and the live stream"""
+    return {
+        'total_employees': Employee.objects.count(),
+        'total_attendance_records': sharding.count(Attendance.objects.all()),
+        'today_attendance': today_counts(),
+        'recent_attendance': recent_attendance(),
+        'department_stats': department_stats()
+    }
+
+
+def publish_attendance_change(action, day, record):
+    """
+    Broadcast one incremental dashboard update for an attendance write.
+    record is the saved Attendance, serialized only if a stream is listening.
+    """
+    if not events.has_listeners():
+        return
+    if isinstance(record, Attendance):
+        record = AttendanceListSerializer(record).data
+    data = {
+        'action': action,
+        'record': record,
+        'total_attendance_records_delta': {'created': 1, 'deleted': -1}.get(action, 0),
+    }
+    if day == timezone.now().date():
+        data['today_attendance'] = today_counts()
+    events.publish('attendance', data)
+
+
+def publish_employee_change(action):
+    """Broadcast refreshed department counts for an employee write"""
+    if not events.has_listeners():
+        return
+    data = {
+        'action': action,
+        'total_employees_delta': {'created': 1, 'deleted': -1}.get(action, 0),
+        'department_stats': department_stats(),
+    }
+    if action == 'deleted':
+        # The delete may have cascaded to today's attendance
+        data['today_attendance'] = today_counts()
+    events.publish('employees', data)
+
+
+def publish_attendance_batch(count, touches_today):
+    """Broadcast one update for a batch of buffered attendance writes"""
+    if not events.has_listeners():
+        return
+    data = {
+        'action': 'batch',
+        'count': count,
+    }
+    if touches_today:
+        data['today_attendance'] = today_counts()
+    events.publish('attendance', data)
+
+
+def publish_summary():
+    """Broadcast the full summary after a change too large to describe as deltas"""
+    if not events.has_listeners():
+        return
+    events.publish('summary', build_summary())
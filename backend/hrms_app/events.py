@@ -0,0 +1,167 @@
+"""
+Publish/subscribe fan-out for live dashboard updates.
+
+Writes publish one message per change; every open Server-Sent Events stream
+receives it from its subscription. Redis pub/sub is used when the default
+cache is django_redis, so all gunicorn workers share the same feed. Without
+Redis an in-process broker fans out to the streams of the current process.
+"""
+
+import json
+import queue
+import threading
+
+from django.conf import settings
+from rest_framework.utils.encoders import JSONEncoder
+
+from .renderers import ORJSONRenderer
+
+
+DASHBOARD_CHANNEL = 'hrms:dashboard'
+
+
+class InProcessSubscription:
+    def __init__(self, broker, channel, maxsize):
+        self.broker = broker
+        self.channel = channel
+        self.queue = queue.Queue(maxsize=maxsize)
+
+    def put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except queue.Full:
+            # Slow consumer: drop the oldest update rather than block writers
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                pass
+            self.queue.put_nowait(message)
+
+    def get(self, timeout=None):
+        """Return the next message, or None if none arrived within timeout"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """Fan-out to subscribers living in this process"""
+
+    def __init__(self, maxsize=100):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self, channel):
+        subscription = InProcessSubscription(self, channel, self.maxsize)
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.get(subscription.channel, set()).discard(subscription)
+
+    def has_subscribers(self, channel):
+        with self._lock:
+            return bool(self._subscribers.get(channel))
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.put(message)
+
+
+class RedisSubscription:
+    def __init__(self, pubsub):
+        self.pubsub = pubsub
+
+    def get(self, timeout=None):
+        message = self.pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        if message is None:
+            return None
+        return json.loads(message['data'])
+
+    def close(self):
+        self.pubsub.close()
+
+
+class RedisBroker:
+    """Fan-out through Redis pub/sub so every worker sees every write"""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def subscribe(self, channel):
+        pubsub = self.connection.pubsub()
+        pubsub.subscribe(channel)
+        return RedisSubscription(pubsub)
+
+    def has_subscribers(self, channel):
+        # PUBSUB NUMSUB counts the streams of every worker
+        return any(count for _, count in self.connection.pubsub_numsub(channel))
+
+    def publish(self, channel, message):
+        self.connection.publish(channel, ORJSONRenderer().render(message))
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Return the process-wide broker, creating it on first use"""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = create_broker()
+    return _broker
+
+
+def create_broker():
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if backend.startswith('django_redis.'):
+        from django_redis import get_redis_connection
+        return RedisBroker(get_redis_connection('default'))
+    return InProcessBroker()
+
+
+_open_streams = 0
+_streams_lock = threading.Lock()
+
+
+def acquire_stream_slot(limit):
+    """Reserve one of this process's `limit` stream slots; False when all are taken"""
+    global _open_streams
+    with _streams_lock:
+        if _open_streams >= limit:
+            return False
+        _open_streams += 1
+        return True
+
+
+def release_stream_slot():
+    global _open_streams
+    with _streams_lock:
+        _open_streams -= 1
+
+
+def has_listeners(channel=DASHBOARD_CHANNEL):
+    """True when at least one stream is subscribed to channel"""
+    return get_broker().has_subscribers(channel)
+
+
+def publish(event, data, channel=DASHBOARD_CHANNEL):
+    get_broker().publish(channel, {'event': event, 'data': data})
+
+
+def format_sse(event, data):
+    """Encode one Server-Sent Events frame"""
+    payload = json.dumps(data, cls=JSONEncoder, separators=(',', ':'))
+    return f'event: {event}\ndata: {payload}\n\n'
@@ -0,0 +1,24 @@
+"""
+Deferred imports for optional, rarely used dependencies.
+
+Modules such as msgpack or zstandard are only needed once a client
+negotiates them, so they are imported on first use instead of at startup.
+"""
+
+import importlib
+import importlib.util
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def is_available(name):
+    """Return True if the module can be imported, without importing it"""
+    return importlib.util.find_spec(name) is not None
+
+
+@lru_cache(maxsize=None)
+def optional_module(name):
+    """Import and return a module on first use, or None if it is not installed"""
+    if not is_available(name):
+        return None
+    return importlib.import_module(name)
@@ -0,0 +1,73 @@
+import time
+from datetime import date
+
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from hrms_app.admin import AttendanceAdmin
+from hrms_app.models import Attendance, Employee
+
+
+class BaselineAttendanceAdmin(admin.ModelAdmin):
+    """The original AttendanceAdmin changelist configuration, for comparison"""
+    list_display = ['employee', 'date', 'status', 'created_at']
+    list_filter = ['status', 'date', 'employee__department']
+    search_fields = ['employee__employee_id', 'employee__full_name']
+    ordering = ['-date', 'employee__employee_id']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('employee')
+
+
+class Command(BaseCommand):
+    """Measure AttendanceAdmin changelist query counts and latency"""
+
+    help = 'Benchmark the attendance admin changelist (run seed_hrms first for a large table)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=3)
+        parser.add_argument('--analyze', action='store_true',
+                            help='Refresh planner statistics before measuring')
+
+    def handle(self, *args, **options):
+        if options['analyze']:
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+        sample = Employee.objects.order_by('id').first()
+        today = date.today()
+        scenarios = [
+            ('changelist', {}),
+            ('department filter', {'employee__department': sample.department if sample else 'IT'}),
+            ('search employee_id', {'q': sample.employee_id if sample else 'EMP001'}),
+            ('search name', {'q': sample.full_name.split()[0] if sample else 'John'}),
+            ('date drill-down', {'date__year': today.year, 'date__month': today.month}),
+        ]
+
+        self.stdout.write(f'{Attendance.objects.count()} attendance rows')
+        self.stdout.write(f'{"admin":<10}{"scenario":<22}{"queries":>9}{"ms":>10}')
+        for label, admin_class in [('baseline', BaselineAttendanceAdmin), ('tuned', AttendanceAdmin)]:
+            model_admin = admin_class(Attendance, admin.site)
+            for name, params in scenarios:
+                queries, elapsed_ms = self.measure(model_admin, params, options['iterations'])
+                self.stdout.write(f'{label:<10}{name:<22}{queries:>9}{elapsed_ms:>10.1f}')
+
+    def measure(self, model_admin, params, iterations):
+        factory = RequestFactory()
+        user = User(username='benchmark', is_active=True, is_staff=True, is_superuser=True)
+        best = None
+        queries = 0
+        for _ in range(iterations):
+            request = factory.get('/admin/hrms_app/attendance/', params)
+            request.user = user
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                model_admin.changelist_view(request).render()
+                elapsed = (time.perf_counter() - started) * 1000
+            queries = len(captured.captured_queries)
+            best = elapsed if best is None else min(best, elapsed)
+        return queries, best
@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.urls import reverse
+
+from hrms_app.compression import compression_stats
+
+
+DEFAULT_ENDPOINTS = [
+    'employee-list-simple',
+    'employee-list-create',
+    'attendance-list-create',
+    'dashboard-summary',
+]
+
+
+class Command(BaseCommand):
+    """Measure bytes-on-wire and compression CPU cost per API endpoint"""
+
+    help = 'Report bytes-on-wire and compression CPU cost per endpoint and encoding'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoint', action='append', dest='endpoints',
+                            help='URL name to measure (repeatable)')
+        parser.add_argument('--iterations', type=int, default=20, help='Requests per encoding')
+
+    def handle(self, *args, **options):
+        endpoints = options['endpoints'] or DEFAULT_ENDPOINTS
+        iterations = options['iterations']
+
+        host = next((h for h in settings.ALLOWED_HOSTS if h and '*' not in h), 'localhost')
+        client = Client(HTTP_HOST=host.lstrip('.'))
+        encodings = ['identity', 'gzip', 'br', 'zstd']
+
+        compression_stats.reset()
+        for url_name in endpoints:
+            url = reverse(url_name)
+            for encoding in encodings:
+                for _ in range(iterations):
+                    client.get(url, HTTP_ACCEPT_ENCODING=encoding)
+
+        self.stdout.write(
+            f'{"endpoint":<26}{"encoding":<10}{"raw bytes":>12}{"wire bytes":>12}'
+            f'{"ratio":>8}{"cpu ms":>10}'
+        )
+        for (endpoint, encoding), entry in sorted(compression_stats.snapshot().items()):
+            responses = entry['responses']
+            raw = entry['raw_bytes'] / responses
+            wire = entry['wire_bytes'] / responses
+            cpu_ms = entry['cpu_seconds'] * 1000 / responses
+            ratio = wire / raw if raw else 1
+            self.stdout.write(
+                f'{endpoint:<26}{encoding:<10}{raw:>12.0f}{wire:>12.0f}'
+                f'{ratio:>8.2f}{cpu_ms:>10.3f}'
+            )
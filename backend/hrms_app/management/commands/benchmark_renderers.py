@@ -0,0 +1,65 @@
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from hrms_app.lazy import is_available
+from hrms_app.renderers import (
+    ORJSONRenderer,
+    ColumnarJSONRenderer,
+    MessagePackRenderer,
+)
+
+
+class Command(BaseCommand):
+    """Compare payload size and render time of the API renderers"""
+
+    help = 'Benchmark payload size and render time of the available API renderers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Attendance rows per payload')
+        parser.add_argument('--iterations', type=int, default=50, help='Renders per renderer')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        iterations = options['iterations']
+        payload = self.build_payload(rows)
+
+        renderers = [
+            ('json (drf)', JSONRenderer()),
+            ('json (orjson)', ORJSONRenderer()),
+            ('columnar json', ColumnarJSONRenderer()),
+        ]
+        if is_available('msgpack'):
+            renderers.append(('msgpack', MessagePackRenderer()))
+
+        self.stdout.write(f'{rows} rows, {iterations} iterations')
+        self.stdout.write(f'{"renderer":<16}{"bytes":>12}{"ms/render":>12}')
+
+        for name, renderer in renderers:
+            body = renderer.render(payload)
+            started = time.perf_counter()
+            for _ in range(iterations):
+                renderer.render(payload)
+            elapsed_ms = (time.perf_counter() - started) * 1000 / iterations
+            self.stdout.write(f'{name:<16}{len(body):>12}{elapsed_ms:>12.3f}')
+
+    def build_payload(self, rows):
+        """Build a paginated payload shaped like AttendanceListSerializer output"""
+        departments = ['Engineering', 'Finance', 'Human Resources', 'Operations']
+        today = date.today()
+        created = timezone.now()
+        results = []
+        for index in range(rows):
+            results.append({
+                'id': index + 1,
+                'employee_id': f'EMP{index % 500:05d}',
+                'employee_name': f'Employee Number {index % 500}',
+                'department': departments[index % len(departments)],
+                'date': (today - timedelta(days=index // 500)).isoformat(),
+                'status': 'Present' if index % 7 else 'Absent',
+                'created_at': (created - timedelta(minutes=index)).isoformat(),
+            })
+        return {'count': rows, 'next': None, 'previous': None, 'results': results}
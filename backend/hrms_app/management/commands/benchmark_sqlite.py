@@ -0,0 +1,148 @@
+import multiprocessing
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, transaction
+
+from hrms_app.models import Attendance, Employee
+
+
+ALIAS = 'sqlite_benchmark'
+
+# Stock Django SQLite settings versus the tuned backend from settings.py
+CONFIGURATIONS = {
+    'baseline': {'ENGINE': 'django.db.backends.sqlite3', 'OPTIONS': {}},
+    'tuned': {
+        'ENGINE': 'hrms_project.sqlite3',
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'pragmas': {
+                'busy_timeout': 5000,
+                'journal_mode': 'WAL',
+                'synchronous': 'NORMAL',
+                'mmap_size': 256 * 1024 * 1024,
+                'cache_size': -64 * 1024,
+                'temp_store': 'MEMORY',
+            },
+        },
+    },
+}
+
+
+class Command(BaseCommand):
+    """Measure concurrent attendance write throughput and lock errors on SQLite"""
+
+    help = 'Benchmark concurrent check-in writes against stock and tuned SQLite settings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help='Concurrent writer processes')
+        parser.add_argument('--writes', type=int, default=300, help='Check-ins per worker')
+        parser.add_argument('--employees', type=int, default=200)
+        parser.add_argument('--config', choices=sorted(CONFIGURATIONS), action='append',
+                            help='Configuration to run (default: all)')
+
+    def handle(self, *args, **options):
+        if multiprocessing.get_start_method(allow_none=True) not in (None, 'fork'):
+            raise CommandError('benchmark_sqlite needs the fork start method')
+
+        self.stdout.write(
+            f'{options["workers"]} workers x {options["writes"]} check-ins, '
+            f'{options["employees"]} employees'
+        )
+        self.stdout.write(f'{"config":<10}{"ok":>8}{"locked":>8}{"error %":>9}{"writes/s":>10}{"p99 ms":>9}')
+        for name in options['config'] or sorted(CONFIGURATIONS):
+            with tempfile.TemporaryDirectory() as directory:
+                configure(name, Path(directory) / 'benchmark.sqlite3')
+                employee_ids = self.prepare(options['employees'])
+                ok, locked, latencies, elapsed = self.run_workers(employee_ids, options)
+                connections[ALIAS].close()
+
+            total = ok + locked
+            latencies.sort()
+            p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0
+            self.stdout.write(
+                f'{name:<10}{ok:>8}{locked:>8}{locked / max(total, 1) * 100:>9.1f}'
+                f'{ok / elapsed:>10.0f}{p99:>9.1f}'
+            )
+
+    def prepare(self, count):
+        call_command('migrate', database=ALIAS, verbosity=0)
+        Employee.objects.using(ALIAS).bulk_create([
+            Employee(
+                employee_id=f'BENCH{number:05d}',
+                full_name=f'Benchmark Employee {number}',
+                email=f'bench{number}@example.com',
+                department='Engineering',
+            )
+            for number in range(count)
+        ])
+        ids = list(Employee.objects.using(ALIAS).values_list('id', flat=True))
+        connections[ALIAS].close()
+        return ids
+
+    def run_workers(self, employee_ids, options):
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        start = context.Event()
+        workers = [
+            context.Process(target=write_checkins, args=(seed, employee_ids, options['writes'], start, results))
+            for seed in range(options['workers'])
+        ]
+        for worker in workers:
+            worker.start()
+        started = time.perf_counter()
+        start.set()
+
+        ok = locked = 0
+        latencies = []
+        for _ in workers:
+            worker_ok, worker_locked, worker_latencies = results.get()
+            ok += worker_ok
+            locked += worker_locked
+            latencies.extend(worker_latencies)
+        elapsed = time.perf_counter() - started
+        for worker in workers:
+            worker.join()
+        return ok, locked, latencies, elapsed
+
+
+def configure(name, path):
+    """Point the benchmark alias at a fresh database file with the given configuration"""
+    settings_dict = dict(connections['default'].settings_dict)
+    settings_dict.update(CONFIGURATIONS[name], NAME=str(path), CONN_MAX_AGE=None, TEST={})
+    connections.settings[ALIAS] = settings_dict
+    if hasattr(connections._connections, ALIAS):
+        delattr(connections._connections, ALIAS)
+
+
+def write_checkins(seed, employee_ids, writes, start, results):
+    """Worker body: the same read-then-write transaction as a check-in POST"""
+    connections[ALIAS].close()
+    rng = random.Random(seed)
+    ok = locked = 0
+    latencies = []
+    start.wait()
+    for _ in range(writes):
+        employee_id = rng.choice(employee_ids)
+        day = date.today() - timedelta(days=rng.randrange(30))
+        started = time.perf_counter()
+        try:
+            with transaction.atomic(using=ALIAS):
+                employee = Employee.objects.using(ALIAS).get(pk=employee_id)
+                Attendance.objects.using(ALIAS).update_or_create(
+                    employee=employee, date=day,
+                    defaults={'status': rng.choice(['Present', 'Absent'])},
+                )
+            ok += 1
+            latencies.append(time.perf_counter() - started)
+        except OperationalError as error:
+            if 'locked' not in str(error):
+                raise
+            locked += 1
+    connections[ALIAS].close()
+    results.put((ok, locked, latencies))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from hrms_app.backup import SnapshotError, dump
+from hrms_app.lazy import is_available
+
+
+class Command(BaseCommand):
+    """Write a consistent, compressed snapshot of the HR tables"""
+
+    help = 'Stream employees, calendars and attendance to compressed CSV files (COPY on PostgreSQL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Snapshot directory to create')
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--compression', choices=['gzip', 'zstd'], default=None,
+                            help='Default: zstd if the zstandard package is installed, else gzip')
+        parser.add_argument('--level', type=int, default=None, help='Compression level')
+
+    def handle(self, *args, **options):
+        compression = options['compression'] or ('zstd' if is_available('zstandard') else 'gzip')
+        try:
+            manifest = dump(options['directory'], options['database'], compression, options['level'])
+        except SnapshotError as error:
+            raise CommandError(str(error))
+
+        total_rows = total_seconds = 0
+        for table in manifest['tables']:
+            total_rows += table['rows']
+            total_seconds += table['seconds']
+            rate = table['rows'] / table['seconds'] if table['seconds'] else 0
+            self.stdout.write(f"{table['table']:<28}{table['rows']:>12} rows{rate:>14,.0f} rows/s")
+        rate = total_rows / total_seconds if total_seconds else 0
+        self.stdout.write(f'Dumped {total_rows} rows ({compression}) at {rate:,.0f} rows/s')
@@ -0,0 +1,42 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from hrms_app.write_buffer import get_write_buffer
+
+
+class Command(BaseCommand):
+    """Drain buffered attendance check-ins into the database"""
+
+    help = 'Flush the attendance write buffer in coalesced batches, continuously or once'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=None,
+                            help='Seconds between flushes (default ATTENDANCE_BUFFER_FLUSH_INTERVAL)')
+        parser.add_argument('--once', action='store_true',
+                            help='Flush everything pending and exit')
+
+    def handle(self, *args, **options):
+        write_buffer = get_write_buffer()
+        if options['once']:
+            written = write_buffer.flush_all()
+            self.stdout.write(f'Flushed {written} attendance records')
+            return
+
+        interval = options['interval']
+        if interval is None:
+            interval = getattr(settings, 'ATTENDANCE_BUFFER_FLUSH_INTERVAL', 0.25)
+        self.stdout.write(f'Flushing attendance buffer every {interval}s')
+        try:
+            while True:
+                started = time.monotonic()
+                claimed, written = write_buffer.flush()
+                if claimed:
+                    self.stdout.write(f'Flushed {written} of {claimed} queued check-ins')
+                    # A full batch means more is waiting; keep draining
+                    if claimed >= write_buffer.batch_size:
+                        continue
+                time.sleep(max(0, interval - (time.monotonic() - started)))
+        except KeyboardInterrupt:
+            self.stdout.write('Stopped')
@@ -0,0 +1,78 @@
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+# Code run in a fresh interpreter for each startup target
+TARGETS = {
+    'setup': 'import django; django.setup()',
+    'urls': (
+        'import django; django.setup(); '
+        'from django.urls import get_resolver; get_resolver().url_patterns'
+    ),
+    'wsgi': 'import hrms_project.wsgi',
+}
+
+
+class Command(BaseCommand):
+    """Report per-module import cost of process startup"""
+
+    help = 'Profile startup imports with python -X importtime and report the costliest modules'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', choices=sorted(TARGETS), default='wsgi',
+                            help='What to import: django.setup(), the URLconf, or the WSGI app')
+        parser.add_argument('--top', type=int, default=25, help='Number of modules to list')
+        parser.add_argument('--sort', choices=['cumulative', 'self'], default='cumulative')
+        parser.add_argument('--by-package', action='store_true',
+                            help='Aggregate self time by top-level package')
+
+    def handle(self, *args, **options):
+        env = dict(os.environ)
+        env.setdefault('DJANGO_SETTINGS_MODULE', settings.SETTINGS_MODULE)
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(settings.BASE_DIR), env.get('PYTHONPATH')]))
+
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', TARGETS[options['target']]],
+            capture_output=True, text=True, env=env, cwd=settings.BASE_DIR,
+        )
+        if result.returncode != 0:
+            raise CommandError(result.stderr.strip().splitlines()[-1] if result.stderr else 'Startup failed')
+
+        modules = parse_importtime(result.stderr)
+        total_us = sum(self_us for self_us, _ in modules.values())
+        self.stdout.write(f'{len(modules)} modules imported in {total_us / 1000:.1f} ms')
+
+        if options['by_package']:
+            packages = defaultdict(int)
+            for name, (self_us, _) in modules.items():
+                packages[name.split('.')[0]] += self_us
+            rows = sorted(packages.items(), key=lambda item: item[1], reverse=True)
+            self.stdout.write(f'{"package":<40}{"self ms":>10}')
+            for name, self_us in rows[:options['top']]:
+                self.stdout.write(f'{name:<40}{self_us / 1000:>10.1f}')
+            return
+
+        index = 1 if options['sort'] == 'cumulative' else 0
+        rows = sorted(modules.items(), key=lambda item: item[1][index], reverse=True)
+        self.stdout.write(f'{"module":<56}{"self ms":>10}{"cumulative ms":>15}')
+        for name, (self_us, cumulative_us) in rows[:options['top']]:
+            self.stdout.write(f'{name:<56}{self_us / 1000:>10.1f}{cumulative_us / 1000:>15.1f}')
+
+
+def parse_importtime(output):
+    """Parse `-X importtime` stderr into {module: (self_us, cumulative_us)}"""
+    modules = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            modules[name.strip()] = (int(self_us), int(cumulative_us))
+        except ValueError:
+            continue
+    return modules
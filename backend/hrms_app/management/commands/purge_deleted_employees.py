@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from hrms_app.purge import purge_deleted_employees
+
+
+class Command(BaseCommand):
+    """Remove soft-deleted employees and their attendance in small batches"""
+
+    help = 'Purge soft-deleted employees, deleting attendance in short batched transactions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Attendance rows deleted per transaction')
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help='Seconds to sleep between batches to limit load')
+        parser.add_argument('--limit', type=int, default=None,
+                            help='Maximum employees to purge per run')
+        parser.add_argument('--interval', type=float, default=None,
+                            help='Keep running, checking for deleted employees every N seconds')
+
+    def handle(self, *args, **options):
+        while True:
+            employees, rows = purge_deleted_employees(
+                options['batch_size'], options['pause'], options['limit']
+            )
+            if employees or options['interval'] is None:
+                self.stdout.write(f'Purged {employees} employees and {rows} attendance records')
+            if options['interval'] is None:
+                return
+            time.sleep(options['interval'])
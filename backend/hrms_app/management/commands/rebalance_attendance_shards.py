@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from hrms_app import sharding
+from hrms_app.models import Attendance
+
+
+class Command(BaseCommand):
+    """Copy employees to every shard and move attendance rows to their employee's shard"""
+
+    help = (
+        'Rebalance sharded attendance after adding a shard or enabling sharding. '
+        'Run it while attendance writes are paused.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Attendance rows moved per transaction')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report the rows that would move without moving them')
+
+    def handle(self, *args, **options):
+        aliases = sharding.shard_aliases()
+        if not aliases:
+            raise CommandError('Attendance sharding is not enabled (ATTENDANCE_SHARDS is empty)')
+
+        if not options['dry_run']:
+            for alias in aliases:
+                sharding.reserve_id_range(alias)
+            # Rows can only move to a shard that already has their employee
+            employees = sharding.replicate_employees(batch_size=options['batch_size'])
+            self.stdout.write(f'Copied {employees} employees to {len(aliases)} shards')
+
+        moves = sharding.rebalance(options['batch_size'], options['dry_run'])
+        verb = 'Would move' if options['dry_run'] else 'Moved'
+        for (source, target), rows in sorted(moves.items()):
+            self.stdout.write(f'{verb} {rows} rows from {source} to {target}')
+        self.stdout.write(f'{verb} {sum(moves.values())} attendance rows in total')
+
+        for alias in aliases:
+            self.stdout.write(f'{alias}: {Attendance.all_objects.using(alias).count()} rows')
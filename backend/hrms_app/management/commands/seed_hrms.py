@@ -0,0 +1,75 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from hrms_app.models import Employee, Attendance
+
+
+DEPARTMENTS = [
+    'Engineering', 'Finance', 'Human Resources', 'Marketing',
+    'Operations', 'Sales', 'Support', 'Legal',
+]
+FIRST_NAMES = ['Aisha', 'Ben', 'Chen', 'Divya', 'Elena', 'Farhan', 'Grace', 'Hugo', 'Ines', 'Jamal']
+LAST_NAMES = ['Khan', 'Lopez', 'Miller', 'Nakamura', 'Okafor', 'Patel', 'Quinn', 'Rossi', 'Singh', 'Tan']
+
+
+class Command(BaseCommand):
+    """Seed synthetic employees and attendance for benchmarks"""
+
+    help = 'Bulk-insert synthetic employees and attendance rows for benchmarking'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=1000)
+        parser.add_argument('--days', type=int, default=365, help='Days of attendance per employee')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--prefix', default='SEED', help='employee_id prefix for seeded rows')
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        batch_size = options['batch_size']
+        rng = random.Random(42)
+        started = time.perf_counter()
+
+        employees = [
+            Employee(
+                employee_id=f'{prefix}{index:07d}',
+                full_name=f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+                email=f'{prefix.lower()}{index}@example.com',
+                department=rng.choice(DEPARTMENTS),
+            )
+            for index in range(options['employees'])
+        ]
+        with transaction.atomic():
+            Employee.objects.bulk_create(employees, batch_size=batch_size, ignore_conflicts=True)
+        employee_ids = list(
+            Employee.objects.filter(employee_id__startswith=prefix).values_list('id', flat=True)
+        )
+
+        today = date.today()
+        total = 0
+        batch = []
+        for offset in range(options['days']):
+            day = today - timedelta(days=offset)
+            for employee_id in employee_ids:
+                status = 'Present' if rng.random() < 0.9 else 'Absent'
+                batch.append(Attendance(employee_id=employee_id, date=day, status=status))
+                if len(batch) >= batch_size:
+                    total += self.flush(batch)
+                    batch = []
+        total += self.flush(batch)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'Seeded {len(employee_ids)} employees and {total} attendance rows '
+            f'in {elapsed:.1f}s'
+        )
+
+    def flush(self, batch):
+        if not batch:
+            return 0
+        with transaction.atomic():
+            Attendance.objects.bulk_create(batch, ignore_conflicts=True)
+        return len(batch)
@@ -0,0 +1,244 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.utils.cache import patch_vary_headers
+
+from . import profiling
+from .compression import available_codecs, compression_stats, parse_accept_encoding
+from .throttling import increment_counter
+
+logger = logging.getLogger(__name__)
+
+# Compression stats key for requests that matched no named URL
+UNRESOLVED_ENDPOINT = '(unresolved)'
+
+
+class APICompressionMiddleware:
+    """
+    Compress API responses with the best encoding the client accepts
+    (zstd, br or gzip). Buffered responses are only compressed above
+    API_COMPRESSION_MIN_SIZE bytes; streaming responses are compressed
+    chunk by chunk and flushed so clients still receive data progressively.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.path_prefix = getattr(settings, 'API_COMPRESSION_PATH_PREFIX', '/api/')
+        self.min_size = getattr(settings, 'API_COMPRESSION_MIN_SIZE', 1024)
+        self.codecs = available_codecs(getattr(settings, 'API_COMPRESSION_LEVELS', {}))
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        if not request.path.startswith(self.path_prefix):
+            return response
+        if response.has_header('Content-Encoding') or not self.is_compressible(response):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        endpoint = self.endpoint_name(request)
+        codec = self.select_codec(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if codec is None or (not response.streaming and len(response.content) < self.min_size):
+            if not response.streaming:
+                size = len(response.content)
+                compression_stats.record(endpoint, 'identity', size, size, 0.0)
+            return response
+
+        if response.streaming:
+            self.compress_streaming(response, codec, endpoint)
+        elif not self.compress_content(response, codec, endpoint):
+            return response
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = codec.name
+        return response
+
+    def is_compressible(self, response):
+        content_type = response.get('Content-Type', '').lower()
+        if content_type.startswith('text/event-stream'):
+            return False
+        return (
+            content_type.startswith('text/')
+            or 'json' in content_type
+            or 'msgpack' in content_type
+            or 'csv' in content_type
+        )
+
+    def select_codec(self, header):
+        accepted = parse_accept_encoding(header)
+        wildcard = accepted.get('*', 0.0)
+        best, best_q = None, 0.0
+        for codec in self.codecs:
+            qvalue = accepted.get(codec.name, wildcard)
+            if qvalue > best_q:
+                best, best_q = codec, qvalue
+        return best
+
+    def endpoint_name(self, request):
+        match = getattr(request, 'resolver_match', None)
+        # One shared key for unresolved URLs so clients cannot grow the stats
+        return match.url_name if match and match.url_name else UNRESOLVED_ENDPOINT
+
+    def compress_content(self, response, codec, endpoint):
+        """Compress a buffered response in place; False if it did not shrink"""
+        raw = response.content
+        started = time.process_time()
+        compressed = codec.compress(raw)
+        cpu_seconds = time.process_time() - started
+
+        if len(compressed) >= len(raw):
+            compression_stats.record(endpoint, 'identity', len(raw), len(raw), cpu_seconds)
+            return False
+
+        compression_stats.record(endpoint, codec.name, len(raw), len(compressed), cpu_seconds)
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        return True
+
+    def compress_streaming(self, response, codec, endpoint):
+        stream = StreamMeter(codec, endpoint)
+        if response.is_async:
+            response.streaming_content = stream.compress_async(response.streaming_content)
+        else:
+            response.streaming_content = stream.compress(response.streaming_content)
+        del response['Content-Length']
+
+
+class StreamMeter:
+    """Compress a streaming body chunk by chunk, recording bytes and CPU time"""
+
+    def __init__(self, codec, endpoint):
+        self.codec = codec
+        self.endpoint = endpoint
+        self.compressor = codec.compressor()
+        self.raw_bytes = 0
+        self.wire_bytes = 0
+        self.cpu_seconds = 0.0
+
+    def feed(self, chunk):
+        started = time.process_time()
+        data = self.compressor.compress(chunk)
+        self.cpu_seconds += time.process_time() - started
+        self.raw_bytes += len(chunk)
+        self.wire_bytes += len(data)
+        return data
+
+    def finish(self):
+        started = time.process_time()
+        data = self.compressor.finish()
+        self.cpu_seconds += time.process_time() - started
+        self.wire_bytes += len(data)
+        compression_stats.record(
+            self.endpoint, self.codec.name, self.raw_bytes, self.wire_bytes, self.cpu_seconds
+        )
+        return data
+
+    def compress(self, chunks):
+        for chunk in chunks:
+            data = self.feed(chunk)
+            if data:
+                yield data
+        yield self.finish()
+
+    async def compress_async(self, chunks):
+        async for chunk in chunks:
+            data = self.feed(chunk)
+            if data:
+                yield data
+        yield self.finish()
+
+
+class ConcurrencyLimitMiddleware:
+    """
+    Shed load on expensive endpoints before the database queue backs up.
+
+    API_CONCURRENCY_LIMITS maps URL names to the maximum number of requests
+    in flight, tracked in the cache: across all workers with Redis, per
+    process with the default LocMemCache. Requests over the limit get an
+    immediate 429 with Retry-After instead of queueing.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.retry_after = getattr(settings, 'API_CONCURRENCY_RETRY_AFTER', 1)
+        # Slots expire so a crashed worker cannot leak them forever
+        self.slot_timeout = getattr(settings, 'API_CONCURRENCY_SLOT_TIMEOUT', 120)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        key = getattr(request, '_concurrency_key', None)
+        if key is not None:
+            self.release(key)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        name = request.resolver_match.url_name if request.resolver_match else None
+        limit = getattr(settings, 'API_CONCURRENCY_LIMITS', {}).get(name)
+        if limit is None:
+            return None
+
+        key = f'hrms:inflight:{name}'
+        if self.acquire(key) > limit:
+            self.release(key)
+            increment_counter(name, 'shed')
+            response = JsonResponse(
+                {'message': 'Server is busy, please retry shortly'},
+                status=429
+            )
+            response['Retry-After'] = str(self.retry_after)
+            return response
+
+        request._concurrency_key = key
+        return None
+
+    def acquire(self, key):
+        if cache.add(key, 1, self.slot_timeout):
+            return 1
+        try:
+            return cache.incr(key)
+        except ValueError:
+            cache.add(key, 1, self.slot_timeout)
+            return 1
+
+    def release(self, key):
+        try:
+            if cache.decr(key) < 0:
+                cache.set(key, 0, self.slot_timeout)
+        except ValueError:
+            pass
+
+
+def in_flight(names):
+    """Return the current in-flight request count per URL name"""
+    values = cache.get_many([f'hrms:inflight:{name}' for name in names])
+    return {name: max(values.get(f'hrms:inflight:{name}', 0), 0) for name in names}
+
+
+class ProfilingMiddleware:
+    """
+    Profile sampled or explicitly requested requests (see hrms_app.profiling)
+    and keep the results, with their SQL, in a bounded buffer. Profiled
+    responses carry an X-Profile-Id header naming the stored profile.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not profiling.should_profile(request):
+            return self.get_response(request)
+
+        response, profile = profiling.profile_request(self.get_response, request)
+        try:
+            profiling.save_profile(profile)
+        except Exception:
+            logger.exception('Could not store profile for %s', request.path)
+        else:
+            response['X-Profile-Id'] = profile['id']
+        return response
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:06
+
+from django.db import migrations, models
+
+
+# Admin search uses iexact on employee_id and istartswith on full_name, which
+# PostgreSQL compiles to UPPER(col) = / LIKE. Expression indexes with
+# text_pattern_ops let both use an index scan regardless of collation.
+PATTERN_INDEXES = [
+    ('employee_id_upper_idx', 'employee_id'),
+    ('employee_full_name_upper_idx', 'full_name'),
+]
+
+
+def create_pattern_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, column in PATTERN_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON hrms_app_employee '
+            f'(UPPER({column}::text) text_pattern_ops)'
+        )
+
+
+def drop_pattern_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _ in PATTERN_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hrms_app', '0002_change_feed'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['date', 'employee'], name='attendance_date_employee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['department'], name='employee_department_idx'),
+        ),
+        migrations.RunPython(create_pattern_indexes, drop_pattern_indexes),
+    ]
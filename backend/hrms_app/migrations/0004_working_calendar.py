@@ -0,0 +1,45 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hrms_app', '0003_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkingCalendar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Calendar name', max_length=100)),
+                ('department', models.CharField(blank=True, help_text='Department this calendar applies to; leave empty for the company default', max_length=50, null=True, unique=True)),
+                ('weekend_days', models.CharField(default='5,6', help_text='Comma-separated non-working weekdays, 0 = Monday ... 6 = Sunday', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Working Calendar',
+                'verbose_name_plural': 'Working Calendars',
+                'ordering': ['department'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Holiday',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='Holiday date')),
+                ('name', models.CharField(help_text='Holiday name', max_length=100)),
+                ('calendar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holidays', to='hrms_app.workingcalendar')),
+            ],
+            options={
+                'verbose_name': 'Holiday',
+                'verbose_name_plural': 'Holidays',
+                'ordering': ['date'],
+                'unique_together': {('calendar', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hrms_app', '0004_working_calendar'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, help_text='Set when the employee is deleted; attendance is purged in the background', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', False)), fields=['deleted_at'], name='employee_deleted_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:21
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hrms_app', '0005_employee_soft_delete'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('occurred_at', models.DateTimeField(help_text='When the change was committed')),
+                ('day', models.DateField(help_text='Partition key: the UTC date of occurred_at')),
+                ('action', models.CharField(choices=[('create', 'Create'), ('update', 'Update'), ('delete', 'Delete'), ('upsert', 'Upsert')], max_length=10)),
+                ('resource', models.CharField(choices=[('employee', 'Employee'), ('attendance', 'Attendance')], max_length=20)),
+                ('object_id', models.BigIntegerField(help_text='Primary key of the changed record', null=True)),
+                ('employee_ref', models.BigIntegerField(help_text='Employee the change belongs to (kept after the employee is purged)', null=True)),
+                ('changes', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, help_text='Changed fields as {field: [old, new]}')),
+                ('actor', models.CharField(blank=True, help_text='Username, if authenticated', max_length=150)),
+            ],
+            options={
+                'verbose_name': 'Audit Event',
+                'verbose_name_plural': 'Audit Events',
+                'ordering': ['-occurred_at', '-id'],
+                'indexes': [models.Index(fields=['employee_ref', 'occurred_at'], name='audit_employee_time_idx'), models.Index(fields=['day', 'resource'], name='audit_day_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:50
+
+from django.db import migrations, models
+import django.db.models.functions.comparison
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hrms_app', '0006_audit_event'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='workingcalendar',
+            constraint=models.UniqueConstraint(django.db.models.functions.comparison.Coalesce('department', models.Value('')), condition=models.Q(('department__isnull', True)), name='single_default_calendar', violation_error_message='A default calendar (without a department) already exists.'),
+        ),
+    ]
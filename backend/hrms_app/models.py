@@ -1,6 +1,27 @@
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.core.validators import EmailValidator
 from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+class ActiveEmployeeManager(models.Manager):
+    """Hide soft-deleted employees; their rows are purged in the background"""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class ActiveAttendanceManager(models.Manager):
+    """
+    Hide attendance of soft-deleted employees until the purge removes it.
+    Their ids come from a subquery on the partial deleted_at index, so reads
+    do not join the employee.
+    """
+
+    def get_queryset(self):
+        deleted = Employee.all_objects.filter(deleted_at__isnull=False).values('id')
+        return super().get_queryset().exclude(employee_id__in=deleted)
 
 
 class Employee(models.Model):
@@ -26,11 +47,27 @@ class Employee(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    deleted_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Set when the employee is deleted; attendance is purged in the background"
+    )
+
+    objects = ActiveEmployeeManager()
+    all_objects = models.Manager()
 
     class Meta:
         ordering = ['employee_id']
         verbose_name = 'Employee'
         verbose_name_plural = 'Employees'
+        indexes = [
+            models.Index(fields=['updated_at', 'id'], name='employee_updated_idx'),
+            models.Index(fields=['department'], name='employee_department_idx'),
+            models.Index(
+                fields=['deleted_at'], name='employee_deleted_idx',
+                condition=models.Q(deleted_at__isnull=False)
+            ),
+        ]
 
     def __str__(self):
         return f"{self.employee_id} - {self.full_name}"
@@ -74,11 +111,18 @@ class Attendance(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ActiveAttendanceManager()
+    all_objects = models.Manager()
+
     class Meta:
         ordering = ['-date', 'employee__employee_id']
         unique_together = ['employee', 'date']
         verbose_name = 'Attendance Record'
         verbose_name_plural = 'Attendance Records'
+        indexes = [
+            models.Index(fields=['updated_at', 'id'], name='attendance_updated_idx'),
+            models.Index(fields=['date', 'employee'], name='attendance_date_employee_idx'),
+        ]
 
     def __str__(self):
         return f"{self.employee.employee_id} - {self.date} - {self.status}"
@@ -93,3 +137,174 @@ class Attendance(models.Model):
             raise ValidationError({
                 'date': 'Attendance date cannot be in the future.'
             })
+
+
+class Tombstone(models.Model):
+    """Record of a deleted row, consumed by the change feed"""
+    
+    RESOURCE_CHOICES = [
+        ('employee', 'Employee'),
+        ('attendance', 'Attendance'),
+    ]
+    
+    resource = models.CharField(
+        max_length=20,
+        choices=RESOURCE_CHOICES,
+        help_text="Kind of record that was deleted"
+    )
+    object_id = models.BigIntegerField(help_text="Primary key of the deleted record")
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = 'Tombstone'
+        verbose_name_plural = 'Tombstones'
+        indexes = [
+            models.Index(fields=['resource', 'id'], name='tombstone_resource_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.resource} {self.object_id} deleted at {self.deleted_at}"
+
+
+class WorkingCalendar(models.Model):
+    """Weekend days and holidays for the company or a single department"""
+    
+    WEEKDAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+    
+    name = models.CharField(max_length=100, help_text="Calendar name")
+    department = models.CharField(
+        max_length=50,
+        unique=True,
+        null=True,
+        blank=True,
+        help_text="Department this calendar applies to; leave empty for the company default"
+    )
+    weekend_days = models.CharField(
+        max_length=20,
+        default='5,6',
+        help_text="Comma-separated non-working weekdays, 0 = Monday ... 6 = Sunday"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['department']
+        constraints = [
+            # department is unique, but NULLs never collide, so index a
+            # constant over the default calendars only
+            models.UniqueConstraint(
+                Coalesce('department', models.Value('')),
+                condition=models.Q(department__isnull=True),
+                name='single_default_calendar',
+                violation_error_message='A default calendar (without a department) already exists.',
+            ),
+        ]
+        verbose_name = 'Working Calendar'
+        verbose_name_plural = 'Working Calendars'
+
+    def __str__(self):
+        return f"{self.name} ({self.department or 'default'})"
+
+    @property
+    def weekend(self):
+        return frozenset(int(day) for day in self.weekend_days.split(',') if day.strip())
+
+    def clean(self):
+        """Custom validation for the WorkingCalendar model"""
+        super().clean()
+        
+        try:
+            weekend = self.weekend
+        except ValueError:
+            weekend = None
+        if weekend is None or not weekend <= set(range(7)) or len(weekend) == 7:
+            raise ValidationError({
+                'weekend_days': 'Use weekday numbers 0-6 and leave at least one working day.'
+            })
+        if self.department == '':
+            self.department = None
+
+
+class Holiday(models.Model):
+    """A non-working date in a working calendar"""
+    
+    calendar = models.ForeignKey(
+        WorkingCalendar,
+        on_delete=models.CASCADE,
+        related_name='holidays'
+    )
+    date = models.DateField(help_text="Holiday date")
+    name = models.CharField(max_length=100, help_text="Holiday name")
+
+    class Meta:
+        ordering = ['date']
+        unique_together = ['calendar', 'date']
+        verbose_name = 'Holiday'
+        verbose_name_plural = 'Holidays'
+
+    def __str__(self):
+        return f"{self.date} - {self.name}"
+
+
+class AuditEventQuerySet(models.QuerySet):
+    """Audit events are append-only: bulk updates and deletes are refused"""
+
+    def update(self, **kwargs):
+        raise TypeError('Audit events are append-only and cannot be updated.')
+
+    def delete(self):
+        raise TypeError('Audit events are append-only and cannot be deleted.')
+
+
+class AuditEvent(models.Model):
+    """Append-only record of one create, update or delete made through the API"""
+    
+    ACTION_CHOICES = [
+        ('create', 'Create'),
+        ('update', 'Update'),
+        ('delete', 'Delete'),
+        ('upsert', 'Upsert'),
+    ]
+    RESOURCE_CHOICES = [
+        ('employee', 'Employee'),
+        ('attendance', 'Attendance'),
+    ]
+    
+    occurred_at = models.DateTimeField(help_text="When the change was committed")
+    day = models.DateField(help_text="Partition key: the UTC date of occurred_at")
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    resource = models.CharField(max_length=20, choices=RESOURCE_CHOICES)
+    object_id = models.BigIntegerField(null=True, help_text="Primary key of the changed record")
+    employee_ref = models.BigIntegerField(
+        null=True,
+        help_text="Employee the change belongs to (kept after the employee is purged)"
+    )
+    changes = models.JSONField(
+        default=dict,
+        encoder=DjangoJSONEncoder,
+        help_text="Changed fields as {field: [old, new]}"
+    )
+    actor = models.CharField(max_length=150, blank=True, help_text="Username, if authenticated")
+
+    objects = AuditEventQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['-occurred_at', '-id']
+        verbose_name = 'Audit Event'
+        verbose_name_plural = 'Audit Events'
+        indexes = [
+            models.Index(fields=['employee_ref', 'occurred_at'], name='audit_employee_time_idx'),
+            models.Index(fields=['day', 'resource'], name='audit_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.occurred_at} {self.action} {self.resource} {self.object_id}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise TypeError('Audit events are append-only and cannot be updated.')
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise TypeError('Audit events are append-only and cannot be deleted.')
@@ -0,0 +1,244 @@
+"""
+Sampled request profiling with a bounded ring buffer of recent profiles.
+
+ProfilingMiddleware profiles a request when it is picked by
+PROFILING_SAMPLE_RATE, or when it carries an X-Profile header from a staff
+user (or with the PROFILING_TOKEN value). PROFILING_MODE selects cProfile
+(exact call counts, downloadable as pstats) or a wall-clock stack sampler
+(low overhead, downloadable for speedscope). Each profile stores the SQL
+executed during the request.
+
+Profiles live in the default cache so every worker writes to the same
+buffer; only the newest PROFILING_BUFFER_SIZE are kept.
+"""
+
+import cProfile
+import marshal
+import pstats
+import random
+import sys
+import threading
+import time
+import uuid
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+
+
+PROFILE_KEY = 'hrms:profiles:{id}'
+PROFILE_INDEX_KEY = 'hrms:profiles:index'
+PROFILE_TIMEOUT = 24 * 60 * 60
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+MAX_QUERIES = 500
+
+_index_lock = threading.Lock()
+
+
+class QueryLog:
+    """Database execute wrapper that records SQL and timings for one request"""
+
+    def __init__(self, limit=MAX_QUERIES):
+        self.limit = limit
+        self.queries = []
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            if len(self.queries) < self.limit:
+                self.queries.append({
+                    'sql': sql,
+                    'time_ms': round((time.perf_counter() - started) * 1000, 3),
+                    'alias': context['connection'].alias,
+                })
+
+
+class StackSampler:
+    """Sample the calling thread's stack on a timer from a background thread"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.frames = []
+        self.frame_index = {}
+        self.samples = []
+        self.weights = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.thread_id = threading.get_ident()
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='hrms-stack-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.elapsed = time.perf_counter() - self.started
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            if frame is not None:
+                self.samples.append(self._stack(frame))
+                self.weights.append(now - last)
+            last = now
+
+    def _stack(self, frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            key = (code.co_name, code.co_filename, code.co_firstlineno)
+            index = self.frame_index.get(key)
+            if index is None:
+                index = self.frame_index[key] = len(self.frames)
+                self.frames.append({'name': key[0], 'file': key[1], 'line': key[2]})
+            stack.append(index)
+            frame = frame.f_back
+        stack.reverse()
+        return stack
+
+    def speedscope(self, name):
+        """Return the samples in speedscope's file format"""
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'exporter': 'hrms',
+            'name': name,
+            'activeProfileIndex': 0,
+            'shared': {'frames': self.frames},
+            'profiles': [{
+                'type': 'sampled',
+                'name': name,
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': self.elapsed,
+                'samples': self.samples,
+                'weights': self.weights,
+            }],
+        }
+
+
+def should_profile(request):
+    """Profile requests with an authorized X-Profile header or picked by the sample rate"""
+    if request.META.get(PROFILE_HEADER):
+        token = getattr(settings, 'PROFILING_TOKEN', '')
+        if token and constant_time_compare(request.META[PROFILE_HEADER], token):
+            return True
+        user = getattr(request, 'user', None)
+        return bool(user is not None and user.is_authenticated and user.is_staff)
+    rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0.0)
+    return rate > 0 and random.random() < rate
+
+
+def profile_request(get_response, request):
+    """Run the request under the configured profiler; returns (response, profile)"""
+    mode = getattr(settings, 'PROFILING_MODE', 'cprofile')
+    query_log = QueryLog()
+    profiler = None
+    sampler = None
+
+    started = time.perf_counter()
+    with wrap_connections(query_log):
+        if mode == 'sampling':
+            sampler = StackSampler(getattr(settings, 'PROFILING_SAMPLE_INTERVAL', 0.005))
+            sampler.start()
+            try:
+                response = get_response(request)
+            finally:
+                sampler.stop()
+        else:
+            profiler = cProfile.Profile()
+            response = profiler.runcall(get_response, request)
+    duration_ms = (time.perf_counter() - started) * 1000
+
+    profile_id = uuid.uuid4().hex
+    name = f'{request.method} {request.path}'
+    profile = {
+        'id': profile_id,
+        'method': request.method,
+        'path': request.get_full_path(),
+        'status': response.status_code,
+        'mode': 'sampling' if sampler else 'cprofile',
+        'duration_ms': round(duration_ms, 3),
+        'created_at': timezone.now().isoformat(),
+        'query_count': query_log.count,
+        'query_time_ms': round(sum(query['time_ms'] for query in query_log.queries), 3),
+        'queries': query_log.queries,
+    }
+    if profiler is not None:
+        profiler.create_stats()
+        profile['pstats'] = marshal.dumps(profiler.stats)
+        profile['top'] = top_functions(profiler)
+    else:
+        profile['speedscope'] = sampler.speedscope(name)
+    return response, profile
+
+
+def wrap_connections(wrapper):
+    """Install an execute wrapper on every configured database connection"""
+    stack = ExitStack()
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(wrapper))
+    return stack
+
+
+def top_functions(profiler, limit=15):
+    """Summarize the functions with the highest cumulative time"""
+    stats = pstats.Stats(profiler)
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+    return [
+        {
+            'function': f'{filename}:{line}({name})',
+            'calls': calls,
+            'total_ms': round(total * 1000, 3),
+            'cumulative_ms': round(cumulative * 1000, 3),
+        }
+        for (filename, line, name), (_, calls, total, cumulative, _) in rows[:limit]
+    ]
+
+
+def save_profile(profile):
+    """Store a profile and evict the oldest beyond PROFILING_BUFFER_SIZE"""
+    size = getattr(settings, 'PROFILING_BUFFER_SIZE', 50)
+    cache.set(PROFILE_KEY.format(id=profile['id']), profile, PROFILE_TIMEOUT)
+    with _index_lock:
+        index = [profile['id']] + (cache.get(PROFILE_INDEX_KEY) or [])
+        cache.set(PROFILE_INDEX_KEY, index[:size], PROFILE_TIMEOUT)
+    evicted = index[size:]
+    if evicted:
+        cache.delete_many([PROFILE_KEY.format(id=profile_id) for profile_id in evicted])
+
+
+def get_profile(profile_id):
+    return cache.get(PROFILE_KEY.format(id=profile_id))
+
+
+def list_profiles():
+    """Return summaries of the stored profiles, newest first"""
+    index = cache.get(PROFILE_INDEX_KEY) or []
+    stored = cache.get_many([PROFILE_KEY.format(id=profile_id) for profile_id in index])
+    summaries = []
+    for profile_id in index:
+        profile = stored.get(PROFILE_KEY.format(id=profile_id))
+        if profile is None:
+            continue
+        summary = {
+            key: value for key, value in profile.items()
+            if key not in ('pstats', 'speedscope', 'queries', 'top')
+        }
+        summary['formats'] = available_formats(profile)
+        summaries.append(summary)
+    return summaries
+
+
+def available_formats(profile):
+    return [name for name in ('pstats', 'speedscope') if name in profile] + ['sql']
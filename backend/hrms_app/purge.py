@@ -0,0 +1,88 @@
+"""
+Soft deletion of employees and the background purge of their rows.
+
+Deleting an employee only stamps deleted_at, which hides the employee and
+their attendance from the default managers at once (attendance excludes
+deleted employees' ids by subquery, without a join). purge_deleted_employees
+(run by `manage.py purge_deleted_employees`, e.g. with --interval as a
+long-running worker) later removes the attendance in bounded batches, then
+the employee. Each batch runs in its own short transaction, so no request
+waits on a cascade over years of rows and no lock is held for long.
+"""
+
+import logging
+import time
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Employee, Attendance, Tombstone
+
+logger = logging.getLogger(__name__)
+
+
+def deactivate_employees(queryset):
+    """Soft-delete the employees in queryset; returns their ids"""
+    from . import dashboard, sharding, snapshots
+
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(queryset.filter(deleted_at__isnull=True).values_list('id', flat=True))
+        if not ids:
+            return []
+        Employee.all_objects.filter(id__in=ids).update(deleted_at=now, updated_at=now)
+        Tombstone.objects.bulk_create(
+            [Tombstone(resource='employee', object_id=pk) for pk in ids], batch_size=1000
+        )
+
+    transaction.on_commit(lambda: snapshots.patch_snapshot(ids), robust=True)
+    transaction.on_commit(lambda: dashboard.publish_employee_change('deleted'), robust=True)
+    if sharding.is_enabled():
+        transaction.on_commit(lambda: sharding.replicate_employees(ids))
+    return ids
+
+
+def purge_attendance(employee_id, batch_size=1000, pause=0.0):
+    """Delete one soft-deleted employee's attendance batch by batch; returns the rows deleted"""
+    from . import sharding
+
+    deleted = 0
+    # Rows not yet rebalanced may sit on any shard or still on the default database
+    for using in sharding.databases_with_unbalanced_rows():
+        rows = Attendance.all_objects.using(using).filter(employee_id=employee_id)
+        while True:
+            with transaction.atomic(), transaction.atomic(using=using):
+                ids = list(rows.order_by('id').values_list('id', flat=True)[:batch_size])
+                if not ids:
+                    break
+                Tombstone.objects.bulk_create(
+                    [Tombstone(resource='attendance', object_id=pk) for pk in ids]
+                )
+                # Attendance rows have no dependents and were already hidden, so
+                # skip the collector and per-row signals
+                Attendance.all_objects.using(using).filter(id__in=ids)._raw_delete(using)
+            deleted += len(ids)
+            if pause:
+                time.sleep(pause)
+    return deleted
+
+
+def purge_employee(employee_id, batch_size=1000, pause=0.0):
+    """Delete one soft-deleted employee's remaining attendance, then the employee"""
+    deleted = purge_attendance(employee_id, batch_size, pause)
+    Employee.all_objects.filter(id=employee_id, deleted_at__isnull=False).delete()
+    return deleted
+
+
+def purge_deleted_employees(batch_size=1000, pause=0.0, limit=None):
+    """Purge soft-deleted employees, oldest first; returns (employees, attendance rows)"""
+    pending = (
+        Employee.all_objects.filter(deleted_at__isnull=False)
+        .order_by('deleted_at').values_list('id', flat=True)
+    )
+    employees = rows = 0
+    for employee_id in list(pending[:limit] if limit else pending):
+        rows += purge_employee(employee_id, batch_size, pause)
+        employees += 1
+        logger.info('Purged employee %s', employee_id)
+    return employees, rows
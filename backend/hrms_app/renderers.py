@@ -0,0 +1,100 @@
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from .lazy import optional_module
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+# Top-level keys that hold list payloads in our response envelopes
+COLUMNAR_KEYS = ('data', 'results')
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSON renderer backed by orjson, falling back to the stock DRF renderer
+    when orjson is not installed
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        # Validation errors for list items are keyed by their integer index
+        option = orjson.OPT_NON_STR_KEYS
+        if self.get_indent(accepted_media_type, renderer_context):
+            option |= orjson.OPT_INDENT_2
+
+        # DRF's encoder handles lazy strings, Decimals, querysets, etc.
+        return orjson.dumps(data, default=JSONEncoder().default, option=option)
+
+
+class ColumnarJSONRenderer(ORJSONRenderer):
+    """
+    Renders list payloads in columnar form: keys are sent once and each
+    row becomes an array of values, e.g.
+    {"columns": ["id", "status"], "rows": [[1, "Present"], [2, "Absent"]]}
+
+    Select it with `Accept: application/vnd.hrms.columnar+json` or
+    `?format=columnar`.
+    """
+    media_type = 'application/vnd.hrms.columnar+json'
+    format = 'columnar'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return super().render(to_columnar(data), accepted_media_type, renderer_context)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Binary MessagePack renderer for high-volume clients
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        msgpack = optional_module('msgpack')
+        if msgpack is None:
+            raise RuntimeError('MessagePackRenderer requires the "msgpack" package.')
+
+        if data is None:
+            return b''
+
+        return msgpack.packb(data, default=JSONEncoder().default, use_bin_type=True)
+
+
+def to_columnar(data):
+    """Convert list-of-dict payloads under the envelope keys to columns/rows"""
+    if isinstance(data, list):
+        return _columnar_rows(data)
+
+    if not isinstance(data, dict):
+        return data
+
+    converted = dict(data)
+    for key in COLUMNAR_KEYS:
+        value = converted.get(key)
+        if isinstance(value, list):
+            converted[key] = _columnar_rows(value)
+    return converted
+
+
+def _columnar_rows(items):
+    """Return a columns/rows mapping, or the list untouched if not tabular"""
+    if not items or not all(isinstance(item, dict) for item in items):
+        return items
+
+    columns = list(items[0].keys())
+    return {
+        'columns': columns,
+        'rows': [[item.get(column) for column in columns] for item in items]
+    }
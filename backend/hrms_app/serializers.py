@@ -1,9 +1,98 @@
 from rest_framework import serializers
-from .models import Employee, Attendance
-from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework.permissions import SAFE_METHODS
+from . import calendars, sharding
+from .models import Employee, Attendance, AuditEvent
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
 
 
-class EmployeeSerializer(serializers.ModelSerializer):
+class DynamicFieldsMixin:
+    """
+    Sparse fieldsets for read requests: `?fields=id,status` keeps only the
+    listed fields and `?exclude=created_at` drops fields. The same selection
+    narrows the queryset via `restrict_queryset`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        exclude = kwargs.pop('exclude', None)
+        super().__init__(*args, **kwargs)
+
+        if fields is None and exclude is None:
+            names = self.requested_field_names(self.context.get('request'))
+        else:
+            names = self.select_field_names(self.fields.keys(), fields, exclude)
+
+        if names is not None:
+            for name in set(self.fields) - set(names):
+                self.fields.pop(name)
+
+    @classmethod
+    def requested_field_names(cls, request):
+        """Return the field names selected by the request, or None for all"""
+        if request is None or request.method not in SAFE_METHODS:
+            return None
+
+        fields = request.query_params.get('fields')
+        exclude = request.query_params.get('exclude')
+        if not fields and not exclude:
+            return None
+
+        return cls.select_field_names(
+            cls.Meta.fields,
+            fields.split(',') if fields else None,
+            exclude.split(',') if exclude else None,
+        )
+
+    @staticmethod
+    def select_field_names(available, fields=None, exclude=None):
+        names = list(available)
+        if fields is not None:
+            wanted = {name.strip() for name in fields}
+            names = [name for name in names if name in wanted]
+        if exclude is not None:
+            unwanted = {name.strip() for name in exclude}
+            names = [name for name in names if name not in unwanted]
+        return names
+
+    @classmethod
+    def restrict_queryset(cls, queryset, request):
+        """
+        Load only the columns the selected fields need, and drop the
+        select_related joins when no related fields are requested
+        """
+        names = cls.requested_field_names(request)
+        if names is None:
+            return queryset
+
+        model = queryset.model
+        fields = cls().fields
+        paths, relations = set(), set()
+        for name in names:
+            field = fields[name]
+            if isinstance(field, serializers.SerializerMethodField):
+                continue
+            if field.source == '*':
+                return queryset
+
+            attrs = field.source.split('.')
+            try:
+                model_field = model._meta.get_field(attrs[0])
+            except FieldDoesNotExist:
+                return queryset
+
+            if len(attrs) > 1:
+                if not model_field.is_relation:
+                    return queryset
+                relations.add(attrs[0])
+            paths.add('__'.join(attrs))
+
+        queryset = queryset.select_related(None)
+        if relations:
+            queryset = queryset.select_related(*relations)
+        return queryset.only(*(paths or {'pk'}))
+
+
+class EmployeeSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Employee model"""
     
     class Meta:
@@ -32,7 +121,8 @@ class EmployeeSerializer(serializers.ModelSerializer):
         if self.instance and self.instance.email == value:
             return value
         
-        if Employee.objects.filter(email=value).exists():
+        # Soft-deleted employees keep their email until they are purged
+        if Employee.all_objects.filter(email=value).exists():
             raise serializers.ValidationError(
                 "An employee with this email already exists."
             )
@@ -43,7 +133,7 @@ class EmployeeSerializer(serializers.ModelSerializer):
         # Check for duplicate employee_id during creation or update
         employee_id = attrs.get('employee_id')
         if employee_id:
-            existing_employee = Employee.objects.filter(employee_id=employee_id)
+            existing_employee = Employee.all_objects.filter(employee_id=employee_id)
             if self.instance:
                 existing_employee = existing_employee.exclude(pk=self.instance.pk)
             
@@ -55,7 +145,45 @@ class EmployeeSerializer(serializers.ModelSerializer):
         return attrs
 
 
-class AttendanceSerializer(serializers.ModelSerializer):
+class EmployeeBulkDeactivateSerializer(serializers.Serializer):
+    """Selection of employees to deactivate by id and/or department"""
+    
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, allow_empty=False, max_length=10000
+    )
+    department = serializers.CharField(required=False, max_length=50)
+
+    def validate(self, attrs):
+        """Require at least one selector"""
+        if not attrs.get('ids') and not attrs.get('department'):
+            raise serializers.ValidationError("Provide ids, a department, or both.")
+        return attrs
+
+    def get_queryset(self):
+        """Active employees matching every given selector"""
+        queryset = Employee.objects.all()
+        if self.validated_data.get('ids'):
+            queryset = queryset.filter(id__in=self.validated_data['ids'])
+        if self.validated_data.get('department'):
+            queryset = queryset.filter(department=self.validated_data['department'])
+        return queryset
+
+
+class AttendanceDateMixin:
+    """Date validation shared by the attendance write serializers"""
+
+    def validate_date(self, value):
+        """Validate attendance date"""
+        from django.utils import timezone
+        
+        if value > timezone.now().date():
+            raise serializers.ValidationError(
+                "Attendance date cannot be in the future."
+            )
+        return value
+
+
+class AttendanceSerializer(AttendanceDateMixin, DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Attendance model"""
     
     employee_name = serializers.CharField(source='employee.full_name', read_only=True)
@@ -69,27 +197,24 @@ class AttendanceSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
 
-    def validate_date(self, value):
-        """Validate attendance date"""
-        from django.utils import timezone
-        
-        if value > timezone.now().date():
-            raise serializers.ValidationError(
-                "Attendance date cannot be in the future."
-            )
-        return value
-
     def validate(self, attrs):
         """Cross-field validation"""
         employee = attrs.get('employee')
         date = attrs.get('date')
         
+        if self.instance and employee and employee.pk != self.instance.employee_id and sharding.is_enabled():
+            # The row lives on its employee's shard and would stay on the old one
+            raise serializers.ValidationError({
+                'employee': [
+                    'The employee of an attendance record cannot change while attendance is sharded; '
+                    'delete the record and create a new one.'
+                ]
+            })
+        
         if employee and date:
             # Check for duplicate attendance record
-            existing_attendance = Attendance.objects.filter(
-                employee=employee, 
-                date=date
-            )
+            # The related manager routes to the employee's attendance shard
+            existing_attendance = employee.attendance_records.filter(date=date)
             
             if self.instance:
                 existing_attendance = existing_attendance.exclude(pk=self.instance.pk)
@@ -103,8 +228,24 @@ class AttendanceSerializer(serializers.ModelSerializer):
         
         return attrs
 
+    def create(self, validated_data):
+        """Create through the employee so the database router can pick its shard"""
+        employee = validated_data.pop('employee')
+        return employee.attendance_records.create(**validated_data)
+
+
+class AttendanceCheckInSerializer(AttendanceDateMixin, serializers.Serializer):
+    """
+    Database-free validation for buffered check-ins; employee existence and
+    duplicates are resolved when the buffer is flushed
+    """
+    
+    employee = serializers.IntegerField(min_value=1)
+    date = serializers.DateField()
+    status = serializers.ChoiceField(choices=Attendance.ATTENDANCE_STATUS_CHOICES)
+
 
-class AttendanceListSerializer(serializers.ModelSerializer):
+class AttendanceListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Simplified serializer for listing attendance records"""
     
     employee_name = serializers.CharField(source='employee.full_name', read_only=True)
@@ -119,7 +260,7 @@ class AttendanceListSerializer(serializers.ModelSerializer):
         ]
 
 
-class EmployeeAttendanceSummarySerializer(serializers.ModelSerializer):
+class EmployeeAttendanceSummarySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for employee with attendance summary"""
     
     total_present_days = serializers.SerializerMethodField()
@@ -135,12 +276,36 @@ class EmployeeAttendanceSummarySerializer(serializers.ModelSerializer):
 
     def get_total_present_days(self, obj):
         """Get total present days for the employee"""
+        if calendars.implicit_absences_enabled():
+            return self.calendar_totals(obj)['present']
         return obj.attendance_records.filter(status='Present').count()
 
     def get_total_absent_days(self, obj):
         """Get total absent days for the employee"""
+        if calendars.implicit_absences_enabled():
+            return self.calendar_totals(obj)['absent']
         return obj.attendance_records.filter(status='Absent').count()
 
+    def calendar_totals(self, obj):
+        """Working-calendar totals, computed once per employee"""
+        if not hasattr(self, '_calendar_totals'):
+            self._calendar_totals = {}
+        if obj.pk not in self._calendar_totals:
+            self._calendar_totals[obj.pk] = calendars.employee_totals(obj)
+        return self._calendar_totals[obj.pk]
+
     def get_total_records(self, obj):
         """Get total attendance records for the employee"""
         return obj.attendance_records.count()
+
+
+class AuditEventSerializer(serializers.ModelSerializer):
+    """Serializer for AuditEvent model"""
+    
+    class Meta:
+        model = AuditEvent
+        fields = [
+            'id', 'occurred_at', 'action', 'resource', 'object_id',
+            'employee_ref', 'changes', 'actor'
+        ]
+        read_only_fields = fields
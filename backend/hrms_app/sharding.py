@@ -0,0 +1,373 @@
+"""
+Hash-sharded attendance storage.
+
+With ATTENDANCE_SHARDS naming N database aliases, each employee's attendance
+lives on one shard, chosen by a jump consistent hash of the employee's
+primary key. Employees stay on the default database and are copied to every
+shard as a small reference table. Foreign keys, the soft-delete filter and
+select_related('employee') therefore keep working inside a shard.
+
+AttendanceShardRouter sends an attendance row to its employee's shard.
+Django may pass the router either the row itself or, for related managers
+such as employee.attendance_records, the employee. Queries that span
+employees have no single shard, so they are answered by scatter-gather:
+- counts and aggregates are summed over the shards
+- listings take the first offset + limit rows of each shard and merge them
+  in listing order (ShardedQuerySet)
+
+Each shard hands out attendance ids from its own block (reserve_id_range).
+Ids therefore stay unique across shards, and rows keep their id when
+`manage.py rebalance_attendance_shards` moves them. With jump hashing,
+adding an Nth shard moves only about 1/N of the employees.
+
+Without ATTENDANCE_SHARDS everything stays on the default database.
+"""
+
+import heapq
+import itertools
+import logging
+from collections import Counter
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Count, F
+from django.db.models.constants import OnConflict
+
+from .models import Employee, Attendance
+
+logger = logging.getLogger(__name__)
+
+# Attendance ids on the shard at position i start after (i + 1) * ID_BLOCK
+ID_BLOCK = 10 ** 12
+# Models whose tables exist on the shards
+SHARDED_MODELS = {'employee', 'attendance'}
+# The attendance listing order, with id as tie-break so merges are exact
+LISTING_ORDER = ('-date', 'employee__employee_id', 'id')
+MASK = (1 << 64) - 1
+
+
+def shard_aliases():
+    return list(getattr(settings, 'ATTENDANCE_SHARDS', None) or [])
+
+
+def is_enabled():
+    return bool(getattr(settings, 'ATTENDANCE_SHARDS', None))
+
+
+def attendance_databases():
+    """Every database that holds attendance rows"""
+    return shard_aliases() or ['default']
+
+
+def databases_with_unbalanced_rows():
+    """
+    attendance_databases() plus the default database, which keeps rows
+    written before sharding until rebalance_attendance_shards moves them
+    """
+    if not is_enabled():
+        return ['default']
+    return shard_aliases() + ['default']
+
+
+def mix(value):
+    """splitmix64 finaliser, so consecutive ids spread evenly over the shards"""
+    value = (value + 0x9E3779B97F4A7C15) & MASK
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK
+    return value ^ (value >> 31)
+
+
+def jump_hash(key, buckets):
+    """Jump consistent hash (Lamping and Veach): a bucket in range(buckets) for a 64-bit key"""
+    bucket, candidate = -1, 0
+    while candidate < buckets:
+        bucket = candidate
+        key = (key * 2862933555777941757 + 1) & MASK
+        candidate = int((bucket + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return bucket
+
+
+def shard_for(employee_id, aliases=None):
+    """Database alias holding an employee's attendance"""
+    aliases = shard_aliases() if aliases is None else aliases
+    if not aliases:
+        return 'default'
+    return aliases[jump_hash(mix(int(employee_id)), len(aliases))]
+
+
+class AttendanceShardRouter:
+    """Routes attendance to its employee's shard; does nothing without ATTENDANCE_SHARDS"""
+
+    def db_for_read(self, model, **hints):
+        if not is_enabled():
+            return None
+        if model is Employee:
+            return 'default'
+        if model is Attendance:
+            return self.attendance_db(hints.get('instance'))
+        return None
+
+    db_for_write = db_for_read
+
+    def attendance_db(self, instance):
+        if isinstance(instance, Attendance):
+            if instance._state.db:
+                # Saved rows stay where they were loaded from until rebalanced
+                return instance._state.db
+            if instance.employee_id is not None:
+                return shard_for(instance.employee_id)
+        if isinstance(instance, Employee) and instance.pk is not None:
+            return shard_for(instance.pk)
+        # No employee to route by: callers scatter over attendance_databases()
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if is_enabled() and {type(obj1), type(obj2)} <= {Employee, Attendance}:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db not in shard_aliases():
+            return None
+        return app_label == 'hrms_app' and model_name in SHARDED_MODELS
+
+
+# Scatter-gather
+
+def count(queryset):
+    """queryset.count() summed over every attendance database"""
+    return sum(queryset.using(alias).count() for alias in attendance_databases())
+
+
+def aggregate(queryset, **aggregates):
+    """Additive aggregates (Count, Sum) of queryset summed over every attendance database"""
+    totals = dict.fromkeys(aggregates, 0)
+    for alias in attendance_databases():
+        for name, value in queryset.using(alias).aggregate(**aggregates).items():
+            totals[name] += value or 0
+    return totals
+
+
+def count_by(queryset, field):
+    """{value of field: row count} summed over every attendance database"""
+    totals = Counter()
+    for alias in attendance_databases():
+        totals.update(dict(
+            queryset.using(alias).values_list(field).annotate(count=Count('id')).order_by()
+        ))
+    return dict(totals)
+
+
+def get(queryset, **lookup):
+    """The row matching lookup on whichever database holds it, or None"""
+    for alias in databases_with_unbalanced_rows():
+        row = queryset.using(alias).filter(**lookup).first()
+        if row is not None:
+            return row
+    return None
+
+
+def scatter(queryset, ordering=None):
+    """
+    queryset across every shard, merged in ordering (default LISTING_ORDER).
+    Without sharding, queryset itself, ordered if an ordering is given.
+    """
+    if not is_enabled():
+        return queryset.order_by(*ordering) if ordering else queryset
+    return ShardedQuerySet(queryset, ordering or LISTING_ORDER)
+
+
+class Descending:
+    """Sort key wrapper that reverses the order of any comparable value"""
+
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+
+class ShardedQuerySet:
+    """
+    Read-only view of one queryset over every shard, merged in order.
+    Supports count() and slicing, which is all Django's Paginator needs.
+    Slicing [start:stop] reads at most stop rows from each shard.
+    """
+
+    ordered = True
+
+    def __init__(self, queryset, ordering):
+        # Sort values are annotated so they are loaded even under .only()
+        self.names = [f'merge_key_{position}' for position in range(len(ordering))]
+        self.descending = [field.startswith('-') for field in ordering]
+        self.queryset = queryset.annotate(**{
+            name: F(field.lstrip('-')) for name, field in zip(self.names, ordering)
+        }).order_by(*[
+            f'-{name}' if descending else name
+            for name, descending in zip(self.names, self.descending)
+        ])
+        self._count = None
+
+    def key(self, row):
+        return tuple(
+            Descending(getattr(row, name)) if descending else getattr(row, name)
+            for name, descending in zip(self.names, self.descending)
+        )
+
+    def count(self):
+        if self._count is None:
+            self._count = count(self.queryset)
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def __getitem__(self, index):
+        if isinstance(index, int):
+            rows = self[index:index + 1]
+            if not rows:
+                raise IndexError(index)
+            return rows[0]
+        start, stop = index.start or 0, index.stop
+        shards = [self.queryset.using(alias) for alias in attendance_databases()]
+        if stop is not None:
+            shards = [queryset[:stop] for queryset in shards]
+        merged = heapq.merge(*shards, key=self.key)
+        return list(itertools.islice(merged, start, stop))
+
+
+# Shard maintenance
+
+def copy_rows(model, rows, alias, update=False):
+    """
+    Insert rows (value tuples of every concrete field) into alias as they
+    are, ids and timestamps included. Existing ids are updated when update
+    is set and skipped otherwise.
+    """
+    connection = connections[alias]
+    quote = connection.ops.quote_name
+    fields = model._meta.concrete_fields
+    columns = [field.column for field in fields]
+    on_conflict = OnConflict.UPDATE if update else OnConflict.IGNORE
+    pk = model._meta.pk.column
+    sql = '{} {} ({}) VALUES ({}) {}'.format(
+        connection.ops.insert_statement(on_conflict=on_conflict),
+        quote(model._meta.db_table),
+        ', '.join(quote(column) for column in columns),
+        ', '.join(['%s'] * len(columns)),
+        connection.ops.on_conflict_suffix_sql(
+            fields, on_conflict, [column for column in columns if column != pk], [pk]
+        ),
+    )
+    params = [
+        [field.get_db_prep_save(value, connection) for field, value in zip(fields, row)]
+        for row in rows
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+def replicate_employees(ids=None, batch_size=1000):
+    """Copy employees (all, or the given ids) from the default database to every shard"""
+    queryset = Employee.all_objects.using('default').order_by('id')
+    if ids is not None:
+        queryset = queryset.filter(id__in=list(ids))
+    fields = [field.attname for field in Employee._meta.concrete_fields]
+    rows = queryset.values_list(*fields).iterator(chunk_size=batch_size)
+    copied = 0
+    while batch := list(itertools.islice(rows, batch_size)):
+        for alias in shard_aliases():
+            with transaction.atomic(using=alias):
+                copy_rows(Employee, batch, alias, update=True)
+        copied += len(batch)
+    return copied
+
+
+def remove_employee_replicas(ids):
+    """Delete purged employees' copies from every shard"""
+    for alias in shard_aliases():
+        Employee.all_objects.using(alias).filter(id__in=list(ids))._raw_delete(alias)
+
+
+def group_by_shard(records):
+    """{alias: attendance records} for records about to be written"""
+    groups = {}
+    for record in records:
+        groups.setdefault(shard_for(record.employee_id), []).append(record)
+    return groups
+
+
+def reserve_id_range(alias):
+    """Start the shard's attendance ids at its own block so ids never collide"""
+    start = (shard_aliases().index(alias) + 1) * ID_BLOCK
+    connection = connections[alias]
+    table = Attendance._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT pg_get_serial_sequence(%s, %s)', [table, 'id'])
+            sequence = cursor.fetchone()[0]
+            cursor.execute(f'SELECT last_value FROM {sequence}')
+            if cursor.fetchone()[0] < start:
+                cursor.execute('SELECT setval(%s, %s)', [sequence, start])
+        elif connection.vendor == 'sqlite':
+            cursor.execute('SELECT seq FROM sqlite_sequence WHERE name = %s', [table])
+            row = cursor.fetchone()
+            if row is None:
+                cursor.execute('INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)', [table, start])
+            elif row[0] < start:
+                cursor.execute('UPDATE sqlite_sequence SET seq = %s WHERE name = %s', [start, table])
+
+
+def move_attendance(employee_id, source, target, batch_size=1000):
+    """
+    Move one employee's rows from source to target a batch at a time.
+    Each batch is copied, then deleted from source, so an interrupted move
+    can simply be run again.
+    """
+    fields = [field.attname for field in Attendance._meta.concrete_fields]
+    pk = fields.index(Attendance._meta.pk.attname)
+    rows = Attendance.all_objects.using(source).filter(employee_id=employee_id).order_by('id')
+    moved = 0
+    while batch := list(rows.values_list(*fields)[:batch_size]):
+        with transaction.atomic(using=target):
+            copy_rows(Attendance, batch, target)
+        with transaction.atomic(using=source):
+            Attendance.all_objects.using(source).filter(
+                id__in=[row[pk] for row in batch]
+            )._raw_delete(source)
+        moved += len(batch)
+    return moved
+
+
+def rebalance(batch_size=1000, dry_run=False):
+    """
+    Move every attendance row (including rows left on the default database
+    from before sharding) to its employee's shard; returns
+    {(source, target): rows}.
+    """
+    aliases = shard_aliases()
+    moves = Counter()
+    for source in databases_with_unbalanced_rows():
+        employee_ids = list(
+            Attendance.all_objects.using(source)
+            .values_list('employee_id', flat=True).distinct().order_by()
+        )
+        for employee_id in employee_ids:
+            target = shard_for(employee_id, aliases)
+            if target == source:
+                continue
+            if dry_run:
+                rows = Attendance.all_objects.using(source).filter(employee_id=employee_id).count()
+            else:
+                rows = move_attendance(employee_id, source, target, batch_size)
+                logger.info('Moved %d rows of employee %s from %s to %s', rows, employee_id, source, target)
+            moves[(source, target)] += rows
+    return dict(moves)
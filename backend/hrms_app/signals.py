@@ -0,0 +1,96 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from .models import Employee, Attendance, WorkingCalendar, Holiday
+
+# Handlers import the dashboard, snapshot and serializer modules on first use
+# so loading the app (e.g. for manage.py commands) does not pull in DRF.
+# Dashboard broadcasts are robust on_commit callbacks: the write has already
+# committed, so a broker failure is logged instead of failing the request.
+
+
+@receiver(post_save, sender=Employee)
+def employee_saved(sender, instance, created=False, update_fields=None, **kwargs):
+    """Patch the cached employee snapshot and notify live dashboards after commit"""
+    from . import dashboard, snapshots
+
+    action = 'created' if created else 'updated'
+    transaction.on_commit(lambda: dashboard.publish_employee_change(action), robust=True)
+    if update_fields and not set(update_fields) & set(snapshots.SIMPLE_FIELDS):
+        return
+    pk = instance.pk
+    transaction.on_commit(lambda: snapshots.patch_snapshot([pk]), robust=True)
+
+
+@receiver(post_delete, sender=Employee)
+def employee_deleted(sender, instance, **kwargs):
+    """Drop a deleted employee from the cached snapshot after commit"""
+    from . import dashboard, snapshots
+
+    pk = instance.pk
+    transaction.on_commit(lambda: snapshots.patch_snapshot([pk]), robust=True)
+    transaction.on_commit(lambda: dashboard.publish_employee_change('deleted'), robust=True)
+
+
+@receiver(post_save, sender=Employee)
+def replicate_employee(sender, instance, using='default', **kwargs):
+    """Copy a saved employee to the attendance shards after commit"""
+    from . import sharding
+
+    if sharding.is_enabled() and using == 'default':
+        pk = instance.pk
+        transaction.on_commit(lambda: sharding.replicate_employees([pk]))
+
+
+@receiver(post_delete, sender=Employee)
+def remove_employee_replicas(sender, instance, using='default', **kwargs):
+    """Drop a deleted employee's shard copies after commit"""
+    from . import sharding
+
+    if sharding.is_enabled() and using == 'default':
+        pk = instance.pk
+        transaction.on_commit(lambda: sharding.remove_employee_replicas([pk]))
+
+
+@receiver(post_save, sender=Attendance)
+def attendance_saved(sender, instance, created=False, **kwargs):
+    """Push the attendance write to live dashboards after commit"""
+    from . import dashboard
+
+    action = 'created' if created else 'updated'
+    transaction.on_commit(
+        lambda: dashboard.publish_attendance_change(action, instance.date, instance), robust=True
+    )
+
+
+@receiver(post_delete, sender=Attendance)
+def attendance_deleted(sender, instance, origin=None, **kwargs):
+    """Push the attendance delete to live dashboards after commit"""
+    from . import dashboard
+
+    if isinstance(origin, Employee):
+        # Cascaded from an employee delete, which broadcasts once for all rows
+        return
+    record, day = {'id': instance.pk}, instance.date
+    transaction.on_commit(
+        lambda: dashboard.publish_attendance_change('deleted', day, record), robust=True
+    )
+
+
+@receiver([post_save, post_delete], sender=WorkingCalendar)
+@receiver([post_save, post_delete], sender=Holiday)
+def calendar_changed(sender, **kwargs):
+    """Drop the cached working calendars after commit"""
+    from . import calendars
+
+    transaction.on_commit(calendars.invalidate_calendars)
+
+
+@receiver(post_migrate)
+def shard_migrated(sender, using='default', **kwargs):
+    """Give a freshly migrated attendance shard its own id block"""
+    from . import sharding
+
+    if sender.label == 'hrms_app' and using in sharding.shard_aliases():
+        sharding.reserve_id_range(using)
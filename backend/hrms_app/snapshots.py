@@ -0,0 +1,158 @@
+"""
+Versioned, pre-serialized snapshot of the simple employee list.
+
+The snapshot lives in the configured cache as two entries per version: the
+row list (used for filtered requests) and the fully rendered JSON response
+body (served as-is to unfiltered requests). After an employee save or delete
+commits, the changed rows are re-read and patched into the cached list under
+a cache lock, and the result is published as a new version. A write that
+finds the lock taken (or no snapshot to patch) only marks the snapshot
+dirty; the next reader then rebuilds it from the database once.
+
+With the default LocMemCache every worker process keeps its own snapshot
+and only sees other workers' changes once its copy expires, so
+EMPLOYEE_SNAPSHOT_TIMEOUT defaults to a minute without Redis.
+"""
+
+import bisect
+import time
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Employee
+from .renderers import ORJSONRenderer
+
+
+SIMPLE_FIELDS = ('id', 'employee_id', 'full_name', 'department')
+SNAPSHOT_MESSAGE = 'Employee list retrieved successfully'
+
+VERSION_KEY = 'hrms:employee_simple:version'
+ROWS_KEY = 'hrms:employee_simple:rows:{version}'
+BODY_KEY = 'hrms:employee_simple:body:{version}'
+LOCK_KEY = 'hrms:employee_simple:lock'
+DIRTY_KEY = 'hrms:employee_simple:dirty'
+LOCK_TIMEOUT = 30
+
+
+def snapshot_timeout():
+    """Snapshots expire eventually so bulk updates that skip signals self-heal"""
+    return getattr(settings, 'EMPLOYEE_SNAPSHOT_TIMEOUT', 3600)
+
+
+def render_body(rows):
+    """Render the full employee_list_simple response body"""
+    return ORJSONRenderer().render({'message': SNAPSHOT_MESSAGE, 'data': rows})
+
+
+def current_version():
+    return cache.get(VERSION_KEY)
+
+
+def published_version():
+    """The current version, or None when it is missing or marked dirty"""
+    entries = cache.get_many([VERSION_KEY, DIRTY_KEY])
+    if entries.get(DIRTY_KEY):
+        return None
+    return entries.get(VERSION_KEY)
+
+
+def get_snapshot():
+    """Return (version, rows, body), rebuilding the snapshot if it is missing or dirty"""
+    version = published_version()
+    if version is not None:
+        entries = cache.get_many([ROWS_KEY.format(version=version), BODY_KEY.format(version=version)])
+        rows = entries.get(ROWS_KEY.format(version=version))
+        body = entries.get(BODY_KEY.format(version=version))
+        if rows is not None and body is not None:
+            return version, rows, body
+    return rebuild_snapshot() or build_unpublished()
+
+
+def get_snapshot_body():
+    """Return (version, body) without unpickling the row list"""
+    version = published_version()
+    if version is not None:
+        body = cache.get(BODY_KEY.format(version=version))
+        if body is not None:
+            return version, body
+    version, _, body = rebuild_snapshot() or build_unpublished()
+    return version, body
+
+
+def mark_dirty():
+    """Have the next reader rebuild the snapshot from the database"""
+    cache.set(DIRTY_KEY, True, snapshot_timeout())
+
+
+def patch_snapshot(employee_ids):
+    """
+    Re-read employee_ids from the database and patch them into the published
+    rows (deleted employees drop out). Marks the snapshot dirty instead when
+    another process holds the lock or there is nothing to patch. Returns
+    (version, rows, body), or None if nothing was published.
+    """
+    ids = set(employee_ids)
+    if not cache.add(LOCK_KEY, True, LOCK_TIMEOUT):
+        mark_dirty()
+        return None
+    try:
+        version = current_version()
+        rows = cache.get(ROWS_KEY.format(version=version)) if version is not None else None
+        if rows is None:
+            mark_dirty()
+            return None
+        rows = [row for row in rows if row['id'] not in ids]
+        for row in Employee.objects.filter(id__in=ids).values(*SIMPLE_FIELDS):
+            bisect.insort(rows, row, key=itemgetter('employee_id'))
+        return publish_snapshot(rows)
+    finally:
+        cache.delete(LOCK_KEY)
+
+
+def rebuild_snapshot():
+    """
+    Rebuild the snapshot from the database and publish it as a new version.
+    Returns (version, rows, body), or None when another process holds the
+    lock, in which case callers serve build_unpublished() meanwhile.
+    """
+    if not cache.add(LOCK_KEY, True, LOCK_TIMEOUT):
+        return None
+    try:
+        # Cleared first so a write committed during the rebuild marks it again
+        cache.delete(DIRTY_KEY)
+        return publish_snapshot(
+            list(Employee.objects.order_by('employee_id').values(*SIMPLE_FIELDS))
+        )
+    finally:
+        cache.delete(LOCK_KEY)
+
+
+def publish_snapshot(rows):
+    """Store rows and their rendered body under the next version, then point readers at it"""
+    timeout = snapshot_timeout()
+    current = current_version()
+    # A lost version counter restarts from the clock so old ETags never match
+    version = (current if current is not None else time.time_ns() // 1000) + 1
+    body = render_body(rows)
+    cache.set_many({
+        ROWS_KEY.format(version=version): rows,
+        BODY_KEY.format(version=version): body,
+    }, timeout)
+    # Only the lock holder publishes, so the counter moves forward in step
+    if current is None:
+        cache.add(VERSION_KEY, version, timeout)
+    else:
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            # Expired since it was read
+            cache.add(VERSION_KEY, version, timeout)
+    return version, rows, body
+
+
+def build_unpublished():
+    """Rows and body straight from the database, for use while another process rebuilds"""
+    rows = list(Employee.objects.order_by('employee_id').values(*SIMPLE_FIELDS))
+    return None, rows, render_body(rows)
@@ -1,9 +1,36 @@
-from django.test import TestCase
+import base64
+import gzip
+import json
+import marshal
+import sqlite3
+import tempfile
+import threading
+from io import StringIO
+from pathlib import Path
+from unittest import mock, skipUnless
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, connection, connections, transaction
+from django.http import StreamingHttpResponse
+from django.test import TestCase, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework.test import APITestCase
 from rest_framework import status
-from .models import Employee, Attendance
-from datetime import date
+from .models import Employee, Attendance, AuditEvent, Tombstone, WorkingCalendar, Holiday
+from . import audit, calendars, events, purge, sharding, snapshots, throttling, write_buffer
+from .admin import DEPARTMENT_CHOICES_KEY, DateRangeQuerySet, EstimatedCountPaginator
+from .middleware import UNRESOLVED_ENDPOINT, APICompressionMiddleware
+from .compression import compression_stats
+from .lazy import optional_module
+from .management.commands.profile_startup import parse_importtime
+from .throttling import counter_snapshot
+from .backup import SnapshotError, dump, restore
+from datetime import date, timedelta
 
 
 class EmployeeModelTest(TestCase):
@@ -116,3 +143,1180 @@ class AttendanceAPITest(APITestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 1)
+
+
+class RendererTest(APITestCase):
+    """Test cases for content-negotiated renderers"""
+    
+    def setUp(self):
+        cache.clear()
+        self.employee = Employee.objects.create(
+            employee_id="EMP001",
+            full_name="John Doe",
+            email="john.doe@example.com",
+            department="IT"
+        )
+    
+    def test_columnar_employee_list_simple(self):
+        """Test columnar rendering sends keys once"""
+        url = reverse('employee-list-simple')
+        response = self.client.get(url, {'format': 'columnar'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        payload = json.loads(response.content)
+        self.assertEqual(payload['data']['columns'], ['id', 'employee_id', 'full_name', 'department'])
+        self.assertEqual(payload['data']['rows'], [[self.employee.id, 'EMP001', 'John Doe', 'IT']])
+    
+    @skipUnless(optional_module('msgpack'), 'msgpack is not installed')
+    def test_msgpack_employee_list_simple(self):
+        """Test MessagePack rendering via the Accept header"""
+        msgpack = optional_module('msgpack')
+        url = reverse('employee-list-simple')
+        response = self.client.get(url, HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        payload = msgpack.unpackb(response.content)
+        self.assertEqual(payload['data'][0]['employee_id'], 'EMP001')
+    
+    def test_list_item_validation_errors_render(self):
+        """Test validation errors keyed by list index render as a 400"""
+        response = self.client.post(reverse('employee-bulk-deactivate'), {'ids': ['x', 2]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('0', json.loads(response.content)['errors']['ids'])
+
+
+class CompressionMiddlewareTest(APITestCase):
+    """Test cases for API response compression"""
+    
+    def setUp(self):
+        cache.clear()
+        Employee.objects.bulk_create([
+            Employee(
+                employee_id=f"EMP{index:03d}",
+                full_name="John Doe",
+                email=f"john.doe{index}@example.com",
+                department="IT"
+            )
+            for index in range(50)
+        ])
+    
+    def test_gzip_large_response(self):
+        """Test responses above the threshold are gzip compressed"""
+        url = reverse('employee-list-simple')
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        payload = json.loads(gzip.decompress(response.content))
+        self.assertEqual(len(payload['data']), 50)
+    
+    def test_unresolved_urls_share_one_stats_entry(self):
+        """Test requests to unknown URLs do not add a stats entry per path"""
+        for number in range(3):
+            self.client.get(f'/api/no-such-endpoint-{number}/', HTTP_ACCEPT_ENCODING='gzip')
+        endpoints = {endpoint for endpoint, _ in compression_stats.snapshot()}
+        self.assertFalse([endpoint for endpoint in endpoints if 'no-such-endpoint' in endpoint])
+        self.assertIn(UNRESOLVED_ENDPOINT, endpoints)
+    
+    def test_identity_when_not_accepted(self):
+        """Test responses are left alone without Accept-Encoding"""
+        url = reverse('employee-list-simple')
+        response = self.client.get(url)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(len(json.loads(response.content)['data']), 50)
+    
+    def test_streaming_response_compressed(self):
+        """Test streaming responses are compressed chunk by chunk"""
+        chunks = [b'id,status\n'] + [f'{index},Present\n'.encode() for index in range(100)]
+        middleware = APICompressionMiddleware(
+            lambda request: StreamingHttpResponse(iter(chunks), content_type='text/csv')
+        )
+        request = RequestFactory().get('/api/export/', HTTP_ACCEPT_ENCODING='gzip')
+        response = middleware(request)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), b''.join(chunks))
+
+
+class EmployeeListSimpleTest(APITestCase):
+    """Test cases for the cached simple employee list"""
+    
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('employee-list-simple')
+        for employee_id, full_name in [("EMP001", "John Doe"), ("EMP002", "Jane Roe"), ("EMP003", "Jack Smith")]:
+            Employee.objects.create(
+                employee_id=employee_id,
+                full_name=full_name,
+                email=f"{employee_id.lower()}@example.com",
+                department="IT"
+            )
+    
+    def test_fields_prefix_and_limit(self):
+        """Test sparse fields, prefix filtering and limits"""
+        response = self.client.get(self.url, {'fields': 'id,full_name', 'prefix': 'ja', 'limit': 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['data'], [{'id': Employee.objects.get(employee_id="EMP002").id, 'full_name': 'Jane Roe'}])
+    
+    def test_unknown_field_rejected(self):
+        """Test unknown fields return a 400"""
+        response = self.client.get(self.url, {'fields': 'email'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_snapshot_served_without_queries(self):
+        """Test the cached snapshot skips the database and honours ETags"""
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(len(json.loads(response.content)['data']), 3)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+    
+    @override_settings(API_COMPRESSION_MIN_SIZE=0)
+    def test_weak_etag_from_compressed_response_matches(self):
+        """Test the W/ tag sent on compressed responses still yields a 304"""
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertTrue(response['ETag'].startswith('W/'))
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=f'"other", {response["ETag"]}')
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+    
+    def test_snapshot_patched_on_save(self):
+        """Test employee saves and deletes patch the cached rows after commit"""
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Employee.objects.create(
+                employee_id="EMP000",
+                full_name="Alice Doe",
+                email="emp000@example.com",
+                department="HR"
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            Employee.objects.get(employee_id="EMP002").delete()
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        data = json.loads(response.content)['data']
+        self.assertEqual([row['employee_id'] for row in data], ["EMP000", "EMP001", "EMP003"])
+    
+    def test_locked_patch_leaves_rebuild_to_reader(self):
+        """Test a patch that finds the lock taken marks the snapshot dirty for the next reader"""
+        version, _, _ = snapshots.rebuild_snapshot()
+        cache.add(snapshots.LOCK_KEY, True)
+        Employee.objects.filter(employee_id="EMP001").update(full_name="Johnny Doe")
+        self.assertIsNone(snapshots.patch_snapshot([Employee.objects.get(employee_id="EMP001").id]))
+        self.assertEqual(snapshots.current_version(), version)
+        self.assertTrue(cache.get(snapshots.DIRTY_KEY))
+        
+        # While the lock is held readers get rows straight from the database
+        self.assertIsNone(snapshots.get_snapshot()[0])
+        
+        # Once the lock is free the next reader rebuilds once
+        cache.delete(snapshots.LOCK_KEY)
+        version, rows, _ = snapshots.get_snapshot()
+        self.assertIn("Johnny Doe", [row['full_name'] for row in rows])
+        self.assertIsNone(cache.get(snapshots.DIRTY_KEY))
+        self.assertEqual(snapshots.get_snapshot()[0], version)
+
+
+class SparseFieldsetTest(APITestCase):
+    """Test cases for ?fields= / ?exclude= on serializers"""
+    
+    def setUp(self):
+        self.employee = Employee.objects.create(
+            employee_id="EMP001",
+            full_name="John Doe",
+            email="john.doe@example.com",
+            department="IT"
+        )
+        self.attendance = Attendance.objects.create(
+            employee=self.employee,
+            date=date.today(),
+            status="Present"
+        )
+    
+    def test_attendance_list_fields(self):
+        """Test only the requested attendance fields are returned"""
+        url = reverse('attendance-list-create')
+        response = self.client.get(url, {'fields': 'id,status'})
+        self.assertEqual(response.data['results'], [{'id': self.attendance.id, 'status': 'Present'}])
+    
+    def test_attendance_list_skips_employee_columns(self):
+        """Test the employee join is not selected without employee fields"""
+        url = reverse('attendance-list-create')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url, {'fields': 'id,status'})
+        select = queries.captured_queries[-1]['sql'].split(' FROM ')[0]
+        self.assertNotIn('hrms_app_employee', select)
+    
+    def test_employee_detail_exclude(self):
+        """Test excluded employee fields are dropped"""
+        url = reverse('employee-detail', args=[self.employee.id])
+        response = self.client.get(url, {'exclude': 'email,created_at,updated_at'})
+        self.assertEqual(set(response.data), {'id', 'employee_id', 'full_name', 'department'})
+    
+    def test_summary_fields_skip_counts(self):
+        """Test unrequested summary counts are not computed"""
+        url = reverse('employee-attendance-summary', args=[self.employee.id])
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {'fields': 'id,total_present_days'})
+        self.assertEqual(response.data['data'], {'id': self.employee.id, 'total_present_days': 1})
+
+
+@override_settings(CHANGE_FEED_SAFETY_LAG=0)
+class ChangeFeedTest(APITestCase):
+    """Test cases for the incremental change feed"""
+    
+    def setUp(self):
+        self.employees = [
+            Employee.objects.create(
+                employee_id=f"EMP00{index}",
+                full_name="John Doe",
+                email=f"john.doe{index}@example.com",
+                department="IT"
+            )
+            for index in range(3)
+        ]
+        self.url = reverse('change-feed', args=['employees'])
+    
+    def test_paginates_with_cursor(self):
+        """Test changes are returned in pages linked by cursors"""
+        response = self.client.get(self.url, {'limit': 2})
+        first = response.data['data']
+        self.assertEqual(len(first['changes']), 2)
+        self.assertTrue(first['has_more'])
+        
+        response = self.client.get(self.url, {'cursor': first['next_cursor'], 'limit': 2})
+        second = response.data['data']
+        self.assertEqual([row['employee_id'] for row in second['changes']], ["EMP002"])
+        self.assertFalse(second['has_more'])
+    
+    def test_deletes_emit_tombstones(self):
+        """Test deleting an employee tombstones it and its attendance"""
+        employee = self.employees[0]
+        attendance = Attendance.objects.create(employee=employee, date=date.today(), status="Present")
+        cursor = self.client.get(self.url).data['data']['next_cursor']
+        
+        self.client.delete(reverse('employee-detail', args=[employee.id]))
+        
+        data = self.client.get(self.url, {'cursor': cursor}).data['data']
+        self.assertEqual(data['deleted'], [employee.id])
+        # Attendance is tombstoned as the background purge deletes it
+        purge.purge_deleted_employees()
+        attendance_url = reverse('change-feed', args=['attendance'])
+        self.assertEqual(self.client.get(attendance_url).data['data']['deleted'], [attendance.id])
+    
+    def test_invalid_cursor(self):
+        """Test malformed cursors are rejected"""
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_out_of_range_timestamps_rejected(self):
+        """Test impossible dates in since or a cursor return a 400, not a 500"""
+        for since in ['2026-13-45T00:00:00', '2026-10-19T25:00:00']:
+            response = self.client.get(self.url, {'since': since})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        bad = base64.urlsafe_b64encode(json.dumps({'u': ['2026-13-45T00:00:00', 0], 'd': 0}).encode()).decode()
+        response = self.client.get(self.url, {'cursor': bad})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class DashboardStreamTest(APITestCase):
+    """Test cases for live dashboard updates"""
+    
+    def setUp(self):
+        self.employee = Employee.objects.create(
+            employee_id="EMP001",
+            full_name="John Doe",
+            email="john.doe@example.com",
+            department="IT"
+        )
+    
+    def test_stream_starts_with_summary(self):
+        """Test the stream sends the full summary first"""
+        response = self.client.get(reverse('dashboard-stream'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = iter(response.streaming_content)
+        next(chunks)
+        frame = next(chunks).decode()
+        response.close()
+        self.assertTrue(frame.startswith('event: summary\n'))
+        self.assertEqual(json.loads(frame.split('data: ', 1)[1])['total_employees'], 1)
+    
+    @override_settings(DASHBOARD_STREAM_MAX_PER_PROCESS=1, DASHBOARD_STREAM_MAX_SECONDS=60)
+    def test_streams_over_limit_get_summary_and_retry_later(self):
+        """Test streams beyond the per-process limit close after the summary"""
+        first = self.client.get(reverse('dashboard-stream'))
+        next(iter(first.streaming_content))
+        try:
+            frames = [chunk.decode() for chunk in self.client.get(reverse('dashboard-stream')).streaming_content]
+        finally:
+            first.close()
+        self.assertEqual(frames[0], 'retry: 60000\n\n')
+        self.assertTrue(frames[1].startswith('event: summary\n'))
+        self.assertEqual(len(frames), 2)
+        
+        # Closing the first stream frees its slot
+        self.assertTrue(events.acquire_stream_slot(1))
+        events.release_stream_slot()
+    
+    def test_attendance_write_broadcasts_once(self):
+        """Test a committed attendance write publishes one update"""
+        subscription = events.get_broker().subscribe(events.DASHBOARD_CHANNEL)
+        try:
+            with self.captureOnCommitCallbacks(execute=True):
+                Attendance.objects.create(employee=self.employee, date=date.today(), status="Present")
+            message = subscription.get(timeout=1)
+            self.assertEqual(message['event'], 'attendance')
+            self.assertEqual(message['data']['today_attendance'], {'present': 1, 'absent': 0, 'total': 1})
+            self.assertIsNone(subscription.get(timeout=0))
+        finally:
+            subscription.close()
+    
+    def test_broadcast_skipped_without_listeners(self):
+        """Test writes do not count today's attendance when no stream is listening"""
+        with CaptureQueriesContext(connection) as captured:
+            with self.captureOnCommitCallbacks(execute=True):
+                Attendance.objects.create(employee=self.employee, date=date.today(), status="Present")
+        self.assertFalse([query for query in captured.captured_queries if 'COUNT' in query['sql']])
+    
+    @override_settings(AUDIT_ENABLED=False)
+    def test_broadcast_failure_does_not_fail_committed_write(self):
+        """Test a broker error after commit is logged and the client still gets 201"""
+        subscription = events.get_broker().subscribe(events.DASHBOARD_CHANNEL)
+        self.addCleanup(subscription.close)
+        data = {'employee': self.employee.id, 'date': date.today(), 'status': 'Present'}
+        with mock.patch.object(events, 'publish', side_effect=ConnectionError), \
+                self.assertLogs('django', 'ERROR'):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(reverse('attendance-list-create'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Attendance.objects.count(), 1)
+
+
+class AttendanceAdminTest(TestCase):
+    """Test cases for the attendance admin changelist"""
+    
+    def setUp(self):
+        cache.clear()
+        self.employee = Employee.objects.create(
+            employee_id="EMP001",
+            full_name="John Doe",
+            email="john.doe@example.com",
+            department="IT"
+        )
+        Attendance.objects.create(employee=self.employee, date=date(2024, 11, 29), status="Present")
+        Attendance.objects.create(employee=self.employee, date=date(2025, 2, 3), status="Absent")
+        user = User.objects.create_superuser("admin", "admin@example.com", "password")
+        self.client.force_login(user)
+    
+    def test_changelist_filters_and_search(self):
+        """Test the changelist renders with cached filters and index-friendly search"""
+        url = reverse('admin:hrms_app_attendance_changelist')
+        response = self.client.get(url, {'employee__department': 'IT', 'q': 'emp001'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['cl'].result_count, 2)
+        self.assertEqual(cache.get(DEPARTMENT_CHOICES_KEY), ['IT'])
+    
+    def test_date_hierarchy_from_bounds(self):
+        """Test year/month choices are derived from the date range"""
+        queryset = DateRangeQuerySet(model=Attendance)
+        self.assertEqual(queryset.dates('date', 'year'), [date(2024, 1, 1), date(2025, 1, 1)])
+        self.assertEqual(
+            queryset.dates('date', 'month'),
+            [date(2024, 11, 1), date(2024, 12, 1), date(2025, 1, 1), date(2025, 2, 1)]
+        )
+    
+    def test_estimated_count_ignores_soft_delete_filter(self):
+        """Test unfiltered changelists, including the soft-deleted employee filter, use the estimate"""
+        with mock.patch('hrms_app.admin.estimated_row_count', return_value=500000):
+            self.assertEqual(EstimatedCountPaginator(Employee.objects.all(), 100).count, 500000)
+            self.assertEqual(EstimatedCountPaginator(Attendance.objects.all(), 100).count, 500000)
+            filtered = Attendance.objects.filter(status='Present')
+            self.assertEqual(EstimatedCountPaginator(filtered, 100).count, 1)
+
+
+class StartupProfileTest(TestCase):
+    """Test cases for startup profiling helpers"""
+    
+    def test_parse_importtime(self):
+        """Test -X importtime output is parsed per module"""
+        output = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   hrms_app.lazy\n"
+            "import time:      1412 |       1532 | hrms_app.signals\n"
+        )
+        self.assertEqual(
+            parse_importtime(output),
+            {'hrms_app.lazy': (120, 120), 'hrms_app.signals': (1412, 1532)}
+        )
+
+
+class ThrottlingTest(APITestCase):
+    """Test cases for token-bucket throttles and load shedding"""
+    
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('dashboard-summary')
+    
+    def test_cost_weighted_endpoint_bucket(self):
+        """Test expensive requests drain the endpoint bucket by their cost"""
+        rest_framework = dict(settings.REST_FRAMEWORK)
+        rest_framework['DEFAULT_THROTTLE_RATES'] = {'client': '1000/min', 'dashboard-summary': '20/min'}
+        with self.settings(REST_FRAMEWORK=rest_framework):
+            self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+            self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(counter_snapshot()['dashboard-summary']['throttled'], 1)
+    
+    def test_forwarded_for_does_not_reset_client_bucket(self):
+        """Test a client cannot get a fresh bucket by sending a new X-Forwarded-For each time"""
+        rest_framework = dict(settings.REST_FRAMEWORK)
+        rest_framework['DEFAULT_THROTTLE_RATES'] = {'client': '2/min'}
+        url = reverse('employee-list-create')
+        with self.settings(REST_FRAMEWORK=rest_framework):
+            codes = [
+                self.client.get(url, HTTP_X_FORWARDED_FOR=f'10.0.0.{number}').status_code
+                for number in range(3)
+            ]
+        self.assertEqual(codes[-1], status.HTTP_429_TOO_MANY_REQUESTS)
+    
+    def test_concurrent_spends_do_not_overdraw(self):
+        """Test simultaneous requests cannot all spend the same tokens"""
+        results = []
+        barrier = threading.Barrier(8)
+        
+        def spend():
+            barrier.wait()
+            results.append(throttling.spend_tokens('hrms:test:bucket', 5, 0.0001, 1, 60)[0])
+        
+        threads = [threading.Thread(target=spend) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results.count(True), 5)
+    
+    def test_concurrency_limit_sheds_load(self):
+        """Test requests over the in-flight limit get a 429"""
+        with self.settings(API_CONCURRENCY_LIMITS={'dashboard-summary': 1}):
+            cache.set('hrms:inflight:dashboard-summary', 1)
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(cache.get('hrms:inflight:dashboard-summary'), 1)
+        self.assertEqual(counter_snapshot()['dashboard-summary']['shed'], 1)
+
+
+class BufferedAttendanceWriteTest(APITestCase):
+    """Test cases for the buffered attendance write mode"""
+    
+    def setUp(self):
+        self.employee = Employee.objects.create(
+            employee_id="EMP001",
+            full_name="John Doe",
+            email="john.doe@example.com",
+            department="IT"
+        )
+        self.url = reverse('attendance-list-create')
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        buffered = self.settings(
+            ATTENDANCE_BUFFERED_WRITES=True,
+            ATTENDANCE_BUFFER_BACKEND='local',
+            ATTENDANCE_BUFFER_PATH=Path(directory.name) / 'buffer.sqlite3'
+        )
+        buffered.enable()
+        self.addCleanup(buffered.disable)
+        write_buffer._buffer = None
+        self.addCleanup(setattr, write_buffer, '_buffer', None)
+    
+    def test_post_is_queued_without_writing(self):
+        """Test buffered check-ins return 202 and stay out of the database until flushed"""
+        data = {"employee": self.employee.id, "date": date.today(), "status": "Present"}
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(len(captured.captured_queries), 0)
+        self.assertEqual(Attendance.objects.count(), 0)
+        self.assertEqual(write_buffer.get_write_buffer().pending(), 1)
+    
+    def test_flush_coalesces_last_write_wins(self):
+        """Test a flush keeps the latest status per employee and date and drops unknown employees"""
+        buffer = write_buffer.get_write_buffer()
+        buffer.enqueue(self.employee.id, date.today(), 'Present')
+        buffer.enqueue(self.employee.id, date.today(), 'Absent')
+        buffer.enqueue(self.employee.id + 100, date.today(), 'Present')
+        self.assertEqual(buffer.flush(), (3, 1))
+        self.assertEqual(buffer.pending(), 0)
+        self.assertEqual(Attendance.objects.get().status, 'Absent')
+    
+    def test_reads_leave_flushing_to_the_flusher(self):
+        """Test reads do not drain the buffer; queued check-ins appear once flushed"""
+        data = {"employee": self.employee.id, "date": date.today(), "status": "Present"}
+        self.client.post(self.url, data, format='json')
+        self.assertEqual(self.client.get(self.url).data['count'], 0)
+        self.assertEqual(write_buffer.get_write_buffer().pending(), 1)
+        call_command('flush_attendance_buffer', '--once', stdout=StringIO())
+        self.assertEqual(self.client.get(self.url).data['count'], 1)
+    
+    def test_future_dates_rejected(self):
+        """Test buffered check-ins share the attendance date validation"""
+        data = {"employee": self.employee.id, "date": date.today() + timedelta(days=1), "status": "Present"}
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('date', response.data['errors'])
+    
+    def test_failed_flush_releases_batch(self):
+        """Test a batch is retried when its transaction fails"""
+        buffer = write_buffer.get_write_buffer()
+        buffer.enqueue(self.employee.id, date.today(), 'Present')
+        original = buffer.write
+        buffer.write = lambda items: 1 / 0
+        with self.assertRaises(ZeroDivisionError):
+            buffer.flush()
+        buffer.write = original
+        self.assertEqual(buffer.flush(), (1, 1))
+    
+    @override_settings(AUDIT_ASYNC=False)
+    def test_flush_audits_real_changes(self):
+        """Test flushed check-ins are audited with their row id and old status, skipping no-ops"""
+        buffer = write_buffer.get_write_buffer()
+        yesterday = date.today() - timedelta(days=1)
+        existing = Attendance.objects.create(employee=self.employee, date=yesterday, status='Present')
+        buffer.enqueue(self.employee.id, yesterday, 'Absent')
+        buffer.enqueue(self.employee.id, date.today(), 'Present')
+        with self.captureOnCommitCallbacks(execute=True):
+            buffer.flush()
+        created = Attendance.objects.get(date=date.today())
+        events = {event.action: event for event in AuditEvent.objects.all()}
+        self.assertEqual(events['update'].object_id, existing.id)
+        self.assertEqual(events['update'].changes, {'status': ['Present', 'Absent']})
+        self.assertEqual(events['create'].object_id, created.id)
+        self.assertEqual(events['create'].changes['status'], [None, 'Present'])
+        
+        buffer.enqueue(self.employee.id, yesterday, 'Absent')
+        with self.captureOnCommitCallbacks(execute=True):
+            buffer.flush()
+        self.assertEqual(AuditEvent.objects.count(), 2)
+    
+    @override_settings(AUDIT_ASYNC=False)
+    def test_flush_audits_ids_of_new_rows_among_existing(self):
+        """Test new rows get their ids even when every employee and date already appear in other rows"""
+        other = Employee.objects.create(
+            employee_id="EMP002", full_name="Jane Roe", email="jane.roe@example.com", department="IT"
+        )
+        first, second = date.today() - timedelta(days=2), date.today() - timedelta(days=1)
+        Attendance.objects.create(employee=self.employee, date=second, status='Present')
+        Attendance.objects.create(employee=other, date=first, status='Present')
+        buffer = write_buffer.get_write_buffer()
+        buffer.enqueue(self.employee.id, first, 'Present')
+        buffer.enqueue(other.id, second, 'Present')
+        with self.captureOnCommitCallbacks(execute=True):
+            buffer.flush()
+        events = AuditEvent.objects.filter(action='create')
+        self.assertEqual(
+            {event.object_id for event in events},
+            {Attendance.objects.get(employee=self.employee, date=first).id,
+             Attendance.objects.get(employee=other, date=second).id}
+        )
+
+
+class ProfilingTest(APITestCase):
+    """Test cases for sampled request profiling"""
+    
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user('admin', password='secret', is_staff=True)
+        self.url = reverse('dashboard-summary')
+    
+    def test_staff_header_profiles_request(self):
+        """Test a staff X-Profile request is stored with its SQL and downloads as pstats"""
+        self.client.force_login(self.admin)
+        response = self.client.get(self.url, HTTP_X_PROFILE='1')
+        profile_id = response['X-Profile-Id']
+        
+        listing = self.client.get(reverse('profile-list')).data['data']
+        self.assertEqual([profile['id'] for profile in listing], [profile_id])
+        self.assertGreater(listing[0]['query_count'], 0)
+        self.assertIn('pstats', listing[0]['formats'])
+        
+        download = self.client.get(reverse('profile-download', args=[profile_id, 'pstats']))
+        self.assertEqual(download.status_code, status.HTTP_200_OK)
+        self.assertTrue(marshal.loads(download.content))
+    
+    def test_header_ignored_for_anonymous_clients(self):
+        """Test anonymous clients cannot force profiling"""
+        response = self.client.get(self.url, HTTP_X_PROFILE='1')
+        self.assertNotIn('X-Profile-Id', response)
+    
+    @override_settings(PROFILING_TOKEN='s3cret')
+    def test_token_header_profiles_anonymous_request(self):
+        """Test only the exact profiling token lets anonymous clients force profiling"""
+        self.assertNotIn('X-Profile-Id', self.client.get(self.url, HTTP_X_PROFILE='s3cre'))
+        self.assertIn('X-Profile-Id', self.client.get(self.url, HTTP_X_PROFILE='s3cret'))
+    
+    @override_settings(PROFILING_SAMPLE_RATE=1.0, PROFILING_MODE='sampling', PROFILING_BUFFER_SIZE=2)
+    def test_sampling_mode_ring_buffer(self):
+        """Test sampled profiles export to speedscope and only the newest are kept"""
+        ids = [self.client.get(self.url)['X-Profile-Id'] for _ in range(3)]
+        self.client.force_authenticate(self.admin)
+        listing = self.client.get(reverse('profile-list')).data['data']
+        self.assertEqual([profile['id'] for profile in listing], [ids[2], ids[1]])
+        download = self.client.get(reverse('profile-download', args=[ids[-1], 'speedscope']))
+        self.assertEqual(json.loads(download.content)['profiles'][0]['type'], 'sampled')
+        missing = self.client.get(reverse('profile-download', args=[ids[0], 'speedscope']))
+        self.assertEqual(missing.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TunedSQLiteBackendTest(TestCase):
+    """Test cases for the tuned SQLite backend"""
+    
+    alias = 'tuned_sqlite_test'
+    
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = str(Path(directory.name) / 'tuned.sqlite3')
+        settings_dict = dict(connections['default'].settings_dict)
+        settings_dict.update(
+            ENGINE='hrms_project.sqlite3', NAME=self.path, TEST={},
+            OPTIONS={'transaction_mode': 'IMMEDIATE', 'pragmas': {'busy_timeout': 50, 'journal_mode': 'WAL', 'synchronous': 'NORMAL'}}
+        )
+        connections.settings[self.alias] = settings_dict
+        self.addCleanup(connections.settings.pop, self.alias)
+        self.addCleanup(self.drop_connection)
+    
+    def drop_connection(self):
+        connections[self.alias].close()
+        del connections[self.alias]
+    
+    def test_pragmas_applied_on_connect(self):
+        """Test new connections run in WAL mode with synchronous=NORMAL"""
+        with connections[self.alias].cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+    
+    def test_atomic_takes_write_lock_at_begin(self):
+        """Test atomic blocks begin IMMEDIATE so other writers wait instead of deadlocking"""
+        other = sqlite3.connect(self.path, timeout=0, isolation_level=None)
+        self.addCleanup(other.close)
+        with transaction.atomic(using=self.alias):
+            connections[self.alias].cursor().execute('SELECT 1')
+            with self.assertRaisesMessage(sqlite3.OperationalError, 'locked'):
+                other.execute('BEGIN IMMEDIATE')
+
+
+@override_settings(ATTENDANCE_IMPLICIT_ABSENCES=True)
+class WorkingCalendarTest(APITestCase):
+    """Test cases for working calendars and implicit absences"""
+    
+    def setUp(self):
+        cache.clear()
+        self.employee = Employee.objects.create(
+            employee_id="EMP001",
+            full_name="John Doe",
+            email="john.doe@example.com",
+            department="IT"
+        )
+        Employee.objects.create(
+            employee_id="EMP002",
+            full_name="Jane Smith",
+            email="jane.smith@example.com",
+            department="HR"
+        )
+    
+    def test_working_days_match_day_by_day_count(self):
+        """Test the closed-form working day count against iterating every day"""
+        start = date(2026, 1, 1)
+        holidays = [date(2026, 1, 1), date(2026, 1, 3), date(2026, 5, 1)]
+        calendar = calendars.Calendar({4, 5}, holidays)
+        for length in range(0, 150, 7):
+            for shift in range(7):
+                first, last = start + timedelta(days=shift), start + timedelta(days=shift + length)
+                expected = sum(
+                    1 for offset in range(length + 1)
+                    if calendar.is_working_day(first + timedelta(days=offset))
+                )
+                self.assertEqual(calendar.working_days(first, last), expected)
+    
+    def test_summary_infers_absences(self):
+        """Test absent days are working days minus present days, skipping holidays"""
+        today = date.today()
+        monday = today - timedelta(days=today.weekday() + 14)
+        Employee.objects.filter(pk=self.employee.pk).update(created_at=monday)
+        with self.captureOnCommitCallbacks(execute=True):
+            calendar = WorkingCalendar.objects.create(name="IT", department="IT")
+            Holiday.objects.create(calendar=calendar, date=monday + timedelta(days=1), name="Holiday")
+        Attendance.objects.create(employee=self.employee, date=monday, status='Present')
+        Attendance.objects.create(employee=self.employee, date=monday + timedelta(days=5), status='Present')
+        
+        url = reverse('employee-attendance-summary', args=[self.employee.id])
+        data = self.client.get(url).data['data']
+        working_days = calendars.Calendar({5, 6}, [monday + timedelta(days=1)]).working_days(monday, today)
+        # The Saturday check-in is not a working day, so only Monday counts
+        self.assertEqual(data['total_present_days'], 1)
+        self.assertEqual(data['total_absent_days'], working_days - 1)
+    
+    def test_dashboard_today_uses_department_calendars(self):
+        """Test today's absences only count employees whose calendar has today as a working day"""
+        today = date.today()
+        with self.captureOnCommitCallbacks(execute=True):
+            WorkingCalendar.objects.create(name="Default", weekend_days='')
+            WorkingCalendar.objects.create(name="HR", department="HR", weekend_days=str(today.weekday()))
+        Attendance.objects.create(employee=self.employee, date=today, status='Present')
+        
+        counts = self.client.get(reverse('dashboard-summary')).data['data']['today_attendance']
+        self.assertEqual(counts, {'present': 1, 'absent': 0, 'total': 1})
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            WorkingCalendar.objects.filter(department="HR").delete()
+        counts = self.client.get(reverse('dashboard-summary')).data['data']['today_attendance']
+        self.assertEqual(counts, {'present': 1, 'absent': 1, 'total': 2})
+    
+    def test_single_default_calendar(self):
+        """Test only one calendar may leave the department empty"""
+        WorkingCalendar.objects.create(name="Default")
+        with self.assertRaisesMessage(DjangoValidationError, 'default calendar'):
+            WorkingCalendar(name="Other default").full_clean()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            WorkingCalendar.objects.create(name="Other default")
+        WorkingCalendar.objects.create(name="HR", department="HR")
+
+
+class EmployeeSoftDeleteTest(APITestCase):
+    """Test cases for soft-deleting and purging employees"""
+    
+    def setUp(self):
+        self.employees = [
+            Employee.objects.create(
+                employee_id=f"EMP00{number}",
+                full_name=f"Employee {name}",
+                email=f"employee{number}@example.com",
+                department="Sales" if number < 3 else "IT"
+            )
+            for number, name in [(1, 'One'), (2, 'Two'), (3, 'Three')]
+        ]
+        for employee in self.employees:
+            for days in range(5):
+                Attendance.objects.create(
+                    employee=employee, date=date.today() - timedelta(days=days), status='Present'
+                )
+    
+    def test_delete_hides_employee_and_attendance(self):
+        """Test a deleted employee and their attendance disappear at once without deleting rows"""
+        employee = self.employees[0]
+        response = self.client.delete(reverse('employee-detail', args=[employee.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(Employee.objects.filter(pk=employee.pk).exists())
+        self.assertEqual(Attendance.objects.filter(employee_id=employee.pk).count(), 0)
+        self.assertEqual(Attendance.objects.count(), 10)
+        self.assertEqual(Attendance.all_objects.filter(employee_id=employee.pk).count(), 5)
+        with CaptureQueriesContext(connection) as captured:
+            list(Attendance.objects.order_by('id').values_list('id', flat=True))
+        self.assertNotIn('JOIN', captured.captured_queries[0]['sql'])
+        response = self.client.get(reverse('employee-detail', args=[employee.id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_purge_deletes_in_batches(self):
+        """Test the purge removes attendance in bounded batches, then the employee"""
+        employee = self.employees[0]
+        purge.deactivate_employees(Employee.objects.filter(pk=employee.pk))
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(purge.purge_deleted_employees(batch_size=2), (1, 5))
+        deletes = [query for query in captured.captured_queries if query['sql'].startswith('DELETE FROM "hrms_app_attendance"')]
+        self.assertEqual(len(deletes), 3)
+        self.assertFalse(Employee.all_objects.filter(pk=employee.pk).exists())
+        self.assertEqual(Attendance.all_objects.count(), 10)
+    
+    def test_bulk_deactivate_by_department(self):
+        """Test bulk deactivation of a department, and that deleted IDs stay reserved until purged"""
+        url = reverse('employee-bulk-deactivate')
+        with self.settings(AUDIT_ASYNC=False), self.captureOnCommitCallbacks(execute=True):
+            audit._writer = None
+            self.addCleanup(setattr, audit, '_writer', None)
+            response = self.client.post(url, {'department': 'Sales'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        event = AuditEvent.objects.get(object_id=self.employees[0].id)
+        self.assertEqual(event.changes['full_name'], ['Employee One', None])
+        self.assertEqual(sorted(response.data['data']['deactivated']), [self.employees[0].id, self.employees[1].id])
+        self.assertEqual(Employee.objects.count(), 1)
+        
+        self.assertEqual(self.client.post(url, {}, format='json').status_code, status.HTTP_400_BAD_REQUEST)
+        duplicate = {
+            'employee_id': 'EMP001', 'full_name': 'New Hire',
+            'email': 'new@example.com', 'department': 'IT'
+        }
+        response = self.client.post(reverse('employee-list-create'), duplicate, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(AUDIT_ASYNC=False)
+class AuditTrailTest(APITestCase):
+    """Test cases for the audit trail"""
+    
+    def setUp(self):
+        audit._writer = None
+        self.addCleanup(setattr, audit, '_writer', None)
+        self.admin = User.objects.create_user('admin', password='secret', is_staff=True)
+        self.employee = Employee.objects.create(
+            employee_id="EMP001",
+            full_name="John Doe",
+            email="john.doe@example.com",
+            department="IT"
+        )
+    
+    def test_changes_recorded_after_commit(self):
+        """Test create, update and delete record field-level diffs once committed"""
+        self.client.force_authenticate(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('attendance-list-create'),
+                {"employee": self.employee.id, "date": date.today(), "status": "Present"},
+                format='json'
+            )
+        url = reverse('attendance-detail', args=[response.data['data']['id']])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(url, {"status": "Absent"}, format='json')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(url)
+        
+        events = list(AuditEvent.objects.order_by('id'))
+        self.assertEqual([event.action for event in events], ['create', 'update', 'delete'])
+        self.assertEqual(events[1].changes, {'status': ['Present', 'Absent']})
+        self.assertEqual(events[2].employee_ref, self.employee.id)
+        self.assertEqual(events[0].actor, 'admin')
+    
+    def test_nothing_written_during_request(self):
+        """Test audit events wait for the commit instead of adding inserts to the request"""
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.patch(
+                reverse('employee-detail', args=[self.employee.id]), {"department": "HR"}, format='json'
+            )
+        self.assertEqual(AuditEvent.objects.count(), 0)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(AuditEvent.objects.get().changes, {'department': ['IT', 'HR']})
+    
+    def test_events_are_append_only(self):
+        """Test audit events cannot be changed or deleted"""
+        with self.captureOnCommitCallbacks(execute=True):
+            audit.record('update', self.employee, {'department': ['IT', 'HR']})
+        event = AuditEvent.objects.get()
+        with self.assertRaises(TypeError):
+            event.save()
+        with self.assertRaises(TypeError):
+            AuditEvent.objects.all().delete()
+    
+    def test_query_by_employee_and_time_range(self):
+        """Test the audit API filters by employee and time range"""
+        other = Employee.objects.create(
+            employee_id="EMP002", full_name="Jane Smith", email="jane@example.com", department="HR"
+        )
+        now = timezone.now()
+        audit.get_writer().append([
+            AuditEvent(action='update', resource='employee', object_id=self.employee.id,
+                       employee_ref=self.employee.id, occurred_at=now - timedelta(days=3)),
+            AuditEvent(action='update', resource='employee', object_id=self.employee.id,
+                       employee_ref=self.employee.id, occurred_at=now),
+            AuditEvent(action='update', resource='employee', object_id=other.id,
+                       employee_ref=other.id, occurred_at=now),
+        ])
+        url = reverse('audit-event-list')
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(self.admin)
+        start = (now - timedelta(days=1)).isoformat()
+        response = self.client.get(url, {'employee': self.employee.id, 'start': start})
+        self.assertEqual(response.data['count'], 1)
+        response = self.client.get(url, {'start': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(url, {'start': '2026-02-30T00:00:00'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AuditWriterTest(TestCase):
+    """Test cases for retrying, spilling and flushing audit batches"""
+    
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.spill_dir = Path(directory.name)
+    
+    def make_events(self, count):
+        now = timezone.now()
+        return [
+            AuditEvent(action='update', resource='employee', object_id=number, employee_ref=number,
+                       occurred_at=now, day=now.date(), changes={'department': ['IT', 'HR']})
+            for number in range(count)
+        ]
+    
+    def test_failed_batch_is_spilled_and_replayed(self):
+        """Test a batch that keeps failing is spilled to disk and written back after the next success"""
+        writer = audit.AuditWriter(attempts=2, spill_dir=self.spill_dir)
+        with mock.patch.object(AuditEvent.objects, 'bulk_create', side_effect=RuntimeError), \
+                mock.patch.object(audit, 'RETRY_DELAY', 0), self.assertLogs('hrms_app.audit', 'ERROR'):
+            self.assertFalse(writer.write_with_retry(self.make_events(3)))
+        self.assertEqual(len(list(self.spill_dir.glob('audit-*.jsonl'))), 1)
+        self.assertEqual(AuditEvent.objects.count(), 0)
+        
+        self.assertTrue(writer.write_with_retry(self.make_events(1)))
+        self.assertEqual(AuditEvent.objects.count(), 4)
+        self.assertEqual(list(self.spill_dir.iterdir()), [])
+        self.assertEqual(AuditEvent.objects.first().changes, {'department': ['IT', 'HR']})
+    
+    def test_corrupt_spill_file_is_quarantined(self):
+        """Test an unreadable spill file is set aside and the writer thread keeps writing"""
+        (self.spill_dir / 'audit-1-1-1.jsonl').write_text('not json\n')
+        writer = audit.AuditWriter(interval=0, spill_dir=self.spill_dir)
+        written = []
+        writer.write = lambda events: written.extend(events) or True
+        with self.assertLogs('hrms_app.audit', 'ERROR'):
+            writer.append(self.make_events(1))
+            writer.queue.join()
+        self.assertEqual([path.name for path in self.spill_dir.iterdir()], ['corrupt-audit-1-1-1.jsonl'])
+        
+        writer.append(self.make_events(1))
+        writer.queue.join()
+        self.assertTrue(writer.is_running())
+        self.assertEqual(len(written), 2)
+    
+    def test_writer_restarts_after_thread_dies(self):
+        """Test a dead writer thread is replaced on the next append"""
+        writer = audit.AuditWriter(interval=0, spill_dir=self.spill_dir)
+        writer.write = lambda events: True
+        writer.append(self.make_events(1))
+        writer.queue.join()
+        dead = threading.Thread(target=lambda: None)
+        dead.start()
+        dead.join()
+        writer._thread = dead
+        writer.append(self.make_events(1))
+        self.assertIsNot(writer._thread, dead)
+        writer.queue.join()
+    
+    def test_flush_waits_for_in_flight_batch(self):
+        """Test flush returns only after the batch the writer thread already took is written"""
+        writer = audit.AuditWriter(interval=0, spill_dir=self.spill_dir)
+        started, release = threading.Event(), threading.Event()
+        written = []
+        
+        def slow_write(events):
+            started.set()
+            release.wait(5)
+            written.extend(events)
+            return True
+        
+        writer.write = slow_write
+        writer.append(self.make_events(2))
+        self.assertTrue(started.wait(5))
+        flusher = threading.Thread(target=writer.flush)
+        flusher.start()
+        flusher.join(0.2)
+        self.assertTrue(flusher.is_alive())
+        release.set()
+        flusher.join(5)
+        self.assertFalse(flusher.is_alive())
+        self.assertEqual(len(written), 2)
+
+
+class SnapshotDumpRestoreTest(TestCase):
+    """Test cases for the dump_hrms/restore_hrms snapshot format"""
+    
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name) / 'snapshot'
+        employees = [
+            Employee.objects.create(
+                employee_id=f"EMP00{number}",
+                full_name="John Doe",
+                email=f"john{number}@example.com",
+                department="IT"
+            )
+            for number in range(3)
+        ]
+        for employee in employees:
+            Attendance.objects.create(employee=employee, date=date.today(), status='Present')
+        purge.deactivate_employees(Employee.objects.filter(pk=employees[0].pk))
+        calendar = WorkingCalendar.objects.create(name="IT", department="IT")
+        Holiday.objects.create(calendar=calendar, date=date(2026, 12, 25), name="Christmas")
+    
+    def table_contents(self):
+        return [
+            list(model._base_manager.order_by('pk').values_list())
+            for model in (Employee, Attendance, WorkingCalendar, Holiday)
+        ]
+    
+    def test_round_trip(self):
+        """Test a dump restores every row, including soft-deleted ones, with indexes rebuilt"""
+        before = self.table_contents()
+        manifest = dump(self.directory, compression='gzip')
+        self.assertEqual([table['rows'] for table in manifest['tables']], [3, 1, 1, 3])
+        
+        cache.clear()
+        cache.set(calendars.CALENDARS_KEY, {})
+        with self.captureOnCommitCallbacks(execute=True):
+            results = restore(self.directory, replace=True)
+        self.assertEqual(sum(rows for _, rows, _, _ in results), 8)
+        self.assertIsNone(cache.get(calendars.CALENDARS_KEY))
+        self.assertTrue(cache.get(snapshots.DIRTY_KEY))
+        self.assertEqual(self.table_contents(), before)
+        with connection.cursor() as cursor:
+            indexes = connection.introspection.get_constraints(cursor, Attendance._meta.db_table)
+        self.assertIn('attendance_date_employee_idx', indexes)
+    
+    def test_restore_refuses_existing_rows(self):
+        """Test restoring over data requires replace"""
+        dump(self.directory, compression='gzip')
+        with self.assertRaisesMessage(SnapshotError, 'pass --replace'):
+            restore(self.directory)
+    
+    def test_refuses_sharded_attendance(self):
+        """Test dump and restore refuse to run while attendance is sharded"""
+        dump(self.directory, compression='gzip')
+        with self.settings(ATTENDANCE_SHARDS=['attendance_shard_0']):
+            with self.assertRaisesMessage(SnapshotError, 'sharded'):
+                dump(self.directory, compression='gzip')
+            with self.assertRaisesMessage(CommandError, 'sharded'):
+                call_command('restore_hrms', str(self.directory), '--replace', stdout=StringIO())
+
+
+class AttendanceShardingTest(APITestCase):
+    """Test cases for attendance sharded across local SQLite files"""
+    
+    aliases = ['attendance_shard_test_0', 'attendance_shard_test_1', 'attendance_shard_test_2']
+    
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        directory = cls.enterClassContext(tempfile.TemporaryDirectory())
+        cls.enterClassContext(override_settings(ATTENDANCE_SHARDS=cls.aliases))
+        for alias in cls.aliases:
+            settings_dict = dict(connections['default'].settings_dict)
+            settings_dict.update(NAME=str(Path(directory) / f'{alias}.sqlite3'), TEST={})
+            connections.settings[alias] = settings_dict
+            cls.addClassCleanup(connections.settings.pop, alias)
+            cls.addClassCleanup(cls.drop_connection, alias)
+            call_command('migrate', database=alias, verbosity=0)
+    
+    @staticmethod
+    def drop_connection(alias):
+        connections[alias].close()
+        del connections[alias]
+    
+    def setUp(self):
+        cache.clear()
+        self.today = date.today()
+        # Shards are outside the test transaction, so empty them afterwards
+        self.addCleanup(self.clear_shards)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.employees = [
+                Employee.objects.create(
+                    employee_id=f"EMP{number:03d}",
+                    full_name=f"Employee {number}",
+                    email=f"employee{number}@example.com",
+                    department="IT"
+                )
+                for number in range(12)
+            ]
+    
+    def clear_shards(self):
+        for alias in self.aliases:
+            Attendance.all_objects.using(alias).all()._raw_delete(alias)
+            Employee.all_objects.using(alias).all()._raw_delete(alias)
+    
+    def test_writes_route_to_employee_shard(self):
+        """Test attendance is stored on its employee's shard with shard-unique ids"""
+        url = reverse('attendance-list-create')
+        for employee in self.employees:
+            response = self.client.post(
+                url, {'employee': employee.id, 'date': self.today, 'status': 'Present'}, format='json'
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        
+        self.assertFalse(Attendance.all_objects.using('default').exists())
+        self.assertEqual(len({sharding.shard_for(employee.pk) for employee in self.employees}), 3)
+        for employee in self.employees:
+            shard = sharding.shard_for(employee.pk)
+            record = Attendance.objects.using(shard).get(employee=employee)
+            self.assertEqual(record.id // sharding.ID_BLOCK, self.aliases.index(shard) + 1)
+        
+        response = self.client.get(reverse('attendance-detail', args=[record.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['employee'], employee.id)
+        response = self.client.post(
+            url, {'employee': employee.id, 'date': self.today, 'status': 'Absent'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_listing_and_dashboard_gather_all_shards(self):
+        """Test date-range listings merge the shards in -date order and dashboard counts sum them"""
+        for number, employee in enumerate(self.employees):
+            for days in range(3):
+                employee.attendance_records.create(
+                    date=self.today - timedelta(days=days),
+                    status='Present' if number % 2 else 'Absent'
+                )
+        
+        url = reverse('attendance-list-create')
+        params = {'date_from': (self.today - timedelta(days=1)).isoformat()}
+        first = self.client.get(url, params).data
+        second = self.client.get(url, dict(params, page=2)).data
+        self.assertEqual(first['count'], 24)
+        rows = [(row['date'], row['employee_id']) for row in first['results'] + second['results']]
+        self.assertEqual(len(rows), 24)
+        self.assertEqual(rows, sorted(rows, key=lambda row: (-date.fromisoformat(row[0]).toordinal(), row[1])))
+        
+        summary = self.client.get(reverse('dashboard-summary')).data['data']
+        self.assertEqual(summary['total_attendance_records'], 36)
+        self.assertEqual(summary['today_attendance'], {'present': 6, 'absent': 6, 'total': 12})
+        self.assertEqual({row['date'] for row in summary['recent_attendance']}, {self.today.isoformat()})
+    
+    def test_rebalance_after_adding_a_shard(self):
+        """Test rebalancing moves pre-sharding and misplaced rows, and only onto the new shard"""
+        legacy = self.employees[0]
+        Attendance(employee=legacy, date=self.today - timedelta(days=7), status='Present').save(using='default')
+        with self.settings(ATTENDANCE_SHARDS=self.aliases[:2]):
+            before = {employee.pk: sharding.shard_for(employee.pk) for employee in self.employees}
+            for employee in self.employees:
+                employee.attendance_records.create(date=self.today, status='Present')
+        
+        call_command('rebalance_attendance_shards', stdout=StringIO())
+        self.assertFalse(Attendance.all_objects.using('default').exists())
+        moved = 0
+        for employee in self.employees:
+            shard = sharding.shard_for(employee.pk)
+            rows = Attendance.all_objects.using(shard).filter(employee_id=employee.pk)
+            self.assertEqual(rows.count(), 2 if employee == legacy else 1)
+            self.assertIn(shard, {before[employee.pk], self.aliases[2]})
+            moved += shard != before[employee.pk]
+        self.assertGreater(moved, 0)
+    
+    def test_lookups_and_purge_reach_rows_left_on_default(self):
+        """Test detail lookups and the purge find rows written before sharding was enabled"""
+        employee = self.employees[0]
+        legacy = Attendance(employee=employee, date=self.today, status='Present')
+        legacy.save(using='default')
+        employee.attendance_records.create(date=self.today - timedelta(days=1), status='Present')
+        
+        response = self.client.get(reverse('attendance-detail', args=[legacy.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(purge.purge_attendance(employee.pk), 2)
+        self.assertFalse(Attendance.all_objects.using('default').exists())
+    
+    def test_changing_employee_rejected(self):
+        """Test a record cannot be reassigned to another employee, whose shard may differ"""
+        employee, other = self.employees[0], self.employees[1]
+        record = employee.attendance_records.create(date=self.today, status='Present')
+        url = reverse('attendance-detail', args=[record.id])
+        response = self.client.patch(url, {'employee': other.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('employee', response.data['errors'])
+        response = self.client.patch(url, {'employee': employee.id, 'status': 'Absent'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_delete_on_shard_leaves_tombstone(self):
+        """Test deleting a sharded record removes it from its shard and tombstones it on the default database"""
+        employee = self.employees[0]
+        record = employee.attendance_records.create(date=self.today, status='Present')
+        response = self.client.delete(reverse('attendance-detail', args=[record.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(Attendance.all_objects.using(sharding.shard_for(employee.pk)).exists())
+        self.assertTrue(Tombstone.objects.filter(resource='attendance', object_id=record.id).exists())
@@ -0,0 +1,200 @@
+"""
+Cache-backed token-bucket throttles and load-shedding counters.
+
+Rates use DRF's "N/period" format: N is the bucket capacity and it refills
+at N tokens per period. Each request spends its cost in tokens, so
+expensive endpoints drain a client's bucket faster.
+
+With django_redis the refill and spend run as one Lua script on the Redis
+server, so concurrent requests from every worker draw on the same bucket
+atomically. Other caches (LocMemCache in development) fall back to a
+read-modify-write under a process lock: buckets are then per process, and a
+deployment with W workers admits up to W times the configured rate.
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+
+COUNTER_KEY = 'hrms:throttle:counter:{name}:{outcome}'
+COUNTER_NAMES_KEY = 'hrms:throttle:counter-names'
+COUNTER_TIMEOUT = 24 * 60 * 60
+
+
+def parse_rate(rate):
+    """Return (requests, seconds) for a DRF-style rate such as '100/min'"""
+    num, period = rate.split('/')
+    return int(num), {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[period[0]]
+
+
+def endpoint_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.url_name if match and match.url_name else None
+
+
+def request_cost(request, view):
+    """Token cost of a request: the view's get_throttle_cost, then API_THROTTLE_COSTS"""
+    get_cost = getattr(view, 'get_throttle_cost', None)
+    if get_cost is not None:
+        return get_cost(request)
+    costs = getattr(settings, 'API_THROTTLE_COSTS', {})
+    return costs.get(endpoint_name(request), 1)
+
+
+def increment_counter(name, outcome):
+    """Count a throttling outcome for monitoring"""
+    key = COUNTER_KEY.format(name=name, outcome=outcome)
+    if cache.add(key, 1, COUNTER_TIMEOUT):
+        names = cache.get(COUNTER_NAMES_KEY) or []
+        if name not in names:
+            cache.set(COUNTER_NAMES_KEY, names + [name], COUNTER_TIMEOUT)
+        return
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, COUNTER_TIMEOUT)
+
+
+def counter_snapshot():
+    """Return {name: {outcome: count}} for every counter seen today"""
+    names = cache.get(COUNTER_NAMES_KEY) or []
+    outcomes = ['throttled', 'shed']
+    keys = {
+        COUNTER_KEY.format(name=name, outcome=outcome): (name, outcome)
+        for name in names for outcome in outcomes
+    }
+    values = cache.get_many(list(keys))
+    snapshot = {name: {outcome: 0 for outcome in outcomes} for name in names}
+    for key, value in values.items():
+        name, outcome = keys[key]
+        snapshot[name][outcome] = value
+    return snapshot
+
+
+# KEYS[1] bucket hash; ARGV capacity, refill per second, cost, ttl.
+# Returns {allowed, tokens left as a string}. Uses the server clock so
+# workers with skewed clocks agree.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local refill = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * refill)
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return {allowed, tostring(tokens)}
+"""
+
+_local_lock = threading.Lock()
+_script = None
+
+
+def redis_script():
+    """The registered token-bucket script, or None when the cache is not django_redis"""
+    global _script
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if not backend.startswith('django_redis.'):
+        return None
+    if _script is None:
+        from django_redis import get_redis_connection
+        _script = get_redis_connection('default').register_script(TOKEN_BUCKET_SCRIPT)
+    return _script
+
+
+def spend_tokens(key, capacity, refill_per_second, cost, ttl):
+    """Refill the bucket, spend cost if available; returns (allowed, tokens left)"""
+    script = redis_script()
+    if script is not None:
+        allowed, tokens = script(
+            keys=[cache.make_key(key)], args=[capacity, refill_per_second, cost, ttl]
+        )
+        return bool(allowed), float(tokens)
+
+    with _local_lock:
+        now = time.time()
+        tokens, updated = cache.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * refill_per_second)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        cache.set(key, (tokens, now), ttl)
+    return allowed, tokens
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Base token-bucket throttle. Subclasses provide the bucket key and the
+    rate scope; a scope without a configured rate is not throttled.
+    """
+    cache_format = 'hrms:throttle:bucket:{scope}:{ident}'
+
+    def get_scope(self, request, view):
+        raise NotImplementedError
+
+    def get_ident_for(self, request, view):
+        raise NotImplementedError
+
+    def get_rate(self, scope):
+        return api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        scope = self.get_scope(request, view)
+        rate = self.get_rate(scope) if scope else None
+        if rate is None:
+            return True
+
+        capacity, period = parse_rate(rate)
+        refill_per_second = capacity / period
+        cost = min(request_cost(request, view), capacity)
+        key = self.cache_format.format(scope=scope, ident=self.get_ident_for(request, view))
+
+        allowed, tokens = spend_tokens(key, capacity, refill_per_second, cost, period)
+        if not allowed:
+            self.wait_seconds = (cost - tokens) / refill_per_second
+            increment_counter(scope, 'throttled')
+            return False
+        return True
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class ClientRateThrottle(TokenBucketThrottle):
+    """Per-client bucket (user id, or IP for anonymous clients) for the "client" rate"""
+
+    def get_scope(self, request, view):
+        return 'client'
+
+    def get_ident_for(self, request, view):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return f'user:{user.pk}'
+        return f'ip:{self.get_ident(request)}'
+
+
+class EndpointRateThrottle(TokenBucketThrottle):
+    """
+    Global bucket per endpoint, keyed by URL name, so the combined load on an
+    expensive endpoint is capped no matter how many clients share it
+    """
+
+    def get_scope(self, request, view):
+        return getattr(view, 'throttle_scope', None) or endpoint_name(request)
+
+    def get_ident_for(self, request, view):
+        return 'all'
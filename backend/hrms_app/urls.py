@@ -6,12 +6,25 @@ urlpatterns = [
     path('employees/', views.EmployeeListCreateView.as_view(), name='employee-list-create'),
     path('employees/<int:pk>/', views.EmployeeDetailView.as_view(), name='employee-detail'),
     path('employees/simple/', views.employee_list_simple, name='employee-list-simple'),
+    path('employees/bulk-deactivate/', views.employee_bulk_deactivate, name='employee-bulk-deactivate'),
     path('employees/<int:employee_id>/attendance-summary/', views.employee_attendance_summary, name='employee-attendance-summary'),
     
     # Attendance URLs
     path('attendance/', views.AttendanceListCreateView.as_view(), name='attendance-list-create'),
     path('attendance/<int:pk>/', views.AttendanceDetailView.as_view(), name='attendance-detail'),
     
+    # Change feed URLs
+    path('changes/<str:resource>/', views.change_feed, name='change-feed'),
+    
     # Dashboard URLs
     path('dashboard/', views.dashboard_summary, name='dashboard-summary'),
+    path('dashboard/stream/', views.dashboard_stream, name='dashboard-stream'),
+    
+    # Audit URLs
+    path('audit/', views.AuditEventListView.as_view(), name='audit-event-list'),
+    
+    # Monitoring URLs
+    path('monitoring/throttling/', views.throttling_metrics, name='throttling-metrics'),
+    path('monitoring/profiles/', views.profile_list, name='profile-list'),
+    path('monitoring/profiles/<str:profile_id>/<str:profile_format>/', views.profile_download, name='profile-download'),
 ]
@@ -1,19 +1,73 @@
 from rest_framework import generics, status
 from rest_framework.response import Response
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser
+from django.db import transaction
 from django.db.models import Q
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
 from django.utils import timezone
+from django.utils.http import parse_etags
+from django.views.decorators.http import require_GET
 from datetime import datetime
-from .models import Employee, Attendance
+import json
+import time
+from . import (
+    audit, changefeed, dashboard, events, profiling, purge, sharding, snapshots, throttling,
+    write_buffer,
+)
+from .middleware import in_flight
+from .models import Employee, Attendance, AuditEvent
 from .serializers import (
     EmployeeSerializer, 
     AttendanceSerializer, 
     AttendanceListSerializer,
-    EmployeeAttendanceSummarySerializer
+    AttendanceCheckInSerializer,
+    AuditEventSerializer,
+    EmployeeAttendanceSummarySerializer,
+    EmployeeBulkDeactivateSerializer
 )
 
 
-class EmployeeListCreateView(generics.ListCreateAPIView):
+class SparseFieldsetMixin:
+    """
+    Narrow querysets to the fields selected with ?fields= / ?exclude=
+    """
+
+    def get_queryset(self):
+        return self.apply_sparse_fieldset(super().get_queryset())
+
+    def apply_sparse_fieldset(self, queryset):
+        serializer_class = self.get_serializer_class()
+        if not hasattr(serializer_class, 'restrict_queryset'):
+            return queryset
+        return serializer_class.restrict_queryset(queryset, self.request)
+
+
+class AuditMixin:
+    """
+    Record creates, updates and deletes in the audit trail after commit
+    """
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        instance = serializer.instance
+        audit.record('create', instance, audit.diff({}, audit.snapshot(instance)), self.request)
+
+    def perform_update(self, serializer):
+        before = audit.snapshot(serializer.instance)
+        super().perform_update(serializer)
+        changes = audit.diff(before, audit.snapshot(serializer.instance))
+        if changes:
+            audit.record('update', serializer.instance, changes, self.request)
+
+    def record_destroy(self, instance):
+        """Call from perform_destroy, inside its transaction, before deleting"""
+        audit.record('delete', instance, audit.deletion(audit.snapshot(instance)), self.request)
+
+
+class EmployeeListCreateView(AuditMixin, SparseFieldsetMixin, generics.ListCreateAPIView):
     """
     List all employees or create a new employee
     """
@@ -38,7 +92,7 @@ class EmployeeListCreateView(generics.ListCreateAPIView):
                 Q(email__icontains=search)
             )
         
-        return queryset
+        return self.apply_sparse_fieldset(queryset)
 
     def create(self, request, *args, **kwargs):
         """
@@ -65,7 +119,7 @@ class EmployeeListCreateView(generics.ListCreateAPIView):
         )
 
 
-class EmployeeDetailView(generics.RetrieveUpdateDestroyAPIView):
+class EmployeeDetailView(AuditMixin, SparseFieldsetMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Retrieve, update or delete an employee
     """
@@ -110,13 +164,33 @@ class EmployeeDetailView(generics.RetrieveUpdateDestroyAPIView):
             status=status.HTTP_200_OK
         )
 
+    def perform_destroy(self, instance):
+        """
+        Soft-delete the employee; attendance is purged in the background
+        """
+        with transaction.atomic():
+            self.record_destroy(instance)
+            purge.deactivate_employees(Employee.objects.filter(pk=instance.pk))
+
 
-class AttendanceListCreateView(generics.ListCreateAPIView):
+class AttendanceListCreateView(AuditMixin, SparseFieldsetMixin, generics.ListCreateAPIView):
     """
     List all attendance records or create a new attendance record
     """
     queryset = Attendance.objects.all()
     serializer_class = AttendanceSerializer
+    filter_params = ['employee_id', 'employee', 'date_from', 'date_to', 'status']
+    unfiltered_throttle_cost = 5
+
+    def get_throttle_cost(self, request):
+        """
+        Unfiltered listings page through the whole table, so they spend more tokens
+        """
+        if request.method == 'GET' and not any(
+            request.query_params.get(param) for param in self.filter_params
+        ):
+            return self.unfiltered_throttle_cost
+        return 1
 
     def get_queryset(self):
         """
@@ -153,7 +227,11 @@ class AttendanceListCreateView(generics.ListCreateAPIView):
         if status_filter:
             queryset = queryset.filter(status=status_filter)
         
-        return queryset
+        queryset = self.apply_sparse_fieldset(queryset)
+        if sharding.is_enabled() and employee and employee.isdigit():
+            # One employee's records live on a single shard
+            return queryset.using(sharding.shard_for(employee))
+        return sharding.scatter(queryset)
 
     def get_serializer_class(self):
         """
@@ -167,6 +245,9 @@ class AttendanceListCreateView(generics.ListCreateAPIView):
         """
         Create a new attendance record with proper error handling
         """
+        if write_buffer.is_enabled():
+            return self.create_buffered(request)
+
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
             self.perform_create(serializer)
@@ -187,14 +268,49 @@ class AttendanceListCreateView(generics.ListCreateAPIView):
             status=status.HTTP_400_BAD_REQUEST
         )
 
+    def create_buffered(self, request):
+        """
+        Validate without database queries and queue the check-in for the flusher
+        """
+        serializer = AttendanceCheckInSerializer(data=request.data)
+        if serializer.is_valid():
+            data = serializer.validated_data
+            write_buffer.get_write_buffer().enqueue(data['employee'], data['date'], data['status'])
+            return Response(
+                {
+                    'message': 'Attendance record queued successfully',
+                    'data': serializer.data
+                },
+                status=status.HTTP_202_ACCEPTED
+            )
+        return Response(
+            {
+                'message': 'Failed to create attendance record',
+                'errors': serializer.errors
+            },
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
 
-class AttendanceDetailView(generics.RetrieveUpdateDestroyAPIView):
+class AttendanceDetailView(AuditMixin, SparseFieldsetMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Retrieve, update or delete an attendance record
     """
     queryset = Attendance.objects.all()
     serializer_class = AttendanceSerializer
 
+    def get_object(self):
+        """
+        Look the record up on every shard when attendance is sharded
+        """
+        if not sharding.is_enabled():
+            return super().get_object()
+        instance = sharding.get(self.get_queryset(), pk=self.kwargs['pk'])
+        if instance is None:
+            raise Http404('No Attendance matches the given query.')
+        self.check_object_permissions(self.request, instance)
+        return instance
+
     def update(self, request, *args, **kwargs):
         """
         Update an attendance record with proper error handling
@@ -232,6 +348,49 @@ class AttendanceDetailView(generics.RetrieveUpdateDestroyAPIView):
             status=status.HTTP_200_OK
         )
 
+    def perform_destroy(self, instance):
+        """
+        Delete the attendance record and leave a tombstone for the change feed
+        """
+        # The tombstone is written to the default database, the row may live on a shard
+        with transaction.atomic(), transaction.atomic(using=instance._state.db):
+            self.record_destroy(instance)
+            changefeed.record_deletion(instance)
+            instance.delete()
+
+
+@api_view(['POST'])
+def employee_bulk_deactivate(request):
+    """
+    Soft-delete employees by id and/or department, e.g. for a reorganization
+    """
+    serializer = EmployeeBulkDeactivateSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(
+            {
+                'message': 'Failed to deactivate employees',
+                'errors': serializer.errors
+            },
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    with transaction.atomic():
+        before = {employee.pk: audit.snapshot(employee) for employee in serializer.get_queryset()}
+        ids = purge.deactivate_employees(serializer.get_queryset())
+        audit.record_many([
+            AuditEvent(
+                action='delete', resource='employee', object_id=pk, employee_ref=pk,
+                changes=audit.deletion(before.get(pk, {})), actor=audit.actor_for(request)
+            )
+            for pk in ids
+        ])
+    return Response(
+        {
+            'message': f'{len(ids)} employees deactivated successfully',
+            'data': {'deactivated': ids}
+        }
+    )
+
 
 @api_view(['GET'])
 def employee_attendance_summary(request, employee_id):
@@ -240,7 +399,7 @@ def employee_attendance_summary(request, employee_id):
     """
     try:
         employee = Employee.objects.get(id=employee_id)
-        serializer = EmployeeAttendanceSummarySerializer(employee)
+        serializer = EmployeeAttendanceSummarySerializer(employee, context={'request': request})
         return Response(
             {
                 'message': 'Employee attendance summary retrieved successfully',
@@ -261,51 +420,292 @@ def dashboard_summary(request):
     """
     Get dashboard summary with counts and statistics
     """
-    total_employees = Employee.objects.count()
-    total_attendance_records = Attendance.objects.count()
-    
-    # Today's attendance
-    today = timezone.now().date()
-    today_present = Attendance.objects.filter(date=today, status='Present').count()
-    today_absent = Attendance.objects.filter(date=today, status='Absent').count()
-    
-    # Recent attendance records
-    recent_attendance = Attendance.objects.select_related('employee').order_by('-date', '-created_at')[:10]
-    recent_attendance_data = AttendanceListSerializer(recent_attendance, many=True).data
-    
-    # Department-wise employee count
-    from django.db.models import Count
-    department_stats = Employee.objects.values('department').annotate(
-        count=Count('id')
-    ).order_by('-count')
-    
     return Response(
         {
             'message': 'Dashboard summary retrieved successfully',
-            'data': {
-                'total_employees': total_employees,
-                'total_attendance_records': total_attendance_records,
-                'today_attendance': {
-                    'present': today_present,
-                    'absent': today_absent,
-                    'total': today_present + today_absent
-                },
-                'recent_attendance': recent_attendance_data,
-                'department_stats': list(department_stats)
-            }
+            'data': dashboard.build_summary()
         }
     )
 
 
+@require_GET
+def dashboard_stream(request):
+    """
+    Server-Sent Events stream of live dashboard updates
+
+    Sends the full summary once, then one `attendance` or `employees` event
+    per committed write instead of clients polling dashboard_summary. The
+    stream closes after DASHBOARD_STREAM_MAX_SECONDS and EventSource
+    reconnects automatically.
+
+    Each open stream holds a worker thread, so it needs the gthread worker
+    from gunicorn.conf.py. At most DASHBOARD_STREAM_MAX_PER_PROCESS streams
+    stay open per process; further clients get the summary and are asked to
+    reconnect later, leaving the other threads to the API.
+    """
+    heartbeat = getattr(settings, 'DASHBOARD_STREAM_HEARTBEAT', 15)
+    max_seconds = getattr(settings, 'DASHBOARD_STREAM_MAX_SECONDS', 300)
+    max_streams = getattr(settings, 'DASHBOARD_STREAM_MAX_PER_PROCESS', 4)
+
+    def stream():
+        # Reserved inside the generator so a stream that never starts holds no slot
+        if not events.acquire_stream_slot(max_streams):
+            yield f'retry: {max_seconds * 1000}\n\n'
+            yield events.format_sse('summary', dashboard.build_summary())
+            return
+        try:
+            # Subscribe before reading the summary so no write falls in between
+            subscription = events.get_broker().subscribe(events.DASHBOARD_CHANNEL)
+            try:
+                yield 'retry: 3000\n\n'
+                yield events.format_sse('summary', dashboard.build_summary())
+                deadline = time.monotonic() + max_seconds
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    message = subscription.get(timeout=min(heartbeat, remaining))
+                    if message is None:
+                        yield ': keepalive\n\n'
+                    else:
+                        yield events.format_sse(message['event'], message['data'])
+            finally:
+                subscription.close()
+        finally:
+            events.release_stream_slot()
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@api_view(['GET'])
+def change_feed(request, resource):
+    """
+    Get ordered changes and deletions since a cursor for incremental sync
+
+    Pass `cursor` from the previous page's next_cursor, or `since` (ISO 8601)
+    for a first sync from a point in time. Apply `changes`, then `deleted`.
+    """
+    if resource not in changefeed.RESOURCES:
+        return Response(
+            {
+                'message': f'Unknown change feed resource: {resource}'
+            },
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    cursor = request.query_params.get('cursor')
+    since = request.query_params.get('since')
+    errors = {}
+
+    try:
+        limit = int(request.query_params.get('limit', changefeed.DEFAULT_LIMIT))
+    except ValueError:
+        limit = 0
+    if limit < 1:
+        errors['limit'] = ['Limit must be a positive integer.']
+    limit = min(limit, changefeed.MAX_LIMIT)
+
+    try:
+        if cursor:
+            position = changefeed.decode_cursor(cursor)
+        else:
+            position = changefeed.start_position(since)
+    except changefeed.InvalidCursor as exc:
+        errors['cursor' if cursor else 'since'] = [str(exc)]
+
+    if errors:
+        return Response(
+            {
+                'message': 'Invalid change feed parameters',
+                'errors': errors
+            },
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    return Response(
+        {
+            'message': 'Changes retrieved successfully',
+            'data': changefeed.read_changes(resource, position, limit)
+        }
+    )
+
+
+def etag_matches(header, etag):
+    """
+    Weak If-None-Match comparison: the compression middleware sends W/ tags,
+    which clients echo back
+    """
+    tags = parse_etags(header)
+    return '*' in tags or any(tag.removeprefix('W/') == etag for tag in tags)
+
+
 @api_view(['GET'])
 def employee_list_simple(request):
     """
     Get a simple list of employees for dropdown/selection purposes
+
+    Served from a cached snapshot. Optional query parameters:
+    fields (comma-separated subset of id, employee_id, full_name, department),
+    prefix (case-insensitive employee_id/full_name prefix) and limit.
     """
-    employees = Employee.objects.all().values('id', 'employee_id', 'full_name', 'department')
+    params = request.query_params
+    fields = params.get('fields')
+    prefix = params.get('prefix')
+    limit = params.get('limit') or None
+
+    # Hot path: hand out the pre-rendered body without touching ORM or encoder
+    if not (fields or prefix or limit is not None) and request.accepted_renderer.format == 'json':
+        version, body = snapshots.get_snapshot_body()
+        if version is None:
+            # Built while another process publishes the snapshot: no stable tag yet
+            return HttpResponse(body, content_type='application/json')
+        etag = f'"employees-simple-{version}"'
+        if etag_matches(request.META.get('HTTP_IF_NONE_MATCH', ''), etag):
+            return HttpResponseNotModified(headers={'ETag': etag})
+        return HttpResponse(body, content_type='application/json', headers={'ETag': etag})
+
+    errors = {}
+    selected = snapshots.SIMPLE_FIELDS
+    if fields:
+        selected = [field.strip() for field in fields.split(',') if field.strip()]
+        unknown = [field for field in selected if field not in snapshots.SIMPLE_FIELDS]
+        if unknown:
+            errors['fields'] = [f"Unknown field(s): {', '.join(unknown)}."]
+
+    if limit is not None:
+        try:
+            limit = int(limit)
+            if limit < 0:
+                raise ValueError
+        except ValueError:
+            errors['limit'] = ['Limit must be a non-negative integer.']
+
+    if errors:
+        return Response(
+            {
+                'message': 'Invalid employee list parameters',
+                'errors': errors
+            },
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    _, rows, _ = snapshots.get_snapshot()
+
+    if prefix:
+        prefix = prefix.lower()
+        rows = [
+            row for row in rows
+            if row['employee_id'].lower().startswith(prefix)
+            or row['full_name'].lower().startswith(prefix)
+        ]
+
+    if limit is not None:
+        rows = rows[:limit]
+
+    if fields:
+        rows = [{field: row[field] for field in selected} for row in rows]
+
     return Response(
         {
-            'message': 'Employee list retrieved successfully',
-            'data': list(employees)
+            'message': snapshots.SNAPSHOT_MESSAGE,
+            'data': rows
         }
     )
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def throttling_metrics(request):
+    """
+    Get throttling and load-shedding counters for monitoring
+    """
+    return Response(
+        {
+            'message': 'Throttling metrics retrieved successfully',
+            'data': {
+                'counters': throttling.counter_snapshot(),
+                'in_flight': in_flight(getattr(settings, 'API_CONCURRENCY_LIMITS', {}))
+            }
+        }
+    )
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def profile_list(request):
+    """
+    List the stored request profiles, newest first
+    """
+    return Response(
+        {
+            'message': 'Profiles retrieved successfully',
+            'data': profiling.list_profiles()
+        }
+    )
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def profile_download(request, profile_id, profile_format):
+    """
+    Download a stored profile as pstats, speedscope JSON or its SQL log
+    """
+    profile = profiling.get_profile(profile_id)
+    if profile is None or profile_format not in profiling.available_formats(profile):
+        return Response(
+            {'message': 'Profile not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    if profile_format == 'pstats':
+        response = HttpResponse(profile['pstats'], content_type='application/octet-stream')
+        filename = f'{profile_id}.pstats'
+    elif profile_format == 'speedscope':
+        response = HttpResponse(json.dumps(profile['speedscope']), content_type='application/json')
+        filename = f'{profile_id}.speedscope.json'
+    else:
+        response = HttpResponse(json.dumps(profile['queries'], indent=2), content_type='application/json')
+        filename = f'{profile_id}.sql.json'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+class AuditEventListView(generics.ListAPIView):
+    """
+    Query the audit trail by employee, resource, action and time range
+    """
+    serializer_class = AuditEventSerializer
+    permission_classes = [IsAdminUser]
+
+    def get_queryset(self):
+        """
+        Filter with ?employee=, ?resource=, ?action=, ?start= and ?end= (ISO 8601)
+        """
+        queryset = AuditEvent.objects.all()
+        params = self.request.query_params
+        
+        if params.get('employee'):
+            if not params['employee'].isdigit():
+                raise ValidationError({'employee': 'Employee must be a numeric id.'})
+            queryset = queryset.filter(employee_ref=params['employee'])
+        
+        if params.get('resource'):
+            queryset = queryset.filter(resource=params['resource'])
+        
+        if params.get('action'):
+            queryset = queryset.filter(action=params['action'])
+        
+        for param, lookup in [('start', 'occurred_at__gte'), ('end', 'occurred_at__lt')]:
+            if params.get(param):
+                try:
+                    value = changefeed.parse_timestamp(params[param], 'Use an ISO 8601 date or timestamp.')
+                except changefeed.InvalidCursor as error:
+                    raise ValidationError({param: str(error)})
+                if timezone.is_naive(value):
+                    value = timezone.make_aware(value)
+                queryset = queryset.filter(**{lookup: value})
+        
+        return queryset
@@ -0,0 +1,322 @@
+"""
+Write-coalescing buffer for high-rate attendance check-ins.
+
+With ATTENDANCE_BUFFERED_WRITES enabled, AttendanceListCreateView.create
+validates the payload without touching the database and appends it to a
+durable queue: a local SQLite file (single node) or a Redis list. The
+flush_attendance_buffer command drains the queue every few hundred
+milliseconds. It keeps the last write per (employee, date), drops unknown
+employees, and upserts the rest with chunked bulk_create transactions.
+Rows whose status actually changed are audited as creates or updates.
+
+Items are claimed with a lease and only acknowledged after their
+transaction commits, so a crashed flusher's batch is retried. Only the
+flusher writes: reads never drain the queue, so a queued check-in (answered
+with 202 Accepted) shows up in reads once the flusher has written it,
+normally within ATTENDANCE_BUFFER_FLUSH_INTERVAL.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from . import audit, sharding
+from .models import Employee, Attendance, AuditEvent
+
+logger = logging.getLogger(__name__)
+
+
+class LocalQueue:
+    """Durable queue in a local SQLite file, shared by all workers on one node"""
+
+    def __init__(self, path, lease_seconds=30):
+        self.path = str(path)
+        self.lease_seconds = lease_seconds
+        self._local = threading.local()
+
+    @property
+    def connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=FULL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS attendance_queue ('
+                'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                'payload TEXT NOT NULL, '
+                'lease_token TEXT, '
+                'lease_until REAL NOT NULL DEFAULT 0)'
+            )
+            self._local.connection = connection
+        return connection
+
+    def push(self, item):
+        self.connection.execute(
+            'INSERT INTO attendance_queue (payload) VALUES (?)', [json.dumps(item)]
+        )
+
+    def pending(self):
+        return self.connection.execute('SELECT COUNT(*) FROM attendance_queue').fetchone()[0]
+
+    def claim(self, limit):
+        """Lease up to `limit` unclaimed or expired items; returns (token, items)"""
+        token = uuid.uuid4().hex
+        now = time.time()
+        connection = self.connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.execute(
+                'UPDATE attendance_queue SET lease_token = ?, lease_until = ? '
+                'WHERE id IN (SELECT id FROM attendance_queue WHERE lease_until < ? '
+                'ORDER BY id LIMIT ?)',
+                [token, now + self.lease_seconds, now, limit]
+            )
+            rows = connection.execute(
+                'SELECT payload FROM attendance_queue WHERE lease_token = ? ORDER BY id', [token]
+            ).fetchall()
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return token, [json.loads(payload) for payload, in rows]
+
+    def ack(self, token):
+        self.connection.execute('DELETE FROM attendance_queue WHERE lease_token = ?', [token])
+
+    def release(self, token):
+        self.connection.execute(
+            'UPDATE attendance_queue SET lease_token = NULL, lease_until = 0 WHERE lease_token = ?',
+            [token]
+        )
+
+
+# Atomically move a batch from the queue to a leased processing list
+REDIS_CLAIM_SCRIPT = """
+local items = redis.call('LRANGE', KEYS[1], 0, tonumber(ARGV[1]) - 1)
+if #items > 0 then
+    redis.call('LTRIM', KEYS[1], #items, -1)
+    redis.call('RPUSH', KEYS[2], unpack(items))
+    redis.call('ZADD', KEYS[3], ARGV[2], ARGV[3])
+end
+return items
+"""
+
+# Push a leased batch back to the head of the queue, preserving order
+REDIS_RELEASE_SCRIPT = """
+local items = redis.call('LRANGE', KEYS[2], 0, -1)
+for i = #items, 1, -1 do
+    redis.call('LPUSH', KEYS[1], items[i])
+end
+redis.call('DEL', KEYS[2])
+redis.call('ZREM', KEYS[3], ARGV[1])
+return #items
+"""
+
+
+class RedisQueue:
+    """Durable queue in a Redis list, shared by every node"""
+
+    key = 'hrms:attendance-buffer:queue'
+    processing_key = 'hrms:attendance-buffer:processing:{token}'
+    leases_key = 'hrms:attendance-buffer:leases'
+
+    def __init__(self, connection, lease_seconds=30):
+        self.connection = connection
+        self.lease_seconds = lease_seconds
+        self._claim = connection.register_script(REDIS_CLAIM_SCRIPT)
+        self._release = connection.register_script(REDIS_RELEASE_SCRIPT)
+
+    def push(self, item):
+        self.connection.rpush(self.key, json.dumps(item))
+
+    def pending(self):
+        return self.connection.llen(self.key) + self.connection.zcard(self.leases_key)
+
+    def claim(self, limit):
+        self.recover_expired()
+        token = uuid.uuid4().hex
+        items = self._claim(
+            keys=[self.key, self.processing_key.format(token=token), self.leases_key],
+            args=[limit, time.time() + self.lease_seconds, token],
+        )
+        return token, [json.loads(item) for item in items]
+
+    def ack(self, token):
+        pipeline = self.connection.pipeline()
+        pipeline.delete(self.processing_key.format(token=token))
+        pipeline.zrem(self.leases_key, token)
+        pipeline.execute()
+
+    def release(self, token):
+        self._release(
+            keys=[self.key, self.processing_key.format(token=token), self.leases_key],
+            args=[token],
+        )
+
+    def recover_expired(self):
+        for token in self.connection.zrangebyscore(self.leases_key, '-inf', time.time()):
+            self.release(token.decode() if isinstance(token, bytes) else token)
+
+
+class AttendanceWriteBuffer:
+    """Enqueue check-ins and flush them to the database in coalesced batches"""
+
+    def __init__(self, queue, batch_size=500):
+        self.queue = queue
+        self.batch_size = batch_size
+
+    def enqueue(self, employee_id, date, status):
+        self.queue.push({
+            'employee': employee_id,
+            'date': date.isoformat(),
+            'status': status,
+            'queued_at': timezone.now().isoformat(),
+        })
+
+    def pending(self):
+        return self.queue.pending()
+
+    def flush(self):
+        """Flush one batch; returns (items claimed, rows written)"""
+        token, items = self.queue.claim(self.batch_size)
+        if not items:
+            return 0, 0
+        try:
+            written = self.write(items)
+        except Exception:
+            self.queue.release(token)
+            raise
+        self.queue.ack(token)
+        return len(items), written
+
+    def flush_all(self, max_batches=100):
+        """Flush until nothing is left to claim (or max_batches); returns rows written"""
+        written = 0
+        for _ in range(max_batches):
+            claimed, batch_written = self.flush()
+            if not claimed:
+                break
+            written += batch_written
+        return written
+
+    def write(self, items):
+        """Coalesce items in memory and upsert them in one transaction"""
+        latest = {}
+        for item in items:
+            # Later items win, matching the order the check-ins arrived in
+            latest[(item['employee'], parse_date(item['date']))] = item['status']
+
+        known = set(
+            Employee.objects.filter(id__in={employee for employee, _ in latest})
+            .values_list('id', flat=True)
+        )
+        records = [
+            Attendance(employee_id=employee, date=day, status=status)
+            for (employee, day), status in latest.items()
+            if employee in known
+        ]
+        dropped = len(latest) - len(records)
+        if dropped:
+            logger.warning('Dropped %d buffered check-ins for unknown employees', dropped)
+
+        with transaction.atomic():
+            events = []
+            for using, group in sharding.group_by_shard(records).items():
+                with transaction.atomic(using=using):
+                    events.extend(self.upsert(using, group))
+            audit.record_many(events)
+
+        if records:
+            from . import dashboard
+            today = timezone.now().date()
+            touches_today = any(record.date == today for record in records)
+            transaction.on_commit(
+                lambda: dashboard.publish_attendance_batch(len(records), touches_today), robust=True
+            )
+        return len(records)
+
+    def upsert(self, using, records):
+        """Upsert one database's records; returns audit events for the rows that changed"""
+        rows = Attendance.objects.using(using).filter(
+            employee_id__in={record.employee_id for record in records},
+            date__in={record.date for record in records},
+        )
+        # Locked so the old status is still current when the upsert overwrites it
+        before = {
+            (employee, day): (pk, status)
+            for pk, employee, day, status in
+            rows.select_for_update().values_list('id', 'employee_id', 'date', 'status')
+        }
+        Attendance.objects.using(using).bulk_create(
+            records,
+            update_conflicts=True,
+            unique_fields=['employee', 'date'],
+            update_fields=['status', 'updated_at'],
+        )
+        # bulk_create does not return the ids of upserted rows, so read back
+        # the ids of exactly the rows that did not exist before
+        new_keys = {(record.employee_id, record.date) for record in records} - before.keys()
+        created = {}
+        if new_keys:
+            created = {
+                (employee, day): pk
+                for pk, employee, day in rows.values_list('id', 'employee_id', 'date')
+                if (employee, day) in new_keys
+            }
+
+        events = []
+        for record in records:
+            key = (record.employee_id, record.date)
+            if key in before:
+                pk, status = before[key]
+                if status == record.status:
+                    continue
+                action, changes = 'update', {'status': [status, record.status]}
+            else:
+                pk = created.get(key)
+                action, changes = 'create', audit.diff({}, {
+                    'employee_id': record.employee_id, 'date': record.date, 'status': record.status
+                })
+            events.append(AuditEvent(
+                action=action, resource='attendance', object_id=pk,
+                employee_ref=record.employee_id, changes=changes
+            ))
+        return events
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def is_enabled():
+    return getattr(settings, 'ATTENDANCE_BUFFERED_WRITES', False)
+
+
+def get_write_buffer():
+    """Return the process-wide write buffer, creating it on first use"""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = create_write_buffer()
+    return _buffer
+
+
+def create_write_buffer():
+    lease_seconds = getattr(settings, 'ATTENDANCE_BUFFER_LEASE_SECONDS', 30)
+    if getattr(settings, 'ATTENDANCE_BUFFER_BACKEND', 'local') == 'redis':
+        from django_redis import get_redis_connection
+        queue = RedisQueue(get_redis_connection('default'), lease_seconds)
+    else:
+        queue = LocalQueue(settings.ATTENDANCE_BUFFER_PATH, lease_seconds)
+    return AttendanceWriteBuffer(queue, getattr(settings, 'ATTENDANCE_BUFFER_BATCH_SIZE', 500))
+
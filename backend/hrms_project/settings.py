@@ -4,7 +4,7 @@ Environment-based configuration for development and production.
 """
 
 import os
-import dj_database_url
+import importlib.util
 from pathlib import Path
 from decouple import config, Csv
 
@@ -35,6 +35,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'hrms_app.middleware.APICompressionMiddleware',  # Negotiated zstd/br/gzip for /api/ responses
     'whitenoise.middleware.WhiteNoiseMiddleware',  # For static files in production
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -42,6 +43,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'hrms_app.middleware.ConcurrencyLimitMiddleware',  # Sheds load on expensive endpoints
+    'hrms_app.middleware.ProfilingMiddleware',  # Sampled / on-demand request profiles
 ]
 
 ROOT_URLCONF = 'hrms_project.urls'
@@ -65,29 +68,65 @@ TEMPLATES = [
 WSGI_APPLICATION = 'hrms_project.wsgi.application'
 
 # Database Configuration
+# Persistent connections let each worker thread reuse its connection across requests
+CONN_MAX_AGE = config('CONN_MAX_AGE', default=0, cast=int)
 DATABASE_ENGINE = config('DATABASE_ENGINE', default='django.db.backends.sqlite3')
 
+# SQLite tuned for concurrent workers: WAL, synchronous=NORMAL, busy_timeout and
+# IMMEDIATE write transactions (see hrms_project/sqlite3/base.py).
+# Set SQLITE_TUNED=False to fall back to Django's stock backend.
+SQLITE_DATABASE = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': BASE_DIR / config('DATABASE_NAME', default='db.sqlite3'),
+    'CONN_MAX_AGE': CONN_MAX_AGE,
+}
+if config('SQLITE_TUNED', default=True, cast=bool):
+    SQLITE_DATABASE['ENGINE'] = 'hrms_project.sqlite3'
+    SQLITE_DATABASE['OPTIONS'] = {
+        'transaction_mode': config('SQLITE_TRANSACTION_MODE', default='IMMEDIATE'),
+        'pragmas': {
+            'busy_timeout': config('SQLITE_BUSY_TIMEOUT_MS', default=5000, cast=int),
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'mmap_size': config('SQLITE_MMAP_SIZE', default=256 * 1024 * 1024, cast=int),
+            'cache_size': -config('SQLITE_CACHE_SIZE_KB', default=64 * 1024, cast=int),
+            'temp_store': 'MEMORY',
+        },
+    }
+
 if DATABASE_ENGINE == 'django.db.backends.postgresql':
     DATABASE_URL = os.environ.get("DATABASE_URL")
     if DATABASE_URL:
+        # Only needed for URL-configured databases, so imported here
+        import dj_database_url
         DATABASES = {
-            'default': dj_database_url.parse(DATABASE_URL)
+            'default': dj_database_url.parse(DATABASE_URL, conn_max_age=CONN_MAX_AGE)
         }
     else:
-        DATABASES = {
-            'default': {
-                'ENGINE': 'django.db.backends.sqlite3',
-                'NAME': BASE_DIR / config('DATABASE_NAME', default='db.sqlite3'),
-            }
-        }
+        DATABASES = {'default': SQLITE_DATABASE}
 else:
     # SQLite configuration (default for development)
-    DATABASES = {
-        'default': {
-            'ENGINE': 'django.db.backends.sqlite3',
-            'NAME': BASE_DIR / config('DATABASE_NAME', default='db.sqlite3'),
-        }
-    }
+    DATABASES = {'default': SQLITE_DATABASE}
+
+# Optional hash-sharded attendance storage (see hrms_app/sharding.py).
+# ATTENDANCE_SHARD_URLS takes one database URL per shard; otherwise
+# ATTENDANCE_SHARD_COUNT local SQLite files are created next to the default
+# database. Only ever append shards, then run `manage.py migrate --database
+# attendance_shard_<n>` and `manage.py rebalance_attendance_shards`.
+ATTENDANCE_SHARD_URLS = config('ATTENDANCE_SHARD_URLS', default='', cast=Csv())
+ATTENDANCE_SHARDS = []
+if ATTENDANCE_SHARD_URLS:
+    import dj_database_url
+    for number, url in enumerate(ATTENDANCE_SHARD_URLS):
+        DATABASES[f'attendance_shard_{number}'] = dj_database_url.parse(url, conn_max_age=CONN_MAX_AGE)
+        ATTENDANCE_SHARDS.append(f'attendance_shard_{number}')
+else:
+    for number in range(config('ATTENDANCE_SHARD_COUNT', default=0, cast=int)):
+        DATABASES[f'attendance_shard_{number}'] = dict(
+            SQLITE_DATABASE, NAME=BASE_DIR / f'attendance_shard_{number}.sqlite3'
+        )
+        ATTENDANCE_SHARDS.append(f'attendance_shard_{number}')
+DATABASE_ROUTERS = ['hrms_app.sharding.AttendanceShardRouter']
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -123,15 +162,64 @@ MEDIA_ROOT = config('MEDIA_ROOT', default=BASE_DIR / 'media')
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # REST Framework Configuration
+# The first renderer is the default; the others are content-negotiated via the
+# Accept header or ?format=columnar / ?format=msgpack
+API_RENDERER_CLASSES = [
+    'hrms_app.renderers.ORJSONRenderer',
+    'hrms_app.renderers.ColumnarJSONRenderer',
+]
+if importlib.util.find_spec('msgpack') is not None:
+    API_RENDERER_CLASSES.append('hrms_app.renderers.MessagePackRenderer')
+
 REST_FRAMEWORK = {
-    'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
-    ],
+    'DEFAULT_RENDERER_CLASSES': API_RENDERER_CLASSES,
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    'DEFAULT_THROTTLE_CLASSES': [
+        'hrms_app.throttling.ClientRateThrottle',
+        'hrms_app.throttling.EndpointRateThrottle',
+    ],
+    # Token buckets: "client" is per user/IP, the others cap an endpoint globally.
+    # Rates are in tokens, and a dashboard-summary load costs 10: 6000/min
+    # allows 600 loads a minute across all users (about 10/s, 5 queries each).
+    # Live dashboards use the SSE stream, so this only caps polling and
+    # initial page loads; API_CONCURRENCY_LIMITS bounds the in-flight work.
+    'DEFAULT_THROTTLE_RATES': {
+        'client': config('THROTTLE_CLIENT_RATE', default='1200/min'),
+        'dashboard-summary': config('THROTTLE_DASHBOARD_RATE', default='6000/min'),
+        'attendance-list-create': config('THROTTLE_ATTENDANCE_RATE', default='6000/min'),
+    },
+    # Reverse proxies in front of the app: anonymous clients are identified by
+    # the X-Forwarded-For entry this many hops back (0 uses REMOTE_ADDR). Left
+    # unset, DRF would trust the whole client-supplied header.
+    'NUM_PROXIES': config('NUM_PROXIES', default=0, cast=int),
+}
+
+# Tokens spent per request on expensive endpoints (default 1)
+API_THROTTLE_COSTS = {
+    'dashboard-summary': 10,
+    'employee-attendance-summary': 3,
+}
+
+# Maximum concurrent requests per endpoint before shedding with 429 (across all
+# workers with Redis, per process with LocMemCache)
+API_CONCURRENCY_LIMITS = {
+    'dashboard-summary': config('CONCURRENCY_DASHBOARD', default=8, cast=int),
+    'attendance-list-create': config('CONCURRENCY_ATTENDANCE', default=32, cast=int),
+    'employee-attendance-summary': config('CONCURRENCY_ATTENDANCE_SUMMARY', default=16, cast=int),
+}
+API_CONCURRENCY_RETRY_AFTER = 1
+
+# API response compression (static files are already compressed by whitenoise).
+# Lower levels trade bandwidth for CPU; these defaults favour fast JSON encoding.
+API_COMPRESSION_MIN_SIZE = config('API_COMPRESSION_MIN_SIZE', default=1024, cast=int)
+API_COMPRESSION_LEVELS = {
+    'gzip': config('API_COMPRESSION_GZIP_LEVEL', default=6, cast=int),
+    'br': config('API_COMPRESSION_BROTLI_LEVEL', default=4, cast=int),
+    'zstd': config('API_COMPRESSION_ZSTD_LEVEL', default=3, cast=int),
 }
 
 # CORS Configuration
@@ -177,6 +265,57 @@ else:
         }
     }
 
+# Lifetime of the cached employee_list_simple snapshot (patched on Employee saves).
+# LocMemCache snapshots are per process and never see other workers' patches,
+# so they expire quickly; with Redis every worker shares one snapshot.
+EMPLOYEE_SNAPSHOT_TIMEOUT = config(
+    'EMPLOYEE_SNAPSHOT_TIMEOUT', default=3600 if REDIS_URL and not DEBUG else 60, cast=int
+)
+
+# Seconds the change feed holds back fresh rows so late-committing writes aren't skipped
+CHANGE_FEED_SAFETY_LAG = config('CHANGE_FEED_SAFETY_LAG', default=2, cast=int)
+
+# Live dashboard (Server-Sent Events) stream timings, in seconds. Streams need
+# gunicorn's gthread worker (gunicorn.conf.py): a sync worker would be killed
+# once a stream outlives GUNICORN_TIMEOUT.
+DASHBOARD_STREAM_HEARTBEAT = config('DASHBOARD_STREAM_HEARTBEAT', default=15, cast=int)
+DASHBOARD_STREAM_MAX_SECONDS = config('DASHBOARD_STREAM_MAX_SECONDS', default=300, cast=int)
+# Open streams per process; keep it below GUNICORN_THREADS so API requests
+# always have free threads
+DASHBOARD_STREAM_MAX_PER_PROCESS = config('DASHBOARD_STREAM_MAX_PER_PROCESS', default=4, cast=int)
+
+# Implicit absences: absent days are working days (per WorkingCalendar) minus
+# present days, so Absent rows no longer need to be written
+ATTENDANCE_IMPLICIT_ABSENCES = config('ATTENDANCE_IMPLICIT_ABSENCES', default=False, cast=bool)
+
+# Audit trail: events are appended in batches by a background thread per
+# worker (AUDIT_ASYNC=False writes them synchronously after each commit)
+AUDIT_ENABLED = config('AUDIT_ENABLED', default=True, cast=bool)
+AUDIT_ASYNC = config('AUDIT_ASYNC', default=True, cast=bool)
+AUDIT_BATCH_SIZE = config('AUDIT_BATCH_SIZE', default=200, cast=int)
+AUDIT_FLUSH_INTERVAL = config('AUDIT_FLUSH_INTERVAL', default=1.0, cast=float)
+# A batch that still fails after AUDIT_WRITE_ATTEMPTS tries is saved here and
+# written back once the database accepts audit events again
+AUDIT_WRITE_ATTEMPTS = config('AUDIT_WRITE_ATTEMPTS', default=5, cast=int)
+AUDIT_SPILL_DIR = config('AUDIT_SPILL_DIR', default=BASE_DIR / 'audit_spill')
+
+# Request profiling: a fraction of requests (or staff requests with an X-Profile
+# header, or X-Profile: <PROFILING_TOKEN>) run under cProfile or a stack sampler
+PROFILING_SAMPLE_RATE = config('PROFILING_SAMPLE_RATE', default=0.0, cast=float)
+PROFILING_MODE = config('PROFILING_MODE', default='cprofile')  # 'cprofile' or 'sampling'
+PROFILING_SAMPLE_INTERVAL = config('PROFILING_SAMPLE_INTERVAL', default=0.005, cast=float)
+PROFILING_BUFFER_SIZE = config('PROFILING_BUFFER_SIZE', default=50, cast=int)
+PROFILING_TOKEN = config('PROFILING_TOKEN', default='')
+
+# Buffered attendance writes: check-ins are queued (local SQLite file or Redis list)
+# and flushed in batches by `manage.py flush_attendance_buffer`
+ATTENDANCE_BUFFERED_WRITES = config('ATTENDANCE_BUFFERED_WRITES', default=False, cast=bool)
+ATTENDANCE_BUFFER_BACKEND = config('ATTENDANCE_BUFFER_BACKEND', default='local')
+ATTENDANCE_BUFFER_PATH = config('ATTENDANCE_BUFFER_PATH', default=BASE_DIR / 'attendance_buffer.sqlite3')
+ATTENDANCE_BUFFER_BATCH_SIZE = config('ATTENDANCE_BUFFER_BATCH_SIZE', default=500, cast=int)
+ATTENDANCE_BUFFER_FLUSH_INTERVAL = config('ATTENDANCE_BUFFER_FLUSH_INTERVAL', default=0.25, cast=float)
+ATTENDANCE_BUFFER_LEASE_SECONDS = config('ATTENDANCE_BUFFER_LEASE_SECONDS', default=30, cast=int)
+
 # Email Configuration
 EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.console.EmailBackend')
 EMAIL_HOST = config('EMAIL_HOST', default='')
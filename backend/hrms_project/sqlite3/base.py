@@ -0,0 +1,45 @@
+"""
+SQLite backend tuned for several application workers writing to one file.
+
+Use ENGINE 'hrms_project.sqlite3'. On top of Django's backend it accepts
+two extra OPTIONS:
+
+- 'pragmas': PRAGMAs run on every new connection (WAL journal,
+  synchronous=NORMAL, busy_timeout, mmap_size, cache_size, ...).
+- 'transaction_mode': how atomic() blocks begin, default IMMEDIATE.
+
+IMMEDIATE matters as much as WAL: a DEFERRED transaction that reads and
+then writes has to upgrade its lock, and SQLite fails that upgrade with
+"database is locked" at once instead of waiting out busy_timeout.
+Taking the write lock at BEGIN makes writers queue on busy_timeout.
+"""
+
+from django.db.backends.sqlite3 import base
+
+
+DEFAULT_PRAGMAS = {
+    'busy_timeout': 5000,
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+}
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        self.pragmas = kwargs.pop('pragmas', DEFAULT_PRAGMAS)
+        self.transaction_mode = kwargs.pop('transaction_mode', 'IMMEDIATE').upper()
+        if self.transaction_mode not in TRANSACTION_MODES:
+            raise ValueError(f'Unsupported SQLite transaction mode {self.transaction_mode!r}')
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(f'BEGIN {self.transaction_mode}')
@@ -0,0 +1,55 @@
+"""
+Warm-up hooks for preloaded application servers.
+
+`warm_up_application` runs once in the gunicorn master after the app is
+preloaded, so the work is shared copy-on-write by every forked worker.
+`warm_up_connections` runs in each worker before it accepts requests, since
+cache sockets must not be shared across a fork. Database connections are
+not warmed: Django keeps one per thread, and the gthread worker's request
+threads never use a connection opened by the worker's main thread.
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up_application():
+    """Import views, populate URL resolvers and build serializer fields"""
+    from django.urls import get_resolver
+
+    from hrms_app import renderers, serializers, views  # noqa: F401
+    from hrms_app.lazy import optional_module
+
+    resolver = get_resolver()
+    resolver.url_patterns
+    resolver.reverse_dict
+
+    # Building fields once fills Django's model _meta caches before fork
+    for serializer_class in [
+        serializers.EmployeeSerializer,
+        serializers.AttendanceSerializer,
+        serializers.AttendanceListSerializer,
+        serializers.EmployeeAttendanceSummarySerializer,
+    ]:
+        serializer_class().fields
+
+    for name in ('msgpack', 'brotli', 'zstandard'):
+        optional_module(name)
+
+
+def warm_up_connections():
+    """Open this worker's cache connection pool"""
+    from django.core.cache import cache
+
+    try:
+        cache.get('hrms:warmup')
+    except Exception:
+        logger.exception('Could not warm up cache connection')
+
+
+def close_connections():
+    """Drop connections opened in the master so forks start clean"""
+    from django.db import connections
+
+    connections.close_all()